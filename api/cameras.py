@@ -1,13 +1,26 @@
+import asyncio
+import base64
 import logging
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from models.schemas import ApiError, CameraListResponse
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
 
-from services.camera_service import camera_service
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from models.schemas import ApiError, CameraListResponse, CameraSnapshotBatch, CameraSnapshotMetrics
+
+from services.camera_service import BATCH_TIMEOUT_SECONDS, CachedSnapshot, SnapshotError, camera_service
+from services.camera_archive import camera_archive
+from services.camera_stream import MJPEG_BOUNDARY, camera_stream_hub
+from services.tracing import TracedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/cameras", tags=["cameras"])
+router = APIRouter(prefix="/api/cameras", tags=["cameras"], route_class=TracedRoute)
+
+MIN_WIDTH = 16
+MAX_WIDTH = 3840
+DEFAULT_QUALITY = 75
 
 
 @router.get("", response_model=CameraListResponse, summary="List configured cameras")
@@ -15,26 +28,152 @@ async def get_cameras():
     return {"cameras": camera_service.get_cameras()}
 
 
+@router.get("/metrics", response_model=CameraSnapshotMetrics, summary="Get camera snapshot cache metrics")
+async def get_camera_metrics():
+    metrics = camera_service.get_snapshot_metrics()
+    metrics["streams"] = camera_stream_hub.get_stats()
+    return metrics
+
+
+@router.get(
+    "/stream/{camera_id}",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}": {}}},
+        404: {"model": ApiError},
+    },
+    summary="Stream a camera as MJPEG",
+)
+async def stream_camera(
+    camera_id: str,
+    width: Optional[int] = Query(None, ge=MIN_WIDTH, le=MAX_WIDTH, description="Scale frames down to this width"),
+    quality: int = Query(DEFAULT_QUALITY, ge=10, le=95, description="JPEG quality when resizing"),
+):
+    if not camera_service.get_camera_by_id(camera_id):
+        raise HTTPException(status_code=404, detail=f"Camera not found: {camera_id}")
+
+    return StreamingResponse(
+        camera_stream_hub.frames(camera_id, width, quality),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get("/snapshots", response_model=CameraSnapshotBatch, summary="Fetch snapshots from several cameras in one request")
+async def get_snapshots(
+    ids: Optional[str] = Query(None, description="Comma-separated camera ids. Omit to fetch all cameras."),
+    timeout: float = Query(BATCH_TIMEOUT_SECONDS, gt=0, le=30, description="Per-camera timeout in seconds"),
+    width: Optional[int] = Query(None, ge=MIN_WIDTH, le=MAX_WIDTH, description="Scale each image down to this width"),
+    quality: int = Query(DEFAULT_QUALITY, ge=10, le=95, description="JPEG quality for resized images"),
+):
+    camera_ids = [i.strip() for i in ids.split(",") if i.strip()] if ids else None
+    results = await camera_service.get_snapshots(camera_ids, timeout_seconds=timeout, width=width, quality=quality)
+
+    snapshots = []
+    for camera_id, (snapshot, error) in results.items():
+        if error:
+            snapshots.append({"camera_id": camera_id, "error": error})
+            continue
+        snapshots.append({
+            "camera_id": camera_id,
+            "content_type": "image/jpeg",
+            "data": base64.b64encode(snapshot.data).decode("ascii"),
+            "etag": snapshot.etag,
+            "last_modified": formatdate(snapshot.last_modified, usegmt=True),
+            "age_seconds": round(snapshot.age(), 2),
+        })
+    return {"snapshots": snapshots}
+
+
+ERROR_STATUS = {
+    SnapshotError.NOT_FOUND: 404,
+    SnapshotError.UNSUPPORTED: 501,
+    SnapshotError.UPSTREAM: 502,
+    SnapshotError.TIMEOUT: 504,
+}
+
+
+def _raise_for_error(camera_id: str, error: SnapshotError) -> None:
+    logger.warning(f"Snapshot error for {camera_id}: {error}")
+    status_code = ERROR_STATUS.get(getattr(error, "kind", SnapshotError.UPSTREAM), 502)
+    raise HTTPException(status_code=status_code, detail=str(error))
+
+
+def _not_modified(snapshot: CachedSnapshot, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    if if_none_match is not None:
+        return snapshot.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if if_modified_since:
+        try:
+            return int(snapshot.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
 @router.get(
     "/snapshot/{camera_id}",
     responses={
         200: {"content": {"image/jpeg": {}}},
+        304: {"description": "Snapshot unchanged since the validator the client sent"},
         404: {"model": ApiError},
+        501: {"model": ApiError},
         502: {"model": ApiError},
         504: {"model": ApiError},
     },
     summary="Fetch a camera snapshot",
 )
-async def get_snapshot(camera_id: str):
-    image_data, error = await camera_service.get_snapshot(camera_id)
-    
+async def get_snapshot(
+    camera_id: str,
+    width: Optional[int] = Query(None, ge=MIN_WIDTH, le=MAX_WIDTH, description="Scale the image down to this width"),
+    quality: int = Query(DEFAULT_QUALITY, ge=10, le=95, description="JPEG quality when resizing"),
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    if_modified_since: Optional[str] = Header(None, include_in_schema=False),
+):
+    if width:
+        snapshot, error = await camera_service.get_resized_snapshot(camera_id, width, quality)
+    else:
+        snapshot, error = await camera_service.get_cached_snapshot(camera_id)
     if error:
-        logger.warning(f"Snapshot error for {camera_id}: {error}")
-        if "not found" in error:
-            raise HTTPException(status_code=404, detail=error)
-        elif "Timeout" in error:
-            raise HTTPException(status_code=504, detail=error)
-        else:
-            raise HTTPException(status_code=502, detail=error)
-    
-    return Response(content=image_data, media_type="image/jpeg")
+        _raise_for_error(camera_id, error)
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": formatdate(snapshot.last_modified, usegmt=True),
+        "Cache-Control": f"private, max-age={int(camera_service.snapshot_max_age_seconds)}",
+    }
+    if _not_modified(snapshot, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=snapshot.data, media_type="image/jpeg", headers=headers)
+
+
+# Registered last so /snapshot/{id} and /stream/{id} win over /{camera_id}/history.
+@router.get(
+    "/{camera_id}/history",
+    responses={
+        200: {"content": {"image/jpeg": {}}},
+        404: {"model": ApiError},
+    },
+    summary="Fetch the archived snapshot closest before a point in time",
+)
+async def get_snapshot_history(
+    camera_id: str,
+    at: datetime = Query(..., description="ISO 8601 time; naive values are server local time"),
+):
+    if not camera_service.get_camera_by_id(camera_id):
+        raise HTTPException(status_code=404, detail=f"Camera not found: {camera_id}")
+
+    frame = await asyncio.to_thread(camera_archive.find, camera_id, at.timestamp())
+    if frame is None:
+        raise HTTPException(status_code=404, detail=f"No archived snapshot for {camera_id} at or before {at.isoformat()}")
+
+    taken_at = datetime.fromtimestamp(frame.timestamp).astimezone().isoformat()
+    return Response(
+        content=frame.data,
+        media_type="image/jpeg",
+        headers={
+            "X-Snapshot-Time": taken_at,
+            "Last-Modified": formatdate(frame.timestamp, usegmt=True),
+            "Cache-Control": "private, max-age=86400, immutable",
+        },
+    )
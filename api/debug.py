@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from models.schemas import LoopLagResponse, SlowRequestsResponse
+from services.auth import require_control_auth
+from services.profiler import PROFILE_MAX_SECONDS, ProfilerBusyError, loop_lag_monitor, profiler
+from services.tracing import TRACE_SAMPLE_RATE, slow_request_log
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+
+@router.get("/slow", response_model=SlowRequestsResponse, summary="Recent slow requests with span timings")
+async def get_slow_requests():
+    return {
+        "threshold_ms": slow_request_log.threshold_ms,
+        "sample_rate": TRACE_SAMPLE_RATE,
+        "recorded": slow_request_log.recorded,
+        "requests": slow_request_log.get_entries(),
+    }
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Sample all thread stacks for N seconds (collapsed flamegraph format)",
+    dependencies=[Depends(require_control_auth)],
+)
+async def get_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    lines: bool = Query(False, description="Split frames by line number"),
+    idle: bool = Query(False, description="Include threads parked waiting for work"),
+):
+    try:
+        sampler = await profiler.profile(seconds, lines=lines, include_idle=idle)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={"X-Profile-Samples": str(sampler.samples), "X-Profile-Idle-Samples": str(sampler.idle_samples)},
+    )
+
+
+@router.get("/loop", response_model=LoopLagResponse, summary="Recent event loop stalls with the blocking stack")
+async def get_loop_stalls():
+    return {
+        "enabled": loop_lag_monitor.running,
+        "threshold_ms": loop_lag_monitor.threshold * 1000,
+        "stalls_total": loop_lag_monitor.stalls_total,
+        "max_lag_ms": loop_lag_monitor.max_lag_ms,
+        "stalls": loop_lag_monitor.get_stalls(),
+    }
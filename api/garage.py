@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from models.schemas import ApiError, GarageStatus, GarageToggleResponse
 from services.auth import require_control_auth
 from services.meross_service import meross_service
+from services.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/garage", tags=["garage"])
+router = APIRouter(prefix="/api/garage", tags=["garage"], route_class=TracedRoute)
+logger = logging.getLogger(__name__)
 
 @router.get("/status", response_model=GarageStatus, summary="Get Meross garage controller status")
-async def get_garage_status():
+async def get_garage_status(
+    refresh: bool = Query(False, description="Read all door states from the controller instead of the push-updated cache"),
+):
+    if refresh and meross_service._connected:
+        try:
+            await meross_service.refresh_door_states()
+        except Exception as e:
+            logger.warning(f"Garage door state refresh failed: {e}")
     return {
         "door_count": meross_service.get_door_count(),
-        "available": meross_service._connected
+        "available": meross_service._connected,
+        "doors": meross_service.get_door_states(),
     }
 
 async def _toggle_garage(door_index: int):
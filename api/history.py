@@ -2,8 +2,9 @@ import json
 from fastapi import APIRouter, Query
 from models.database import get_device_history
 from models.schemas import HistoryRecord
+from services.tracing import TracedRoute, span
 
-router = APIRouter(tags=["history"])
+router = APIRouter(tags=["history"], route_class=TracedRoute)
 
 def _ensure_utc_timestamp(ts: str) -> str:
     """SQLite stores UTC timestamps without a suffix; add Z for frontend parsing."""
@@ -14,7 +15,8 @@ def _ensure_utc_timestamp(ts: str) -> str:
 
 @router.get("/api/history", response_model=list[HistoryRecord], summary="Get recent device history")
 async def get_history(hours: int = Query(24, ge=1, le=168)):
-    history = get_device_history(hours=hours)
+    with span("db.history_read"):
+        history = get_device_history(hours=hours)
     
     for record in history:
         if isinstance(record.get('data'), str):
@@ -0,0 +1,52 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.command_queue import command_queue
+from services.dynamic_scheduler import dynamic_scheduler
+from services.metrics import registry
+from services.scheduler import scheduler
+from services.wemo_descriptors import wemo_descriptor_cache
+from services.wemo_events import wemo_event_hub
+from services.wemo_service import wemo_service
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+registry.gauge_callback(
+    "smart_home_scheduled_actions_pending",
+    "Delayed actions waiting to run.",
+    lambda: len(dynamic_scheduler.pending_actions),
+)
+registry.gauge_callback(
+    "smart_home_scheduler_jobs",
+    "Jobs registered with the APScheduler instance.",
+    lambda: len(scheduler.get_jobs()),
+)
+registry.gauge_callback(
+    "smart_home_command_queue_pending",
+    "Device commands waiting to be coalesced and applied.",
+    lambda: {(key,): count for key, count in command_queue.pending_counts().items()},
+    ("device",),
+)
+registry.gauge_callback(
+    "smart_home_wemo_devices",
+    "Registered Wemo devices.",
+    lambda: len(wemo_service.devices),
+)
+registry.gauge_callback(
+    "smart_home_wemo_push_subscriptions",
+    "Wemo devices with a live UPnP event subscription.",
+    lambda: len(wemo_event_hub.get_stats()["subscribed"]),
+)
+registry.gauge_callback(
+    "smart_home_wemo_descriptor_cache_entries",
+    "Wemo devices with cached descriptors on disk.",
+    lambda: wemo_descriptor_cache.get_stats()["entries"],
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -1,16 +1,19 @@
 import logging
 
-from fastapi import APIRouter, Depends, Query
-from models.schemas import ActionResult, RinnaiStatus
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from models.schemas import ActionResult, RinnaiMetrics, RinnaiStatus
 from services.auth import require_control_auth
 from services.rinnai_service import rinnai_service
 from services.post_action_collector import schedule_collection
+from services.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/rinnai", tags=["rinnai"])
+router = APIRouter(prefix="/api/rinnai", tags=["rinnai"], route_class=TracedRoute)
 logger = logging.getLogger(__name__)
 
 @router.get("/status", response_model=RinnaiStatus, summary="Get Rinnai water heater status")
-async def get_rinnai_status(refresh: bool = False):
+async def get_rinnai_status(
+    refresh: bool = Query(False, description="Return the maintenance-refreshed snapshot and refresh it in the background"),
+):
     return await rinnai_service.get_status(trigger_maintenance=refresh)
 
 @router.post("/maintenance", response_model=RinnaiStatus, summary="Trigger Rinnai maintenance refresh", dependencies=[Depends(require_control_auth)])
@@ -28,9 +31,43 @@ async def refresh_rinnai_status(wait_seconds: float = Query(5.0, ge=0, le=30)):
 @router.post("/circulate", response_model=ActionResult, summary="Start Rinnai recirculation", dependencies=[Depends(require_control_auth)])
 async def rinnai_circulate(duration: int = Query(5, gt=0, le=60)):
     result = await rinnai_service.start_circulation(duration)
-    await schedule_collection("rinnai", "main_house")
+    if rinnai_service.device_id:
+        await schedule_collection("rinnai", rinnai_service.device_id)
+    return result
+
+@router.get("/devices", response_model=dict[str, RinnaiStatus], summary="Get status for every Rinnai water heater")
+async def get_all_rinnai_status(
+    refresh: bool = Query(False, description="Return the maintenance-refreshed snapshots and refresh them in the background"),
+):
+    return await rinnai_service.get_all_statuses(trigger_maintenance=refresh)
+
+def _require_device(device_id: str) -> str:
+    if not rinnai_service.has_device(device_id):
+        raise HTTPException(404, f"Rinnai device {device_id} not found")
+    return device_id
+
+@router.get("/{device_id}/status", response_model=RinnaiStatus, summary="Get status for one Rinnai water heater")
+async def get_rinnai_device_status(
+    device_id: str = Path(..., description="Rinnai device id"),
+    refresh: bool = Query(False, description="Return the maintenance-refreshed snapshot and refresh it in the background"),
+):
+    _require_device(device_id)
+    return await rinnai_service.get_status(trigger_maintenance=refresh, device_id=device_id)
+
+@router.post("/{device_id}/circulate", response_model=ActionResult, summary="Start recirculation on one Rinnai water heater", dependencies=[Depends(require_control_auth)])
+async def rinnai_device_circulate(
+    device_id: str = Path(..., description="Rinnai device id"),
+    duration: int = Query(5, gt=0, le=60),
+):
+    _require_device(device_id)
+    result = await rinnai_service.start_circulation(duration, device_id=device_id)
+    await schedule_collection("rinnai", device_id)
     return result
 
 @router.get("/schedules", response_model=list[dict], summary="List Rinnai schedules")
 async def get_rinnai_schedules():
     return await rinnai_service.get_schedules()
+
+@router.get("/metrics", response_model=RinnaiMetrics, summary="Get Rinnai cloud call counters")
+async def get_rinnai_metrics():
+    return rinnai_service.get_metrics()
@@ -2,12 +2,14 @@ import os
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from models.schemas import CreateActionRequest, ScheduledActionListResponse, ScheduledActionResponse
+from models.schemas import CreateActionRequest, ScheduledActionListResponse, ScheduledActionResponse, WemoScheduleResponse
 from services.auth import require_control_auth
 
 from services.dynamic_scheduler import dynamic_scheduler
+from services.wemo_schedule import wemo_schedule_manager
+from services.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/schedule", tags=["schedule"])
+router = APIRouter(prefix="/api/schedule", tags=["schedule"], route_class=TracedRoute)
 
 
 @router.post("/actions", response_model=ScheduledActionResponse, summary="Schedule a delayed action", dependencies=[Depends(require_control_auth)])
@@ -41,3 +43,8 @@ async def cancel_action(action_id: str):
     if not action:
         raise HTTPException(status_code=404, detail="Action not found")
     return action.to_dict()
+
+
+@router.get("/wemo", response_model=WemoScheduleResponse, summary="List configured Wemo schedule tasks with run stats")
+async def list_wemo_schedule():
+    return {"tasks": wemo_schedule_manager.get_scheduled_tasks()}
@@ -8,9 +8,9 @@ from services.hue_service import hue_service
 from services.wemo_service import wemo_service
 from services.rinnai_service import rinnai_service
 from services.meross_service import meross_service
-from models.database import save_device_state
+from services.tracing import TracedRoute
 
-router = APIRouter(tags=["status"])
+router = APIRouter(tags=["status"], route_class=TracedRoute)
 logger = logging.getLogger(__name__)
 
 ALL_DEVICES = {"hue", "wemo", "rinnai", "garage"}
@@ -50,7 +50,7 @@ def _safe_garage_status():
     try:
         door_count = meross_service.get_door_count()
         available = meross_service._connected
-        return {"door_count": door_count, "available": available}
+        return {"door_count": door_count, "available": available, "doors": meross_service.get_door_states()}
     except Exception as e:
         logger.warning(f"Garage status failed: {e}")
         return {"door_count": 0, "available": False}
@@ -64,7 +64,7 @@ def _safe_garage_status():
 )
 async def get_all_status(
     devices: Optional[str] = Query(None, description="Comma-separated: hue,wemo,rinnai,garage. Omit to fetch all."),
-    rinnai_refresh: bool = Query(False, description="Trigger Rinnai maintenance before fetching"),
+    rinnai_refresh: bool = Query(False, description="Return the maintenance-refreshed Rinnai snapshot and refresh it in the background"),
 ):
     requested = ALL_DEVICES if not devices else {s.strip().lower() for s in devices.split(",") if s.strip()}
     result = {}
@@ -73,22 +73,9 @@ async def get_all_status(
         result["hue"] = _safe_hue_status()
 
     if "rinnai" in requested:
-        rinnai_status = await _safe_rinnai_status(trigger_maintenance=rinnai_refresh)
-        result["rinnai"] = rinnai_status
-        if rinnai_refresh and "error" not in rinnai_status:
-            inlet = rinnai_status.get("inlet_temp")
-            outlet = rinnai_status.get("outlet_temp")
-            if (inlet is not None and inlet != 0) or (outlet is not None and outlet != 0):
-                try:
-                    save_device_state("rinnai", "main_house", {
-                        "set_temperature": rinnai_status.get("set_temperature"),
-                        "inlet_temp": inlet,
-                        "outlet_temp": outlet,
-                        "water_flow": rinnai_status.get("water_flow"),
-                        "recirculation_enabled": rinnai_status.get("recirculation_enabled"),
-                    })
-                except Exception as e:
-                    logger.warning(f"Failed to save Rinnai state to DB: {e}")
+        # With rinnai_refresh the cached maintenance snapshot is returned right
+        # away; the background refresh job and collectors record history.
+        result["rinnai"] = await _safe_rinnai_status(trigger_maintenance=rinnai_refresh)
 
     if "wemo" in requested:
         result["wemo"] = await asyncio.to_thread(_safe_wemo_status)
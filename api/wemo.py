@@ -1,32 +1,66 @@
 import asyncio
-from typing import Dict
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends
-from models.schemas import ActionResult, WemoDeviceStatus
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from models.schemas import ActionResult, WemoDeviceStatus, WemoEnergyResponse, WemoPowerReading
 from services.auth import require_control_auth
+from services.command_queue import submit_wemo
 from services.wemo_service import wemo_service
+from services.wemo_power import get_energy_by_day, wemo_power_collector
+from services.wemo_events import wemo_event_hub
 from services.post_action_collector import schedule_collection
+from services.tracing import TracedRoute
 
-router = APIRouter(prefix="/api/wemo", tags=["wemo"])
+router = APIRouter(prefix="/api/wemo", tags=["wemo"], route_class=TracedRoute)
 
 @router.get("/status", response_model=Dict[str, WemoDeviceStatus], summary="Get Wemo switch statuses")
 async def get_wemo_status():
     return await asyncio.to_thread(wemo_service.get_all_status)
 
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    summary="Live Wemo state changes as server-sent events",
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def wemo_events():
+    return StreamingResponse(
+        wemo_event_hub.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/subscriptions", summary="Wemo push subscription and fallback polling stats")
+async def get_wemo_subscriptions():
+    return await asyncio.to_thread(wemo_event_hub.get_stats)
+
+@router.get("/power", response_model=Dict[str, WemoPowerReading], summary="Latest Insight power readings")
+async def get_wemo_power():
+    return wemo_power_collector.get_latest()
+
+@router.get("/energy", response_model=WemoEnergyResponse, summary="Insight energy use per device and day")
+async def get_wemo_energy(
+    days: int = Query(7, ge=1, le=366, description="Number of days to include"),
+    device: Optional[str] = Query(None, description="Optional device name filter"),
+):
+    rows = await asyncio.to_thread(get_energy_by_day, days, device.lower() if device else None)
+    return {"days": rows}
+
 @router.post("/{device_name}/toggle", response_model=ActionResult, summary="Toggle a Wemo switch", dependencies=[Depends(require_control_auth)])
 async def wemo_toggle(device_name: str):
-    result = await asyncio.to_thread(wemo_service.toggle, device_name)
+    result = await submit_wemo(device_name, None)
     await schedule_collection("wemo", device_name)
     return result
 
 @router.post("/{device_name}/on", response_model=ActionResult, summary="Turn a Wemo switch on", dependencies=[Depends(require_control_auth)])
 async def wemo_on(device_name: str):
-    result = await asyncio.to_thread(wemo_service.turn_on, device_name)
+    result = await submit_wemo(device_name, {"on": True})
     await schedule_collection("wemo", device_name)
     return result
 
 @router.post("/{device_name}/off", response_model=ActionResult, summary="Turn a Wemo switch off", dependencies=[Depends(require_control_auth)])
 async def wemo_off(device_name: str):
-    result = await asyncio.to_thread(wemo_service.turn_off, device_name)
+    result = await submit_wemo(device_name, {"on": False})
     await schedule_collection("wemo", device_name)
     return result
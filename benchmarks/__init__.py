@@ -0,0 +1,5 @@
+"""Performance regression benchmarks with baselines stored in benchmarks/baselines.json.
+
+Cases live in benchmarks.cases and are timed by benchmarks.runner; run them
+with scripts/bench_regress.py.
+"""
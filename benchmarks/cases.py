@@ -0,0 +1,154 @@
+import asyncio
+import json
+import random
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from benchmarks.runner import benchmark
+from models import database
+
+HISTORY_SIZES = (1_000, 10_000, 50_000)
+SERIALIZE_ROWS = 5_000
+SCHEDULED_ACTIONS = 2_000
+STATUS_CONCURRENCY = 10
+
+
+@contextmanager
+def _temporary_database(rows: int):
+    """Point models.database at a throwaway DB holding `rows` history rows over the last 48h."""
+    previous = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        try:
+            database.init_db()
+            _seed_history(database.DB_PATH, rows)
+            yield
+        finally:
+            database.DB_PATH = previous
+
+
+def _seed_history(path: Path, rows: int) -> None:
+    rng = random.Random(rows)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    devices = [("hue", "baby_room"), ("wemo", "coffee"), ("wemo", "heater"), ("rinnai", "main"), ("garage", "door_1")]
+    conn = sqlite3.connect(str(path))
+    conn.executemany(
+        "INSERT INTO device_history (device_type, device_name, timestamp, data) VALUES (?, ?, ?, ?)",
+        (
+            (
+                *devices[index % len(devices)],
+                (now - timedelta(seconds=rng.uniform(0, 48 * 3600))).strftime("%Y-%m-%d %H:%M:%S"),
+                json.dumps({"is_on": bool(index % 2), "brightness": index % 255}),
+            )
+            for index in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _history_records(count: int) -> list[dict]:
+    """Rows as the /api/history handler returns them, before response validation."""
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            "id": index,
+            "device_type": "wemo",
+            "device_name": "coffee",
+            "timestamp": (start + timedelta(seconds=index)).isoformat() + "Z",
+            "data": {"is_on": bool(index % 2), "source": "poll"},
+        }
+        for index in range(count)
+    ]
+
+
+def _asgi_client() -> httpx.AsyncClient:
+    from main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def _register_history_query(rows: int) -> None:
+    @benchmark(f"history.query[{rows}]", rounds=15)
+    async def history_query():
+        with _temporary_database(rows):
+            yield lambda: database.get_device_history(hours=24)
+
+
+for _rows in HISTORY_SIZES:
+    _register_history_query(_rows)
+
+
+@benchmark(f"history.serialize[{SERIALIZE_ROWS}]", rounds=15)
+async def history_serialize():
+    from main import app
+
+    route = next(r for r in app.routes if isinstance(r, APIRoute) and r.path == "/api/history")
+    records = _history_records(SERIALIZE_ROWS)
+
+    async def serialize():
+        # The same steps FastAPI runs after the handler returns.
+        content = await serialize_response(field=route.response_field, response_content=records, is_coroutine=True)
+        JSONResponse(content).body
+
+    yield serialize
+
+
+@benchmark(f"history.endpoint[{SERIALIZE_ROWS * 2}]", rounds=15)
+async def history_endpoint():
+    with _temporary_database(SERIALIZE_ROWS * 2):
+        async with _asgi_client() as client:
+            async def fetch():
+                response = await client.get("/api/history", params={"hours": 24})
+                response.raise_for_status()
+
+            yield fetch
+
+
+@benchmark(f"status.fanout[x{STATUS_CONCURRENCY}]", rounds=15)
+async def status_fanout():
+    from simulator import FaultProfile, SimulatedFleet
+
+    with SimulatedFleet(FaultProfile(latency_ms=5), wemo_count=3, camera_count=0, seed=0) as fleet:
+        fleet.attach()
+        try:
+            async with _asgi_client() as client:
+                async def fetch():
+                    responses = await asyncio.gather(*(client.get("/api/status") for _ in range(STATUS_CONCURRENCY)))
+                    for response in responses:
+                        response.raise_for_status()
+
+                yield fetch
+        finally:
+            await fleet.detach()
+
+
+@benchmark(f"scheduler.schedule_cancel[{SCHEDULED_ACTIONS}]", rounds=20)
+async def scheduler_schedule_cancel():
+    from services import dynamic_scheduler as scheduler_module
+
+    # The API caps pending actions; lift the cap to measure the data structure itself.
+    previous_cap = scheduler_module.MAX_PENDING_ACTIONS
+    scheduler_module.MAX_PENDING_ACTIONS = SCHEDULED_ACTIONS
+
+    async def schedule_and_cancel():
+        scheduler = scheduler_module.DynamicScheduler()
+        for index in range(SCHEDULED_ACTIONS):
+            scheduler.schedule("hue.toggle", {}, minutes=60 + index % 120)
+        scheduler.get_pending()
+        tasks = list(scheduler._tasks.values())
+        for action_id in list(scheduler.pending_actions):
+            scheduler.cancel(action_id)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        yield schedule_and_cancel
+    finally:
+        scheduler_module.MAX_PENDING_ACTIONS = previous_cap
@@ -0,0 +1,243 @@
+import asyncio
+import gc
+import inspect
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
+
+BASELINE_FILE = Path(__file__).parent / "baselines.json"
+DEFAULT_THRESHOLD = 0.25
+# How many baseline spreads (interquartile ranges) a median may move before it counts.
+SPREAD_FACTOR = 3.0
+
+CaseFactory = Callable[[], AsyncIterator[Callable]]
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    factory: CaseFactory
+    rounds: int
+    warmup: int
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    min_s: float
+    median_s: float
+    mean_s: float
+    stdev_s: float
+    spread_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "min_s": self.min_s,
+            "median_s": self.median_s,
+            "mean_s": self.mean_s,
+            "stdev_s": self.stdev_s,
+            "spread_s": self.spread_s,
+        }
+
+    @classmethod
+    def from_timings(cls, name: str, timings: list[float]) -> "BenchmarkResult":
+        if len(timings) > 1:
+            lower, _, upper = statistics.quantiles(timings, n=4)
+            spread = upper - lower
+        else:
+            spread = 0.0
+        return cls(
+            name=name,
+            rounds=len(timings),
+            min_s=min(timings),
+            median_s=statistics.median(timings),
+            mean_s=statistics.fmean(timings),
+            stdev_s=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            spread_s=spread,
+        )
+
+
+@dataclass
+class Comparison:
+    name: str
+    current_s: float
+    baseline_s: Optional[float]
+    limit_s: Optional[float]
+    change: Optional[float]
+    regressed: bool
+
+    @property
+    def status(self) -> str:
+        if self.baseline_s is None:
+            return "new"
+        return "REGRESSED" if self.regressed else "ok"
+
+
+_registry: dict[str, BenchmarkCase] = {}
+
+
+def benchmark(name: str, rounds: int = 10, warmup: int = 2):
+    """Register an async generator as a benchmark case.
+
+    The generator does its setup, yields the callable to time (sync or async,
+    one call per round) and tears down after the yield.
+    """
+    def register(factory: CaseFactory) -> CaseFactory:
+        _registry[name] = BenchmarkCase(name, factory, rounds, warmup)
+        return factory
+    return register
+
+
+def get_cases(only: Optional[list[str]] = None) -> list[BenchmarkCase]:
+    cases = list(_registry.values())
+    if only:
+        cases = [case for case in cases if any(case.name.startswith(prefix) for prefix in only)]
+    return cases
+
+
+async def run_case(case: BenchmarkCase, rounds: Optional[int] = None) -> BenchmarkResult:
+    return BenchmarkResult.from_timings(case.name, await time_case(case, rounds))
+
+
+async def time_case(case: BenchmarkCase, rounds: Optional[int] = None) -> list[float]:
+    generator = case.factory()
+    func = await generator.__anext__()
+    is_async = inspect.iscoroutinefunction(func)
+    timings = []
+    try:
+        for index in range(case.warmup + (rounds or case.rounds)):
+            # Like timeit: collect garbage left by the previous round and keep
+            # the collector out of the timed call.
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                if is_async:
+                    await func()
+                else:
+                    func()
+                elapsed = time.perf_counter() - started
+            finally:
+                gc.enable()
+            if index >= case.warmup:
+                timings.append(elapsed)
+    finally:
+        try:
+            await generator.__anext__()
+        except StopAsyncIteration:
+            pass
+    return timings
+
+
+async def run_cases(
+    cases: list[BenchmarkCase], rounds: Optional[int] = None, repeat: int = 1
+) -> list[BenchmarkResult]:
+    """Time every case `repeat` times and pool the rounds of all passes.
+
+    Cases run sequentially so they do not compete for the CPU, and each pass
+    runs all cases before the next one starts, so a slow spell on the host
+    lands in the spread of every case instead of skewing one of them.
+    """
+    timings: dict[str, list[float]] = {case.name: [] for case in cases}
+    for _ in range(max(repeat, 1)):
+        for case in cases:
+            timings[case.name].extend(await time_case(case, rounds))
+    return [BenchmarkResult.from_timings(name, values) for name, values in timings.items()]
+
+
+def run(cases: list[BenchmarkCase], rounds: Optional[int] = None, repeat: int = 1) -> list[BenchmarkResult]:
+    return asyncio.run(run_cases(cases, rounds, repeat))
+
+
+async def check_cases(
+    cases: list[BenchmarkCase],
+    baselines: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    rounds: Optional[int] = None,
+    retries: int = 2,
+) -> tuple[list[BenchmarkResult], list[Comparison]]:
+    """Run and compare the cases, re-running the ones that look regressed.
+
+    A case only counts as regressed when every retry is still over the limit;
+    the fastest-median result is kept, so one slow spell is not reported.
+    """
+    results = {result.name: result for result in await run_cases(cases, rounds)}
+    by_name = {case.name: case for case in cases}
+    for _ in range(retries):
+        regressed = [c.name for c in compare(list(results.values()), baselines, threshold) if c.regressed]
+        if not regressed:
+            break
+        for result in await run_cases([by_name[name] for name in regressed], rounds):
+            if result.median_s < results[result.name].median_s:
+                results[result.name] = result
+    ordered = list(results.values())
+    return ordered, compare(ordered, baselines, threshold)
+
+
+def load_baselines(path: Path = BASELINE_FILE) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("benchmarks", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: list[BenchmarkResult], path: Path = BASELINE_FILE, merge: bool = True) -> None:
+    """Write results as the new baselines, keeping entries for cases that were not run."""
+    benchmarks = load_baselines(path) if merge else {}
+    benchmarks.update({result.name: result.to_dict() for result in results})
+    document = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+        },
+        "benchmarks": dict(sorted(benchmarks.items())),
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+
+def regression_limit(baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> float:
+    """Slowest acceptable median: the baseline median plus its noise or `threshold`, whichever is larger."""
+    median = baseline["median_s"]
+    return median + max(threshold * median, SPREAD_FACTOR * baseline.get("spread_s", 0.0))
+
+
+def compare(results: list[BenchmarkResult], baselines: dict, threshold: float = DEFAULT_THRESHOLD) -> list[Comparison]:
+    """Compare medians; a case regresses when its median is over regression_limit() of its baseline.
+
+    The allowance grows with the spread measured when the baseline was
+    recorded, so cases that are noisy on this machine get a wider margin than
+    the fixed threshold.
+    """
+    comparisons = []
+    for result in results:
+        baseline = baselines.get(result.name)
+        if baseline is None or "median_s" not in baseline:
+            comparisons.append(Comparison(result.name, result.median_s, None, None, None, False))
+            continue
+        baseline_s = baseline["median_s"]
+        limit_s = regression_limit(baseline, threshold)
+        change = (result.median_s - baseline_s) / baseline_s if baseline_s > 0 else 0.0
+        comparisons.append(
+            Comparison(result.name, result.median_s, baseline_s, limit_s, change, result.median_s > limit_s)
+        )
+    return comparisons
+
+
+def format_comparisons(comparisons: list[Comparison]) -> str:
+    width = max([len("benchmark")] + [len(c.name) for c in comparisons])
+    lines = [f"{'benchmark':<{width}}  {'median_ms':>10}  {'baseline_ms':>11}  {'limit_ms':>10}  {'change':>8}  status"]
+    for c in comparisons:
+        baseline = f"{c.baseline_s * 1000:.3f}" if c.baseline_s is not None else "-"
+        limit = f"{c.limit_s * 1000:.3f}" if c.limit_s is not None else "-"
+        change = f"{c.change:+.1%}" if c.change is not None else "-"
+        lines.append(
+            f"{c.name:<{width}}  {c.current_s * 1000:>10.3f}  {baseline:>11}  {limit:>10}  {change:>8}  {c.status}"
+        )
+    return "\n".join(lines)
@@ -61,7 +61,7 @@ export function CameraCard({
         )}
         <img
           key={imgKey}
-          src={`${snapshotUrl}?t=${imgKey}`}
+          src={snapshotUrl.startsWith('data:') ? snapshotUrl : `${snapshotUrl}?t=${imgKey}`}
           alt={name}
           className={`w-full h-full object-cover ${loading || error ? 'opacity-0' : 'opacity-100'}`}
           onLoad={() => {}}
@@ -3,13 +3,22 @@ import { useState, useEffect } from 'react';
 interface CameraModalProps {
   cameraName: string;
   snapshotUrl: string;
+  streamUrl?: string;
   onClose: () => void;
 }
 
-export function CameraModal({ cameraName, snapshotUrl, onClose }: CameraModalProps) {
+export function CameraModal({ cameraName, snapshotUrl, streamUrl, onClose }: CameraModalProps) {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [key, setKey] = useState(Date.now());
+  const [live, setLive] = useState(false);
+
+  const toggleLive = () => {
+    setLoading(true);
+    setError(null);
+    setLive(!live);
+    setKey(Date.now());
+  };
 
   const handleRefresh = () => {
     setLoading(true);
@@ -37,6 +46,14 @@ export function CameraModal({ cameraName, snapshotUrl, onClose }: CameraModalPro
         <div className="flex justify-between items-center p-4 border-b">
           <h2 className="text-xl font-semibold">{cameraName} - Full resolution</h2>
           <div className="flex gap-2">
+            {streamUrl && (
+              <button
+                onClick={toggleLive}
+                className={`px-3 py-1 rounded ${live ? 'bg-red-500 text-white hover:bg-red-600' : 'bg-gray-200 hover:bg-gray-300'}`}
+              >
+                {live ? 'Stop live' : 'Live'}
+              </button>
+            )}
             <button
               onClick={handleRefresh}
               className="px-3 py-1 bg-blue-500 text-white rounded hover:bg-blue-600"
@@ -68,7 +85,7 @@ export function CameraModal({ cameraName, snapshotUrl, onClose }: CameraModalPro
           )}
           <img
             key={key}
-            src={`${snapshotUrl}?t=${key}`}
+            src={live && streamUrl ? streamUrl : `${snapshotUrl}?t=${key}`}
             alt={cameraName}
             className={`max-w-full max-h-[70vh] object-contain ${loading || error ? 'hidden' : ''}`}
             onLoad={() => setLoading(false)}
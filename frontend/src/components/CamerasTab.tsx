@@ -4,7 +4,7 @@ import { CameraCard } from './CameraCard';
 import { CameraModal } from './CameraModal';
 
 export function CamerasTab() {
-  const { cameras, states, loading, error, refreshAll, getSnapshotUrl } = useCameras();
+  const { cameras, states, loading, error, refreshAll, refreshCamera, getSnapshotUrl, getFullSnapshotUrl } = useCameras();
   const [selectedCamera, setSelectedCamera] = useState<{ name: string; id: string } | null>(null);
 
   const handleRefreshAll = () => {
@@ -49,7 +49,7 @@ export function CamerasTab() {
             loading={states[camera.id]?.loading ?? false}
             error={states[camera.id]?.error ?? null}
             onClick={() => setSelectedCamera(camera)}
-            onRefresh={() => {}}
+            onRefresh={() => refreshCamera(camera.id)}
           />
         ))}
       </div>
@@ -57,7 +57,8 @@ export function CamerasTab() {
       {selectedCamera && (
         <CameraModal
           cameraName={selectedCamera.name}
-          snapshotUrl={getSnapshotUrl(selectedCamera.id)}
+          snapshotUrl={getFullSnapshotUrl(selectedCamera.id)}
+          streamUrl={`/api/cameras/stream/${selectedCamera.id}`}
           onClose={() => setSelectedCamera(null)}
         />
       )}
@@ -215,11 +215,14 @@ export function ControlTab() {
             </h2>
           </div>
           <div className="divide-y divide-gray-50">
-            {Array.from({ length: Math.min(status.garage.door_count, 2) }, (_, i) => (
+            {Array.from({ length: Math.min(status.garage.door_count, 2) }, (_, i) => {
+              const door = status.garage.doors?.find((d) => d.door === i + 1);
+              const stateLabel = door?.open == null ? 'Click to trigger toggle' : door.open ? 'Open' : 'Closed';
+              return (
               <div key={i + 1} className="flex items-center justify-between px-4 py-3">
                 <div>
                   <div className="font-medium text-gray-900">Garage door {i + 1}</div>
-                  <div className="text-sm text-gray-500">Click to trigger toggle</div>
+                  <div className="text-sm text-gray-500">{stateLabel}</div>
                 </div>
                 <button
                   onClick={() => toggleGarage(i + 1)}
@@ -228,7 +231,8 @@ export function ControlTab() {
                   Trigger
                 </button>
               </div>
-            ))}
+              );
+            })}
           </div>
         </section>
       )}
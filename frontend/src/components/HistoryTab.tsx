@@ -101,20 +101,27 @@ export function HistoryTab() {
     wemoHistory[name].reverse();
   });
 
-  const rinnaiHistory = history
+  const rinnaiHistory: Record<string, { time: number; timestamp: string; inlet_temp: number; outlet_temp: number; set_temp: number }[]> = {};
+  history
     .filter(h => h.device_type === 'rinnai')
-    .map(h => {
+    .forEach(h => {
+      if (!rinnaiHistory[h.device_name]) {
+        rinnaiHistory[h.device_name] = [];
+      }
       const data = parseData(h.data);
-      const ts = new Date(h.timestamp).getTime();
-      return {
-        time: ts,
+      rinnaiHistory[h.device_name].push({
+        time: new Date(h.timestamp).getTime(),
         timestamp: formatPacificTime(h.timestamp),
         inlet_temp: (data.inlet_temp as number) ?? 0,
         outlet_temp: (data.outlet_temp as number) ?? 0,
         set_temp: (data.set_temperature as number) ?? 0,
-      };
-    })
-    .sort((a, b) => a.time - b.time);
+      });
+    });
+
+  Object.values(rinnaiHistory).forEach(records => {
+    records.sort((a, b) => a.time - b.time);
+  });
+  const rinnaiNames = Object.keys(rinnaiHistory).sort();
 
   const wemoTotalOn: Record<string, number> = {};
   Object.entries(wemoHistory).forEach(([name, records]) => {
@@ -167,11 +174,13 @@ export function HistoryTab() {
         </div>
       )}
 
-      {rinnaiHistory.length > 0 && (
-        <div className="bg-white rounded-lg shadow p-4">
-          <h2 className="text-lg font-semibold mb-3">🚿 Water heater temperatures (24h)</h2>
+      {rinnaiNames.map(name => (
+        <div key={name} className="bg-white rounded-lg shadow p-4">
+          <h2 className="text-lg font-semibold mb-3">
+            🚿 Water heater temperatures{rinnaiNames.length > 1 ? ` - ${name}` : ''} (24h)
+          </h2>
           <ResponsiveContainer width="100%" height={280}>
-            <LineChart data={rinnaiHistory}>
+            <LineChart data={rinnaiHistory[name]}>
               <CartesianGrid strokeDasharray="3 3" />
               <XAxis
                 dataKey="time"
@@ -189,7 +198,7 @@ export function HistoryTab() {
             </LineChart>
           </ResponsiveContainer>
         </div>
-      )}
+      ))}
     </div>
   );
 }
@@ -10,9 +10,21 @@ interface CameraState {
   error: string | null;
 }
 
+interface CameraSnapshot {
+  camera_id: string;
+  content_type?: string;
+  data?: string;
+  error?: string | null;
+}
+
+// Grid tiles are small; the backend scales snapshots down before sending them.
+const GRID_WIDTH = 640;
+const GRID_QUALITY = 70;
+
 export function useCameras() {
   const [cameras, setCameras] = useState<Camera[]>([]);
   const [states, setStates] = useState<Record<string, CameraState>>({});
+  const [images, setImages] = useState<Record<string, string>>({});
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -39,14 +51,43 @@ export function useCameras() {
     fetchCameras();
   }, []);
 
-  const refreshAll = () => {
+  // One request for the whole batch; the backend fetches cameras concurrently.
+  const loadSnapshots = async (ids: string[]) => {
     const newStates: Record<string, CameraState> = {};
-    cameras.forEach(cam => {
-      newStates[cam.id] = { loading: true, error: null };
+    ids.forEach(id => {
+      newStates[id] = { loading: true, error: null };
     });
-    setStates(newStates);
+    setStates(prev => ({ ...prev, ...newStates }));
+
+    try {
+      const params = new URLSearchParams({ ids: ids.join(','), width: String(GRID_WIDTH), quality: String(GRID_QUALITY) });
+      const response = await fetch(`/api/cameras/snapshots?${params}`);
+      if (!response.ok) throw new Error('Failed to fetch snapshots');
+      const data: { snapshots: CameraSnapshot[] } = await response.json();
+
+      const nextImages: Record<string, string> = {};
+      const nextStates: Record<string, CameraState> = {};
+      data.snapshots.forEach(snapshot => {
+        if (snapshot.data) {
+          nextImages[snapshot.camera_id] = `data:${snapshot.content_type ?? 'image/jpeg'};base64,${snapshot.data}`;
+        }
+        nextStates[snapshot.camera_id] = { loading: false, error: snapshot.error ?? null };
+      });
+      setImages(prev => ({ ...prev, ...nextImages }));
+      setStates(prev => ({ ...prev, ...nextStates }));
+    } catch (err) {
+      const message = err instanceof Error ? err.message : 'Unknown error';
+      const failedStates: Record<string, CameraState> = {};
+      ids.forEach(id => {
+        failedStates[id] = { loading: false, error: message };
+      });
+      setStates(prev => ({ ...prev, ...failedStates }));
+    }
   };
 
+  const refreshAll = () => loadSnapshots(cameras.map(cam => cam.id));
+  const refreshCamera = (id: string) => loadSnapshots([id]);
+
   const setCameraState = (id: string, state: Partial<CameraState>) => {
     setStates(prev => ({
       ...prev,
@@ -54,7 +95,8 @@ export function useCameras() {
     }));
   };
 
-  const getSnapshotUrl = (id: string) => `/api/cameras/snapshot/${id}`;
+  const getFullSnapshotUrl = (id: string) => `/api/cameras/snapshot/${id}`;
+  const getSnapshotUrl = (id: string) => images[id] ?? getFullSnapshotUrl(id);
 
   return {
     cameras,
@@ -62,8 +104,10 @@ export function useCameras() {
     loading,
     error,
     refreshAll,
+    refreshCamera,
     setCameraState,
     getSnapshotUrl,
+    getFullSnapshotUrl,
     refetch: fetchCameras
   };
 }
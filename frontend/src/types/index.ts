@@ -26,9 +26,17 @@ export interface RinnaiStatus {
   error?: string;
 }
 
+export interface GarageDoorState {
+  door: number;
+  open: boolean | null;
+  updated_at?: string | null;
+  source?: string | null;
+}
+
 export interface GarageStatus {
   door_count: number;
   available: boolean;
+  doors?: GarageDoorState[];
 }
 
 export interface DeviceStatus {
@@ -13,16 +13,25 @@ from fastapi.responses import FileResponse
 from dotenv import load_dotenv
 import uvicorn
 
-from api import hue, wemo, rinnai, garage, status, history, cameras, schedule
+from api import hue, wemo, rinnai, garage, status, history, cameras, schedule, metrics, debug
 from models.schemas import HealthResponse
 from services.hue_service import hue_service
 from services.wemo_service import wemo_service
 from services.rinnai_service import rinnai_service
 from services.meross_service import meross_service
 from services.camera_service import camera_service
+from services.camera_archive import ARCHIVE_ENABLED, camera_archive_recorder
+from services.camera_stream import camera_stream_hub
 from services.scheduler import init_scheduler, shutdown_scheduler
-from services.wemo_schedule import WemoScheduleManager
+from services.wemo_schedule import wemo_schedule_manager
+from services.wemo_config import load_wemo_config
+from services.wemo_power import wemo_power_collector
+from services.wemo_events import SUBSCRIPTIONS_ENABLED, wemo_event_hub
+from services.config_watcher import config_watcher, init_config_watcher
 from services.action_executor import init_action_executor
+from services.idempotency import IdempotencyMiddleware
+from services.tracing import TracingMiddleware
+from services.profiler import loop_lag_monitor
 
 load_dotenv(Path(__file__).parent / ".env")
 
@@ -97,11 +106,13 @@ def _run_uvicorn() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Smart Home Dashboard...")
+    loop_lag_monitor.start()
     hue_ip = os.getenv("HUE_BRIDGE_IP")
     logger.info(f"Debug: HUE_BRIDGE_IP={hue_ip or '(not configured)'}, .env exists={Path(__file__).parent.joinpath('.env').exists()}")
     hue_service.connect()
 
-    wemo_service.init_devices()
+    wemo_config = load_wemo_config(wemo_service.config_file)
+    wemo_service.init_devices(wemo_config)
 
     await rinnai_service.connect()
 
@@ -112,6 +123,8 @@ async def lifespan(app: FastAPI):
     if camera_user and camera_password:
         camera_service.set_credentials(camera_user, camera_password)
         camera_service.load_config()
+        if ARCHIVE_ENABLED:
+            camera_archive_recorder.start()
     else:
         logger.warning("Camera credentials not configured, camera feature disabled")
 
@@ -119,10 +132,17 @@ async def lifespan(app: FastAPI):
 
     init_action_executor()
 
-    wemo_schedule_manager = WemoScheduleManager("config/wemo_config.yaml")
-    for name, device in wemo_service.devices.items():
-        wemo_schedule_manager.register_device(name, device)
-    wemo_schedule_manager.start()
+    wemo_schedule_manager.start(wemo_config)
+
+    init_config_watcher()
+
+    wemo_power_collector.start()
+
+    if SUBSCRIPTIONS_ENABLED:
+        wemo_event_hub.start()
+
+    # Devices built from cached descriptors are checked once the server is up.
+    wemo_revalidation = asyncio.create_task(asyncio.to_thread(wemo_service.revalidate_cached_devices))
 
     logger.info("Smart Home Dashboard started")
 
@@ -130,16 +150,22 @@ async def lifespan(app: FastAPI):
 
     logger.info("Shutting down Smart Home Dashboard...")
 
+    await asyncio.gather(wemo_revalidation, return_exceptions=True)
+    await config_watcher.stop()
+    await wemo_power_collector.stop()
+    await wemo_event_hub.stop()
+    wemo_schedule_manager.stop()
     shutdown_scheduler()
 
-    if wemo_schedule_manager:
-        wemo_schedule_manager.stop()
-
+    await camera_archive_recorder.stop()
+    await camera_stream_hub.close()
     await camera_service.close()
 
     await rinnai_service.close()
     await meross_service.close()
 
+    await loop_lag_monitor.stop()
+
     logger.info("Smart Home Dashboard shutdown complete")
 
 
@@ -164,14 +190,20 @@ cors_origins = _split_env_list(
     ],
 )
 
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Outermost, so the timing includes idempotency replay and CORS handling.
+app.add_middleware(TracingMiddleware)
+
 app.include_router(hue.router)
 app.include_router(wemo.router)
 app.include_router(rinnai.router)
@@ -180,6 +212,8 @@ app.include_router(status.router)
 app.include_router(history.router)
 app.include_router(cameras.router)
 app.include_router(schedule.router)
+app.include_router(metrics.router)
+app.include_router(debug.router)
 
 @app.get("/health", response_model=HealthResponse, tags=["health"], summary="Health check")
 async def health_check():
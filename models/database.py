@@ -1,11 +1,25 @@
 import sqlite3
 import json
 import os
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, ContextManager
 
 DB_PATH = Path(__file__).parent.parent / "data" / "smart_home.db"
 
+# Wraps every write transaction; services.metrics installs its timer here so
+# models never import services.
+WriteObserver = Callable[[str, int], ContextManager]
+_write_observer: WriteObserver = lambda table, rows: nullcontext()
+
+def set_write_observer(observer: WriteObserver) -> None:
+    global _write_observer
+    _write_observer = observer
+
+def observe_db_write(table: str, rows: int = 1) -> ContextManager:
+    return _write_observer(table, rows)
+
 def get_connection():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(str(DB_PATH))
@@ -32,18 +46,149 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_device_history_timestamp 
         ON device_history(timestamp)
     """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS idempotency_results (
+            key TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            status_code INTEGER NOT NULL,
+            content_type TEXT,
+            body BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    # Insight telemetry arrives every few seconds, so it is stored as plain
+    # integers keyed by (device, second) instead of JSON rows in device_history.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wemo_power (
+            device_name TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            power_mw INTEGER NOT NULL,
+            today_mw_minutes INTEGER NOT NULL,
+            on_today_seconds INTEGER NOT NULL,
+            state INTEGER NOT NULL,
+            PRIMARY KEY (device_name, ts)
+        ) WITHOUT ROWID
+    """)
     conn.commit()
     conn.close()
 
 def save_device_state(device_type: str, device_name: str, data: dict):
+    with observe_db_write("device_history"):
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO device_history (device_type, device_name, data)
+            VALUES (?, ?, ?)
+        """, (device_type, device_name, json.dumps(data)))
+        conn.commit()
+        conn.close()
+
+def save_idempotent_result(key: str, fingerprint: str, status_code: int, content_type: str, body: bytes, created_at: float):
+    with observe_db_write("idempotency_results"):
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO idempotency_results (key, fingerprint, status_code, content_type, body, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, fingerprint, status_code, content_type, body, created_at))
+        conn.commit()
+        conn.close()
+
+def get_idempotent_result(key: str, min_created_at: float):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT * FROM idempotency_results
+        WHERE key = ? AND created_at >= ?
+    """, (key, min_created_at))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def delete_expired_idempotent_results(min_created_at: float) -> int:
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM idempotency_results WHERE created_at < ?", (min_created_at,))
+    deleted = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return deleted
+
+def save_power_samples(samples: list[tuple]) -> int:
+    """Insert (device_name, ts, power_mw, today_mw_minutes, on_today_seconds, state) rows in one transaction."""
+    with observe_db_write("wemo_power", rows=len(samples)):
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO wemo_power (device_name, ts, power_mw, today_mw_minutes, on_today_seconds, state)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, samples)
+        conn.commit()
+        conn.close()
+    return len(samples)
+
+def delete_power_samples_before(min_ts: int) -> int:
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM wemo_power WHERE ts < ?", (min_ts,))
+    deleted = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return deleted
+
+def get_power_samples(device_name: str, since_ts: int):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT ts, power_mw, today_mw_minutes, on_today_seconds, state FROM wemo_power
+        WHERE device_name = ? AND ts >= ?
+        ORDER BY ts
+    """, (device_name, since_ts))
+    rows = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def get_daily_energy(since_ts: int, utc_offset_seconds: int, device_name: str = None):
+    """Per device and local day: energy counter maximum, power average/peak, on-time and sample count.
+
+    The Insight's today counters reset at local midnight, so each day's total
+    is the largest value seen that day.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    query = """
+        SELECT device_name,
+               date(ts + ?, 'unixepoch') AS day,
+               MAX(today_mw_minutes) AS today_mw_minutes,
+               AVG(power_mw) AS avg_power_mw,
+               MAX(power_mw) AS max_power_mw,
+               MAX(on_today_seconds) AS on_seconds,
+               COUNT(*) AS samples
+        FROM wemo_power
+        WHERE ts >= ?
+    """
+    params = [utc_offset_seconds, since_ts]
+    if device_name:
+        query += " AND device_name = ?"
+        params.append(device_name)
+    query += " GROUP BY device_name, day ORDER BY device_name, day"
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def rename_device_history(device_type: str, old_name: str, new_name: str) -> int:
+    """Move history rows recorded under `old_name` to `new_name`. Returns the number of rows moved."""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("""
-        INSERT INTO device_history (device_type, device_name, data)
-        VALUES (?, ?, ?)
-    """, (device_type, device_name, json.dumps(data)))
+        UPDATE device_history SET device_name = ?
+        WHERE device_type = ? AND device_name = ?
+    """, (new_name, device_type, old_name))
+    moved = cursor.rowcount
     conn.commit()
     conn.close()
+    return moved
 
 def delete_rinnai_zero_temp_records(dry_run: bool = False):
     """Remove Rinnai records where inlet_temp or outlet_temp is 0 or NULL (invalid/stale data)."""
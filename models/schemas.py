@@ -40,6 +40,31 @@ class WemoDeviceStatus(FlexibleModel):
     error: Optional[str] = None
 
 
+class WemoPowerReading(FlexibleModel):
+    device: str
+    timestamp: Optional[str] = None
+    power_w: Optional[float] = None
+    today_kwh: Optional[float] = None
+    on_today_seconds: Optional[int] = None
+    state: Optional[int] = None
+    error: Optional[str] = None
+
+
+class WemoDailyEnergy(FlexibleModel):
+    device: str
+    day: str
+    kwh: float
+    cost: Optional[float] = None
+    avg_power_w: float
+    max_power_w: float
+    on_hours: float
+    samples: int
+
+
+class WemoEnergyResponse(FlexibleModel):
+    days: List[WemoDailyEnergy]
+
+
 class RinnaiStatus(FlexibleModel):
     device_id: Optional[str] = None
     is_online: Optional[bool] = None
@@ -48,12 +73,32 @@ class RinnaiStatus(FlexibleModel):
     outlet_temp: Optional[int] = None
     water_flow: Optional[int] = None
     recirculation_enabled: Optional[bool] = None
+    snapshot_at: Optional[str] = Field(None, description="When the maintenance-refreshed snapshot was taken")
+    snapshot_age_seconds: Optional[float] = None
+    refreshing: Optional[bool] = Field(None, description="True while a background maintenance refresh is running")
     error: Optional[str] = None
 
 
+class RinnaiMetrics(FlexibleModel):
+    logins: int
+    token_refreshes: int
+    cloud_calls: Dict[str, int] = Field(default_factory=dict, description="Cloud API calls per operation since startup")
+    device_count: int = 0
+    device_cached: bool
+    token_expires_in_seconds: Optional[float] = None
+
+
+class GarageDoorState(FlexibleModel):
+    door: int
+    open: Optional[bool] = Field(None, description="Last known open state; null when not yet reported")
+    updated_at: Optional[str] = None
+    source: Optional[str] = Field(None, description="Where the state came from: push, poll, or cloud")
+
+
 class GarageStatus(FlexibleModel):
     door_count: int
     available: bool
+    doors: Optional[List[GarageDoorState]] = None
 
 
 class NotificationResult(FlexibleModel):
@@ -103,6 +148,41 @@ class CameraListResponse(FlexibleModel):
     cameras: List[CameraInfo]
 
 
+class CameraSnapshotData(FlexibleModel):
+    camera_id: str
+    content_type: Optional[str] = None
+    data: Optional[str] = Field(None, description="Base64-encoded image")
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    age_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class CameraSnapshotBatch(FlexibleModel):
+    snapshots: List[CameraSnapshotData]
+
+
+class SnapshotCacheStats(FlexibleModel):
+    requests: int
+    hits: int
+    misses: int
+    coalesced: int = Field(0, description="Requests that waited on another caller's in-flight camera fetch")
+    hit_rate: Optional[float] = None
+    fetches: int
+    fetch_errors: int
+    avg_fetch_ms: Optional[float] = None
+    max_fetch_ms: Optional[float] = None
+
+
+class CameraSnapshotMetrics(FlexibleModel):
+    max_age_seconds: float
+    totals: SnapshotCacheStats
+    cameras: Dict[str, SnapshotCacheStats] = Field(default_factory=dict)
+    resize: Optional[Dict[str, int]] = Field(None, description="Resized variant cache counters")
+    connections: Optional[Dict[str, Dict[str, Any]]] = Field(None, description="Per-camera HTTP connection reuse and digest challenge counters")
+    streams: Optional[Dict[str, Dict[str, Any]]] = Field(None, description="Active MJPEG streams keyed by camera (and size)")
+
+
 class EmptyActionParams(StrictModel):
     pass
 
@@ -117,6 +197,7 @@ class DeviceActionParams(StrictModel):
 
 class RinnaiCirculateParams(StrictModel):
     duration: int = Field(5, gt=0, le=60)
+    device_id: Optional[str] = Field(None, description="Heater to circulate; defaults to the primary heater")
 
 
 class GarageToggleParams(StrictModel):
@@ -197,4 +278,61 @@ class ScheduledActionListResponse(FlexibleModel):
     actions: List[ScheduledActionResponse]
 
 
+class WemoScheduledTask(FlexibleModel):
+    id: str
+    time: str
+    device: str
+    action: str
+    timezone: str
+    next_run: str
+    runs: int
+    failures: int
+    avg_latency_ms: Optional[float] = None
+    max_latency_ms: Optional[float] = None
+    last_run: Optional[str] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+class WemoScheduleResponse(FlexibleModel):
+    tasks: List[WemoScheduledTask]
+
+
+class TraceSpan(FlexibleModel):
+    name: str
+    start_ms: float = Field(..., description="Offset from the start of the request")
+    duration_ms: float
+
+
+class SlowRequest(FlexibleModel):
+    method: str
+    path: str
+    status_code: int
+    duration_ms: float = Field(..., description="Time to the first response byte")
+    timestamp: float
+    sampled: bool = Field(..., description="Whether spans were recorded for this request")
+    spans: List[TraceSpan]
+
+
+class SlowRequestsResponse(FlexibleModel):
+    threshold_ms: float
+    sample_rate: float
+    recorded: int
+    requests: List[SlowRequest]
+
+
+class LoopStall(FlexibleModel):
+    detected_at: str
+    blocked_ms: float
+    stack: List[str] = Field(..., description="Event loop thread stack while it was blocked, outermost first")
+
+
+class LoopLagResponse(FlexibleModel):
+    enabled: bool
+    threshold_ms: float
+    stalls_total: int
+    max_lag_ms: float
+    stalls: List[LoopStall]
+
+
 DeviceKind = Literal["hue", "wemo", "rinnai", "garage"]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark regression check against the stored baselines.
+
+Usage:
+  python scripts/bench_regress.py                      # fail if a median is over its limit
+  python scripts/bench_regress.py --threshold 0.5
+  python scripts/bench_regress.py --only history. scheduler.
+  python scripts/bench_regress.py --update --repeat 5  # record new baselines
+
+A case's limit is its baseline median plus 25% or three baseline spreads
+(interquartile ranges), whichever is larger. Cases over the limit are re-run
+--retries times before they are reported.
+
+Baselines are machine specific; record them on the machine that runs the check.
+The check is manual: CI does not run it, because shared runners are too noisy.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import benchmarks.cases  # noqa: F401  (registers the cases)
+from benchmarks.runner import (
+    BASELINE_FILE,
+    check_cases,
+    compare,
+    format_comparisons,
+    get_cases,
+    load_baselines,
+    run,
+    save_baselines,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run benchmarks and compare them with stored baselines")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("SMART_HOME_BENCH_THRESHOLD", "0.25")),
+        help="Minimum allowed slowdown of the median as a fraction (0.25 = 25%%)",
+    )
+    parser.add_argument("--only", nargs="*", help="Run cases whose name starts with one of these prefixes")
+    parser.add_argument("--rounds", type=int, default=None, help="Override the rounds of every case")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline JSON file")
+    parser.add_argument("--retries", type=int, default=2, help="Re-runs of a case before it counts as regressed")
+    parser.add_argument("--update", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Passes over all cases when recording baselines with --update"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    cases = get_cases(args.only)
+    baselines = load_baselines(args.baseline)
+
+    if args.update:
+        results = run(cases, args.rounds, args.repeat)
+        print(format_comparisons(compare(results, baselines, args.threshold)))
+        save_baselines(results, args.baseline)
+        print(f"Baselines written to {args.baseline}")
+        sys.exit(0)
+
+    results, comparisons = asyncio.run(check_cases(cases, baselines, args.threshold, args.rounds, args.retries))
+    print(format_comparisons(comparisons))
+    regressed = [c.name for c in comparisons if c.regressed]
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) over their limit after {args.retries} retries: {', '.join(regressed)}")
+        sys.exit(1)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: Rinnai getDevice payload parsing throughput.
+
+Usage:
+  python scripts/bench_rinnai_parse.py               # 100k parses
+  python scripts/bench_rinnai_parse.py -n 500000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.rinnai_service import parse_device_status
+
+SAMPLE = {
+    "data": {
+        "getDevice": {
+            "device_name": "Main House",
+            "firmware": "233",
+            "shadow": {
+                "set_domestic_temperature": "125",
+                "operation_enabled": True,
+                "recirculation_enabled": False,
+            },
+            "info": {
+                "m08_inlet_temperature": "66",
+                "m02_outlet_temperature": "121",
+                "m01_water_flow_rate_raw": "26",
+                "unix_time": "1771462025",
+            },
+        }
+    }
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure Rinnai status parsing throughput")
+    parser.add_argument("-n", "--iterations", type=int, default=100_000, help="Number of parses")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        # Vary the device time so the formatter cache sees realistic churn.
+        SAMPLE["data"]["getDevice"]["info"]["unix_time"] = str(1771462025 + i % 1000)
+        parse_device_status(SAMPLE, "device-1")
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.iterations} parses in {elapsed:.3f}s")
+    print(f"{args.iterations / elapsed:,.0f} parses/s, {elapsed / args.iterations * 1e6:.2f} us/parse")
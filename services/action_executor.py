@@ -51,20 +51,19 @@ action_executor = ActionExecutor()
 
 
 def init_action_executor():
-    from services.hue_service import hue_service
-    from services.wemo_service import wemo_service
+    from services.command_queue import submit_hue, submit_wemo
     from services.rinnai_service import rinnai_service
     from services.meross_service import meross_service
     
-    action_executor.register('hue.toggle', lambda _: hue_service.toggle())
-    action_executor.register('hue.on', lambda p: hue_service.turn_on(p.get('brightness', 128)))
-    action_executor.register('hue.off', lambda _: hue_service.turn_off())
+    action_executor.register('hue.toggle', lambda _: submit_hue(None))
+    action_executor.register('hue.on', lambda p: submit_hue({'on': True, 'brightness': p.get('brightness', 128)}))
+    action_executor.register('hue.off', lambda _: submit_hue({'on': False}))
     
-    action_executor.register('wemo.toggle', lambda p: wemo_service.toggle(p['device']))
-    action_executor.register('wemo.on', lambda p: wemo_service.turn_on(p['device']))
-    action_executor.register('wemo.off', lambda p: wemo_service.turn_off(p['device']))
+    action_executor.register('wemo.toggle', lambda p: submit_wemo(p['device'], None))
+    action_executor.register('wemo.on', lambda p: submit_wemo(p['device'], {'on': True}))
+    action_executor.register('wemo.off', lambda p: submit_wemo(p['device'], {'on': False}))
     
-    action_executor.register('rinnai.circulate', lambda p: rinnai_service.start_circulation(p.get('duration', 5)))
+    action_executor.register('rinnai.circulate', lambda p: rinnai_service.start_circulation(p.get('duration', 5), device_id=p.get('device_id')))
     action_executor.register('garage.toggle', lambda p: meross_service.toggle_door(p['door']))
     
     logger.info("Action executor initialized")
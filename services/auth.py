@@ -4,6 +4,8 @@ from typing import Optional
 
 from fastapi import Header, HTTPException, status
 
+from services.tracing import span
+
 
 CONTROL_TOKEN_ENV = "SMART_HOME_API_TOKEN"
 
@@ -11,8 +13,22 @@ CONTROL_TOKEN_ENV = "SMART_HOME_API_TOKEN"
 def require_control_auth(
     x_smart_home_token: Optional[str] = Header(default=None, alias="X-Smart-Home-Token"),
     authorization: Optional[str] = Header(default=None),
+    idempotency_key: Optional[str] = Header(
+        default=None,
+        alias="Idempotency-Key",
+        description="Optional retry key. Repeating a request with the same key replays the first result without touching the device.",
+    ),
 ) -> None:
-    """Require an API token for physical actions when configured."""
+    """Require an API token for physical actions when configured.
+
+    Idempotency-Key is handled by IdempotencyMiddleware; it is declared here so
+    every action route documents it in OpenAPI.
+    """
+    with span("auth"):
+        _check_control_token(x_smart_home_token, authorization)
+
+
+def _check_control_token(x_smart_home_token: Optional[str], authorization: Optional[str]) -> None:
     expected = os.getenv(CONTROL_TOKEN_ENV)
     if not expected:
         return
@@ -0,0 +1,254 @@
+import asyncio
+import bisect
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from services.camera_service import CameraService, camera_service
+from services.tracing import create_background_task
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+ARCHIVE_ENABLED = os.getenv("CAMERA_ARCHIVE_ENABLED", "").strip().lower() in TRUE_VALUES
+ARCHIVE_DIR = Path(os.getenv("CAMERA_ARCHIVE_DIR", "data/camera_archive"))
+if not ARCHIVE_DIR.is_absolute():
+    ARCHIVE_DIR = Path(__file__).parent.parent / ARCHIVE_DIR
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("CAMERA_ARCHIVE_INTERVAL_SECONDS", "60"))
+ARCHIVE_MAX_BYTES = int(float(os.getenv("CAMERA_ARCHIVE_MAX_GB", "5")) * 1024 ** 3)
+
+DATA_SUFFIX = ".jpg.bin"
+INDEX_SUFFIX = ".idx"
+# timestamp (unix seconds), offset into the day's data file, length
+INDEX_RECORD = struct.Struct("<dQI")
+
+
+@dataclass
+class ArchivedFrame:
+    camera_id: str
+    timestamp: float
+    data: bytes
+
+
+class _IndexTimestamps:
+    """Read-only sequence view of an index file's timestamps for bisect.
+
+    Each lookup is one pread, so a binary search costs O(log n) small reads
+    and the index is never loaded into memory.
+    """
+
+    def __init__(self, fd: int, count: int):
+        self.fd = fd
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> float:
+        return self.record(i)[0]
+
+    def record(self, i: int) -> tuple[float, int, int]:
+        raw = os.pread(self.fd, INDEX_RECORD.size, i * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(raw)
+
+
+class CameraArchive:
+    """Append-only, date-partitioned snapshot store.
+
+    Layout: {root}/{camera_id}/{YYYY-MM-DD}.jpg.bin holds concatenated JPEGs
+    and {YYYY-MM-DD}.idx holds fixed-size (timestamp, offset, length) records
+    in time order. Partitions are UTC days. When the archive exceeds its quota,
+    whole partitions are deleted oldest-first across all cameras.
+    """
+
+    def __init__(self, root: Path = ARCHIVE_DIR, max_bytes: int = ARCHIVE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+        self._last_timestamp: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _partition(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+    def _paths(self, camera_id: str, partition: str) -> tuple[Path, Path]:
+        camera_dir = self.root / camera_id
+        return camera_dir / f"{partition}{DATA_SUFFIX}", camera_dir / f"{partition}{INDEX_SUFFIX}"
+
+    def _partitions(self, camera_id: str) -> list[str]:
+        camera_dir = self.root / camera_id
+        if not camera_dir.is_dir():
+            return []
+        return sorted(p.name[: -len(INDEX_SUFFIX)] for p in camera_dir.glob(f"*{INDEX_SUFFIX}"))
+
+    def total_bytes(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.root.glob("*/*") if p.is_file()) if self.root.exists() else 0
+        return self._total_bytes
+
+    def append(self, camera_id: str, data: bytes, timestamp: Optional[float] = None) -> None:
+        with self._lock:
+            self._append(camera_id, data, time.time() if timestamp is None else timestamp)
+
+    def _append(self, camera_id: str, data: bytes, timestamp: float) -> None:
+        # Index records must stay sorted for bisect; never write backwards in time.
+        timestamp = max(timestamp, self._last_timestamp.get(camera_id, 0.0))
+        self._last_timestamp[camera_id] = timestamp
+
+        total_bytes = self.total_bytes()
+        data_path, index_path = self._paths(camera_id, self._partition(timestamp))
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(data_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        # The index is written after the data, so a record never points at a partial frame.
+        with open(index_path, "ab") as f:
+            f.write(INDEX_RECORD.pack(timestamp, offset, len(data)))
+
+        self._total_bytes = total_bytes + len(data) + INDEX_RECORD.size
+        if self._total_bytes > self.max_bytes:
+            self.enforce_quota()
+
+    def enforce_quota(self) -> int:
+        """Delete oldest partitions until the archive fits its quota. Returns bytes freed."""
+        partitions = sorted(
+            (partition, camera_dir.name)
+            for camera_dir in self.root.iterdir() if camera_dir.is_dir()
+            for partition in self._partitions(camera_dir.name)
+        )
+        freed = 0
+        for partition, camera_id in partitions:
+            if self.total_bytes() - freed <= self.max_bytes:
+                break
+            for path in self._paths(camera_id, partition):
+                if path.exists():
+                    freed += path.stat().st_size
+                    path.unlink()
+            logger.info(f"Camera archive quota: evicted {camera_id}/{partition}")
+        self._total_bytes = self.total_bytes() - freed
+        return freed
+
+    def find(self, camera_id: str, at: float) -> Optional[ArchivedFrame]:
+        """Return the latest frame taken at or before `at`.
+
+        Reads do not take the write lock. A partition the quota evicts while it
+        is being read is treated as empty.
+        """
+        target = self._partition(at)
+        partitions = self._partitions(camera_id)
+        start = bisect.bisect_right(partitions, target)
+        for partition in reversed(partitions[:start]):
+            try:
+                frame = self._find_in_partition(camera_id, partition, at)
+            except FileNotFoundError:
+                continue
+            if frame is not None:
+                return frame
+        return None
+
+    def _find_in_partition(self, camera_id: str, partition: str, at: float) -> Optional[ArchivedFrame]:
+        data_path, index_path = self._paths(camera_id, partition)
+        fd = os.open(index_path, os.O_RDONLY)
+        try:
+            index = _IndexTimestamps(fd, os.fstat(fd).st_size // INDEX_RECORD.size)
+            position = bisect.bisect_right(index, at)
+            if position == 0:
+                return None
+            timestamp, offset, length = index.record(position - 1)
+        finally:
+            os.close(fd)
+
+        with open(data_path, "rb") as f:
+            f.seek(offset)
+            return ArchivedFrame(camera_id=camera_id, timestamp=timestamp, data=f.read(length))
+
+    def get_stats(self) -> dict:
+        cameras = {}
+        if self.root.exists():
+            for camera_dir in sorted(p for p in self.root.iterdir() if p.is_dir()):
+                partitions = self._partitions(camera_dir.name)
+                frames = sum(
+                    self._paths(camera_dir.name, partition)[1].stat().st_size // INDEX_RECORD.size
+                    for partition in partitions
+                )
+                cameras[camera_dir.name] = {
+                    "frames": frames,
+                    "oldest_day": partitions[0] if partitions else None,
+                    "newest_day": partitions[-1] if partitions else None,
+                }
+        return {"total_bytes": self.total_bytes(), "max_bytes": self.max_bytes, "cameras": cameras}
+
+
+class CameraArchiveRecorder:
+    """Background task that archives each camera's snapshot at a fixed interval.
+
+    Reads go through CameraService's snapshot cache, so recording never adds a
+    camera request when a viewer fetched a fresh frame recently. Per-camera
+    intervals can be set with `archive_interval_seconds` in cameras.yaml.
+    """
+
+    def __init__(self, camera_service: CameraService, archive: CameraArchive, interval_seconds: float = ARCHIVE_INTERVAL_SECONDS):
+        self.camera_service = camera_service
+        self.archive = archive
+        self.interval_seconds = interval_seconds
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._intervals: dict[str, float] = {}
+
+    def start(self) -> None:
+        """Start recording configured cameras.
+
+        Called again after a config reload: cameras that were removed or set
+        to 0 are stopped, and cameras whose interval changed are restarted.
+        """
+        desired = {}
+        for camera in self.camera_service.cameras:
+            interval = float(camera.get("archive_interval_seconds", self.interval_seconds))
+            if interval > 0:
+                desired[camera["id"]] = interval
+        for camera_id in list(self._tasks):
+            if self._intervals.get(camera_id) != desired.get(camera_id):
+                self._tasks.pop(camera_id).cancel()
+                self._intervals.pop(camera_id, None)
+        for camera_id, interval in desired.items():
+            if camera_id in self._tasks:
+                continue
+            self._tasks[camera_id] = create_background_task(self._record(camera_id, interval))
+            self._intervals[camera_id] = interval
+        if self._tasks:
+            logger.info(f"Camera archive recording {len(self._tasks)} cameras to {self.archive.root}")
+
+    async def _record(self, camera_id: str, interval: float) -> None:
+        last_etag = None
+        while True:
+            started = time.monotonic()
+            try:
+                snapshot, error = await self.camera_service.get_cached_snapshot(camera_id, max_age_seconds=interval / 2)
+                if error:
+                    logger.warning(f"Camera archive skipped {camera_id}: {error}")
+                elif snapshot.etag != last_etag:
+                    last_etag = snapshot.etag
+                    await asyncio.to_thread(self.archive.append, camera_id, snapshot.data, snapshot.last_modified)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Camera archive failed for {camera_id}: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self._intervals.clear()
+
+
+camera_archive = CameraArchive()
+camera_archive_recorder = CameraArchiveRecorder(camera_service, camera_archive)
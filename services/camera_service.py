@@ -1,49 +1,234 @@
+import asyncio
+import hashlib
 import logging
 import os
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Optional
 
 import httpx
 import yaml
 
+from services.metrics import observe
+from services.thumbnails import ThumbnailRenderer
+from services.tracing import create_background_task, span
+
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("CAMERA_SNAPSHOT_MAX_AGE_SECONDS", "2"))
+BATCH_CONCURRENCY = int(os.getenv("CAMERA_BATCH_CONCURRENCY", "4"))
+BATCH_TIMEOUT_SECONDS = float(os.getenv("CAMERA_BATCH_TIMEOUT_SECONDS", "8"))
+MAX_CONNECTIONS = int(os.getenv("CAMERA_MAX_CONNECTIONS", "16"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("CAMERA_MAX_CONNECTIONS_PER_HOST", "2"))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("CAMERA_KEEPALIVE_EXPIRY_SECONDS", "60"))
+
+
+class SnapshotError(str):
+    """Message of a failed snapshot, with `kind` saying what failed.
+
+    A str subclass, so callers that only log or return the message keep
+    working; the API maps `kind`, never the wording, to a status code.
+    """
+
+    NOT_FOUND = "not_found"
+    TIMEOUT = "timeout"
+    UNSUPPORTED = "unsupported"
+    UPSTREAM = "upstream"
+
+    kind: str
+
+    def __new__(cls, kind: str, message: str) -> "SnapshotError":
+        error = super().__new__(cls, message)
+        error.kind = kind
+        return error
+
+
+class CameraDigestAuth(httpx.DigestAuth):
+    """Digest auth for a single camera that counts 401 challenges.
+
+    httpx reuses the last challenge's nonce (with an incrementing nc) for the
+    next request, so one instance per camera means only the first request, or
+    one after the camera rotates its nonce, pays the extra 401 round-trip.
+    """
+
+    def __init__(self, username: str, password: str):
+        super().__init__(username, password)
+        self.challenges = 0
+
+    def auth_flow(self, request: httpx.Request):
+        flow = super().auth_flow(request)
+        request = next(flow)
+        while True:
+            response = yield request
+            if response.status_code == 401:
+                self.challenges += 1
+            try:
+                request = flow.send(response)
+            except StopIteration:
+                return
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    connections_opened: int = 0
+
+    def to_dict(self, challenges: int) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "auth_challenges": challenges,
+            "connection_reuse_rate": round(1 - self.connections_opened / self.requests, 3) if self.requests else None,
+        }
+
+
+@dataclass
+class CachedSnapshot:
+    data: bytes
+    etag: str
+    fetched_at: float  # time.monotonic(), for max-age checks
+    last_modified: float  # time.time(), for the Last-Modified header
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+@dataclass
+class SnapshotMetrics:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+    fetch_errors: int = 0
+    fetch_seconds_total: float = 0.0
+    fetch_seconds_max: float = 0.0
+
+    def record_fetch(self, seconds: float, ok: bool) -> None:
+        self.fetches += 1
+        if not ok:
+            self.fetch_errors += 1
+        self.fetch_seconds_total += seconds
+        self.fetch_seconds_max = max(self.fetch_seconds_max, seconds)
+
+    def to_dict(self) -> dict:
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "requests": requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / requests, 3) if requests else None,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "avg_fetch_ms": round(self.fetch_seconds_total / self.fetches * 1000, 1) if self.fetches else None,
+            "max_fetch_ms": round(self.fetch_seconds_max * 1000, 1) if self.fetches else None,
+        }
+
 
 class CameraService:
-    def __init__(self):
+    def __init__(self, snapshot_max_age_seconds: float = SNAPSHOT_MAX_AGE_SECONDS):
         self.cameras: list[dict] = []
         self.user: Optional[str] = None
         self.password: Optional[str] = None
         self._client: Optional[httpx.AsyncClient] = None
+        self.snapshot_max_age_seconds = snapshot_max_age_seconds
+        self._snapshots: dict[str, CachedSnapshot] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._metrics: dict[str, SnapshotMetrics] = {}
+        self._thumbnails = ThumbnailRenderer()
+        self._auths: dict[str, CameraDigestAuth] = {}
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._connection_stats: dict[str, ConnectionStats] = {}
 
-    def load_config(self, config_path: str = "config/cameras.yaml"):
+    def load_config(self, config_path: str = "config/cameras.yaml") -> dict:
         config_file = Path(__file__).parent.parent / config_path
         if config_file.exists():
             with open(config_file) as f:
-                config = yaml.safe_load(f)
-                self.cameras = config.get("cameras", [])
+                config = yaml.safe_load(f) or {}
+            changes = self.apply_config(config.get("cameras") or [])
             logger.info(f"Loaded {len(self.cameras)} cameras from config")
-        else:
-            logger.warning(f"Camera config not found: {config_file}")
-            self.cameras = []
+            return changes
+        logger.warning(f"Camera config not found: {config_file}")
+        return self.apply_config([])
+
+    def apply_config(self, cameras: list[dict]) -> dict:
+        """Replace the camera list, dropping cached state only for cameras that changed or were removed."""
+        cameras = [camera for camera in cameras if camera.get("id")]
+        current = {camera["id"]: camera for camera in self.cameras}
+        desired = {camera["id"]: camera for camera in cameras}
+
+        added = [camera_id for camera_id in desired if camera_id not in current]
+        removed = [camera_id for camera_id in current if camera_id not in desired]
+        changed = [camera_id for camera_id in desired if camera_id in current and desired[camera_id] != current[camera_id]]
+        for camera_id in removed + changed:
+            self._forget_camera(camera_id)
+        self.cameras = cameras
+        return {"added": added, "removed": removed, "changed": changed}
+
+    def _forget_camera(self, camera_id: str) -> None:
+        self._snapshots.pop(camera_id, None)
+        self._auths.pop(camera_id, None)
+        self._host_limits.pop(camera_id, None)
+        self._connection_stats.pop(camera_id, None)
+        self._metrics.pop(camera_id, None)
 
     def set_credentials(self, user: str, password: str):
         self.user = user
         self.password = password
+        self._auths = {}
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
             if not self.user or not self.password:
                 raise ValueError("Camera credentials not configured")
-            user: str = self.user
-            password: str = self.password
             self._client = httpx.AsyncClient(
-                auth=httpx.DigestAuth(user, password),
                 timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
             )
         return self._client
 
+    def _auth_for(self, camera_id: str) -> CameraDigestAuth:
+        auth = self._auths.get(camera_id)
+        if auth is None:
+            auth = CameraDigestAuth(self.user or "", self.password or "")
+            self._auths[camera_id] = auth
+        return auth
+
+    def _host_limit(self, camera_id: str) -> asyncio.Semaphore:
+        # httpx only limits the whole pool; the cameras' CPUs want a per-host cap.
+        limit = self._host_limits.get(camera_id)
+        if limit is None:
+            limit = asyncio.Semaphore(max(1, MAX_CONNECTIONS_PER_HOST))
+            self._host_limits[camera_id] = limit
+        return limit
+
+    async def _camera_get(self, camera: dict, url: str) -> httpx.Response:
+        camera_id = camera["id"]
+        stats = self._connection_stats.setdefault(camera_id, ConnectionStats())
+
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+
+        client = await self._get_client()
+        async with self._host_limit(camera_id):
+            stats.requests += 1
+            with observe("camera", "snapshot"):
+                return await client.get(url, auth=self._auth_for(camera_id), extensions={"trace": trace})
+
+    def get_connection_stats(self) -> dict:
+        return {
+            camera_id: stats.to_dict(self._auths[camera_id].challenges if camera_id in self._auths else 0)
+            for camera_id, stats in self._connection_stats.items()
+        }
+
     async def close(self):
+        self._thumbnails.close()
         if self._client:
             await self._client.aclose()
             self._client = None
@@ -57,25 +242,155 @@ class CameraService:
                 return camera
         return None
 
-    async def get_snapshot(self, camera_id: str) -> tuple[Optional[bytes], Optional[str]]:
+    async def get_snapshot(self, camera_id: str) -> tuple[Optional[bytes], Optional[SnapshotError]]:
+        snapshot, error = await self.get_cached_snapshot(camera_id)
+        if error:
+            return None, error
+        return snapshot.data, None
+
+    async def get_cached_snapshot(
+        self,
+        camera_id: str,
+        max_age_seconds: Optional[float] = None,
+    ) -> tuple[Optional[CachedSnapshot], Optional[SnapshotError]]:
+        """Return a snapshot no older than max_age_seconds.
+
+        Concurrent callers for the same camera share one in-flight camera
+        request. Failed fetches are not cached.
+        """
         camera = self.get_camera_by_id(camera_id)
         if not camera:
-            return None, f"Camera not found: {camera_id}"
+            return None, SnapshotError(SnapshotError.NOT_FOUND, f"Camera not found: {camera_id}")
+
+        if max_age_seconds is None:
+            max_age_seconds = self.snapshot_max_age_seconds
+        metrics = self._metrics.setdefault(camera_id, SnapshotMetrics())
+
+        cached = self._snapshots.get(camera_id)
+        if cached is not None and cached.age() <= max_age_seconds:
+            metrics.hits += 1
+            return cached, None
+
+        task = self._inflight.get(camera_id)
+        if task is None or task.done():
+            metrics.misses += 1
+            task = create_background_task(self._refresh_snapshot(camera))
+            self._inflight[camera_id] = task
+        else:
+            metrics.coalesced += 1
 
+        # The fetch runs untraced and may be shared; each request records its wait.
+        with span("camera.snapshot_wait"):
+            return await asyncio.shield(task)
+
+    async def _refresh_snapshot(self, camera: dict) -> tuple[Optional[CachedSnapshot], Optional[SnapshotError]]:
+        started = time.perf_counter()
+        try:
+            data, error = await self._fetch_snapshot(camera)
+        finally:
+            self._inflight.pop(camera["id"], None)
+        self._metrics.setdefault(camera["id"], SnapshotMetrics()).record_fetch(
+            time.perf_counter() - started, error is None
+        )
+        if error:
+            return None, error
+
+        snapshot = CachedSnapshot(
+            data=data,
+            etag=f'"{hashlib.blake2b(data, digest_size=12).hexdigest()}"',
+            fetched_at=time.monotonic(),
+            last_modified=time.time(),
+        )
+        self._snapshots[camera["id"]] = snapshot
+        return snapshot, None
+
+    async def _fetch_snapshot(self, camera: dict) -> tuple[Optional[bytes], Optional[SnapshotError]]:
         ip = camera["ip"]
         url = f"http://{ip}/cgi-bin/snapshot.cgi"
 
         try:
-            client = await self._get_client()
-            response = await client.get(url)
+            response = await self._camera_get(camera, url)
             if response.status_code == 200:
                 return response.content, None
             else:
-                return None, f"Camera returned status {response.status_code}"
+                return None, SnapshotError(SnapshotError.UPSTREAM, f"Camera returned status {response.status_code}")
         except httpx.TimeoutException:
-            return None, f"Timeout fetching snapshot from {camera['name']}"
+            return None, SnapshotError(SnapshotError.TIMEOUT, f"Timeout fetching snapshot from {camera['name']}")
         except Exception as e:
-            return None, f"Error fetching snapshot: {str(e)}"
+            return None, SnapshotError(SnapshotError.UPSTREAM, f"Error fetching snapshot: {str(e)}")
+
+    async def get_resized_snapshot(
+        self,
+        camera_id: str,
+        width: int,
+        quality: int,
+        max_age_seconds: Optional[float] = None,
+    ) -> tuple[Optional[CachedSnapshot], Optional[SnapshotError]]:
+        """Return the cached snapshot scaled to `width`, rendered off the event loop."""
+        snapshot, error = await self.get_cached_snapshot(camera_id, max_age_seconds)
+        if error:
+            return None, error
+
+        try:
+            data = await self._thumbnails.render(snapshot.etag, snapshot.data, width, quality)
+        except ImportError:
+            return None, SnapshotError(SnapshotError.UNSUPPORTED, "Image resizing requires Pillow")
+        except Exception as e:
+            return None, SnapshotError(SnapshotError.UPSTREAM, f"Error resizing snapshot: {str(e)}")
+        return replace(snapshot, data=data, etag=f'{snapshot.etag[:-1]}-w{width}q{quality}"'), None
+
+    async def get_snapshots(
+        self,
+        camera_ids: Optional[list[str]] = None,
+        timeout_seconds: float = BATCH_TIMEOUT_SECONDS,
+        concurrency: int = BATCH_CONCURRENCY,
+        width: Optional[int] = None,
+        quality: int = 75,
+    ) -> dict[str, tuple[Optional[CachedSnapshot], Optional[SnapshotError]]]:
+        """Fetch several cameras at once, at most `concurrency` camera requests in flight.
+
+        A camera that misses its timeout reports an error without holding up
+        the others; its fetch keeps running and still fills the cache.
+        """
+        if camera_ids is None:
+            camera_ids = [camera["id"] for camera in self.cameras]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch_one(camera_id: str) -> tuple[Optional[CachedSnapshot], Optional[SnapshotError]]:
+            async with semaphore:
+                try:
+                    if width:
+                        fetch = self.get_resized_snapshot(camera_id, width, quality)
+                    else:
+                        fetch = self.get_cached_snapshot(camera_id)
+                    return await asyncio.wait_for(fetch, timeout_seconds)
+                except asyncio.TimeoutError:
+                    camera = self.get_camera_by_id(camera_id)
+                    name = camera["name"] if camera else camera_id
+                    return None, SnapshotError(SnapshotError.TIMEOUT, f"Timeout fetching snapshot from {name}")
+
+        results = await asyncio.gather(*[fetch_one(camera_id) for camera_id in camera_ids])
+        return dict(zip(camera_ids, results))
+
+    def get_snapshot_metrics(self) -> dict:
+        totals = SnapshotMetrics()
+        cameras = {}
+        for camera_id, metrics in self._metrics.items():
+            cameras[camera_id] = metrics.to_dict()
+            totals.hits += metrics.hits
+            totals.misses += metrics.misses
+            totals.coalesced += metrics.coalesced
+            totals.fetches += metrics.fetches
+            totals.fetch_errors += metrics.fetch_errors
+            totals.fetch_seconds_total += metrics.fetch_seconds_total
+            totals.fetch_seconds_max = max(totals.fetch_seconds_max, metrics.fetch_seconds_max)
+        return {
+            "max_age_seconds": self.snapshot_max_age_seconds,
+            "totals": totals.to_dict(),
+            "cameras": cameras,
+            "resize": self._thumbnails.get_metrics(),
+            "connections": self.get_connection_stats(),
+        }
 
 
 camera_service = CameraService()
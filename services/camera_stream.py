@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from services.camera_service import CameraService, camera_service
+from services.tracing import create_background_task
+
+logger = logging.getLogger(__name__)
+
+STREAM_FPS = float(os.getenv("CAMERA_STREAM_FPS", "2"))
+STREAM_BUFFER_FRAMES = int(os.getenv("CAMERA_STREAM_BUFFER_FRAMES", "3"))
+STREAM_IDLE_TIMEOUT_SECONDS = float(os.getenv("CAMERA_STREAM_IDLE_TIMEOUT_SECONDS", "30"))
+
+MJPEG_BOUNDARY = "frame"
+
+
+@dataclass
+class Frame:
+    seq: int
+    data: bytes
+    captured_at: float
+
+
+class FrameRing:
+    """Fixed-size buffer of recent frames shared by every viewer of a stream.
+
+    Each viewer keeps its own cursor (the last seq it sent). A viewer that falls
+    more than `capacity` frames behind skips ahead instead of queueing, so a
+    slow client costs dropped frames, never memory.
+    """
+
+    def __init__(self, capacity: int = STREAM_BUFFER_FRAMES):
+        self._frames: deque[Frame] = deque(maxlen=max(1, capacity))
+        self._seq = 0
+        self._published = asyncio.Event()
+
+    @property
+    def latest_seq(self) -> int:
+        return self._seq
+
+    def publish(self, data: bytes) -> Frame:
+        self._seq += 1
+        frame = Frame(seq=self._seq, data=data, captured_at=time.time())
+        self._frames.append(frame)
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+        return frame
+
+    def frame_after(self, seq: int) -> Optional[Frame]:
+        for frame in self._frames:
+            if frame.seq > seq:
+                return frame
+        return None
+
+    async def next_frame(self, seq: int, timeout: float) -> Optional[Frame]:
+        frame = self.frame_after(seq)
+        if frame is not None:
+            return frame
+        try:
+            await asyncio.wait_for(self._published.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.frame_after(seq)
+
+
+@dataclass
+class _CameraStream:
+    key: str
+    ring: FrameRing
+    viewers: int = 0
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    producer: Optional[asyncio.Task] = None
+    last_error: Optional[str] = None
+
+
+class CameraStreamHub:
+    """One internal polling loop per camera, fanned out to any number of MJPEG viewers.
+
+    The producer reads through CameraService's snapshot cache at a fixed frame
+    rate, so viewers, the grid and the batch endpoint all share camera requests.
+    It only runs while at least one viewer is connected.
+    """
+
+    def __init__(
+        self,
+        camera_service: CameraService,
+        fps: float = STREAM_FPS,
+        buffer_frames: int = STREAM_BUFFER_FRAMES,
+        idle_timeout_seconds: float = STREAM_IDLE_TIMEOUT_SECONDS,
+    ):
+        self.camera_service = camera_service
+        self.interval = 1.0 / max(fps, 0.1)
+        self.buffer_frames = buffer_frames
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._streams: dict[str, _CameraStream] = {}
+
+    @staticmethod
+    def _stream_key(camera_id: str, width: Optional[int], quality: int) -> str:
+        return f"{camera_id}:{width}:{quality}" if width else camera_id
+
+    async def frames(self, camera_id: str, width: Optional[int] = None, quality: int = 75) -> AsyncIterator[bytes]:
+        """Yield multipart/x-mixed-replace parts until the client disconnects."""
+        key = self._stream_key(camera_id, width, quality)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = _CameraStream(key=key, ring=FrameRing(self.buffer_frames))
+            self._streams[key] = stream
+
+        stream.viewers += 1
+        if stream.producer is None or stream.producer.done():
+            stream.producer = create_background_task(self._produce(stream, camera_id, width, quality))
+
+        cursor = 0
+        try:
+            while True:
+                frame = await stream.ring.next_frame(cursor, self.idle_timeout_seconds)
+                if frame is None:
+                    logger.warning(f"No frames from camera stream {key} for {self.idle_timeout_seconds}s")
+                    return
+                if cursor and frame.seq > cursor + 1:
+                    stream.frames_dropped += frame.seq - cursor - 1
+                cursor = frame.seq
+                stream.frames_sent += 1
+                yield _mjpeg_part(frame.data)
+        finally:
+            stream.viewers -= 1
+
+    async def _produce(self, stream: _CameraStream, camera_id: str, width: Optional[int], quality: int) -> None:
+        last_etag = None
+        try:
+            while stream.viewers > 0:
+                started = time.monotonic()
+                if width:
+                    snapshot, error = await self.camera_service.get_resized_snapshot(
+                        camera_id, width, quality, max_age_seconds=self.interval
+                    )
+                else:
+                    snapshot, error = await self.camera_service.get_cached_snapshot(
+                        camera_id, max_age_seconds=self.interval
+                    )
+
+                if error:
+                    if error != stream.last_error:
+                        logger.warning(f"Camera stream {stream.key} fetch failed: {error}")
+                    stream.last_error = error
+                elif snapshot.etag != last_etag:
+                    stream.last_error = None
+                    last_etag = snapshot.etag
+                    stream.ring.publish(snapshot.data)
+
+                await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        except Exception as e:
+            logger.exception(f"Camera stream {stream.key} producer failed: {e}")
+        finally:
+            if stream.viewers <= 0 and self._streams.get(stream.key) is stream:
+                del self._streams[stream.key]
+
+    def get_stats(self) -> dict:
+        return {
+            key: {
+                "viewers": stream.viewers,
+                "frames_published": stream.ring.latest_seq,
+                "frames_sent": stream.frames_sent,
+                "frames_dropped": stream.frames_dropped,
+                "last_error": stream.last_error,
+            }
+            for key, stream in self._streams.items()
+        }
+
+    async def close(self) -> None:
+        for stream in list(self._streams.values()):
+            if stream.producer and not stream.producer.done():
+                stream.producer.cancel()
+        self._streams.clear()
+
+
+def _mjpeg_part(data: bytes) -> bytes:
+    header = (
+        f"--{MJPEG_BOUNDARY}\r\n"
+        "Content-Type: image/jpeg\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n"
+    ).encode()
+    return header + data + b"\r\n"
+
+
+camera_stream_hub = CameraStreamHub(camera_service)
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from services.tracing import Trace, create_background_task, current_trace, traced_by
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COALESCE_SECONDS = float(os.getenv("SMART_HOME_COMMAND_COALESCE_SECONDS", "0.05"))
+
+# A target is an absolute device state such as {"on": True, "brightness": 200}.
+# None means "toggle"; it is resolved against the state in effect at that point.
+Target = Optional[dict]
+ApplyTarget = Callable[[dict], dict]
+ReadState = Callable[[], dict]
+
+
+@dataclass
+class _QueuedCommand:
+    target: Target
+    apply: ApplyTarget
+    read_state: ReadState
+    future: asyncio.Future
+    trace: Optional[Trace] = None
+
+
+@dataclass
+class _Lane:
+    pending: list[_QueuedCommand] = field(default_factory=list)
+    worker: Optional[asyncio.Task] = None
+
+
+class DeviceCommandQueue:
+    """Serialize commands per device and coalesce bursts into one final target.
+
+    Commands submitted for the same key within the coalesce window are folded
+    into a single absolute target (last writer wins) and applied once. Toggles
+    are resolved against the preceding target in the batch, or against a fresh
+    state read, so two concurrent toggles can never race each other.
+    """
+
+    def __init__(self, coalesce_seconds: float = DEFAULT_COALESCE_SECONDS):
+        self.coalesce_seconds = max(0.0, coalesce_seconds)
+        self._lanes: dict[str, _Lane] = {}
+
+    async def submit(self, key: str, target: Target, apply: ApplyTarget, read_state: ReadState) -> dict:
+        loop = asyncio.get_running_loop()
+        lane = self._lanes.setdefault(key, _Lane())
+        command = _QueuedCommand(target, apply, read_state, loop.create_future(), current_trace())
+        lane.pending.append(command)
+
+        if lane.worker is None or lane.worker.done():
+            lane.worker = create_background_task(self._drain(key, lane))
+
+        return await command.future
+
+    def pending_counts(self) -> dict[str, int]:
+        """Commands waiting per device key, excluding the batch being applied."""
+        return {key: len(lane.pending) for key, lane in list(self._lanes.items())}
+
+    async def _drain(self, key: str, lane: _Lane) -> None:
+        while lane.pending:
+            await asyncio.sleep(self.coalesce_seconds)
+            batch, lane.pending = lane.pending, []
+
+            try:
+                # The lane worker has no trace of its own; device calls are
+                # recorded in the trace of every request in the batch.
+                with traced_by(command.trace for command in batch):
+                    result = await self._run_batch(batch)
+            except Exception as e:
+                logger.exception(f"Error running command batch for {key}: {e}")
+                result = {"status": "error", "message": str(e)}
+
+            if len(batch) > 1:
+                logger.info(f"Coalesced {len(batch)} commands for {key}")
+                result["coalesced"] = len(batch)
+
+            for command in batch:
+                if not command.future.done():
+                    command.future.set_result(dict(result))
+
+    async def _run_batch(self, batch: list[_QueuedCommand]) -> dict:
+        last = batch[-1]
+        # Only the last absolute target and the toggles after it decide the
+        # outcome; the device state is read only when the batch has no target.
+        absolute = [index for index, command in enumerate(batch) if command.target is not None]
+        if absolute:
+            target: dict = dict(batch[absolute[-1]].target)
+            toggles = len(batch) - absolute[-1] - 1
+        else:
+            state = await asyncio.to_thread(batch[0].read_state)
+            error = _state_error(state)
+            if error:
+                return {"status": "error", "message": error}
+            target = {"on": bool(state.get("is_on"))}
+            toggles = len(batch)
+
+        for _ in range(toggles):
+            target = {"on": not bool(target.get("on"))}
+
+        return await asyncio.to_thread(last.apply, target)
+
+
+def _state_error(state: dict) -> Optional[str]:
+    if not isinstance(state, dict):
+        return "Device state unavailable"
+    if state.get("error"):
+        return str(state["error"])
+    if state.get("status") == "error":
+        return state.get("message") or "Device state unavailable"
+    return None
+
+
+command_queue = DeviceCommandQueue()
+
+
+async def submit_hue(target: Target) -> dict:
+    from services.hue_service import hue_service
+
+    return await command_queue.submit(
+        f"hue:{hue_service.light_name.lower()}",
+        target,
+        hue_service.apply_target,
+        hue_service.get_status,
+    )
+
+
+async def submit_wemo(name: str, target: Target) -> dict:
+    from services.wemo_service import wemo_service
+
+    # The lane key and every call in the batch use the same normalized name.
+    name = name.lower()
+    return await command_queue.submit(
+        f"wemo:{name}",
+        target,
+        lambda t: wemo_service.apply_target(name, t),
+        lambda: wemo_service.get_state(name),
+    )
@@ -0,0 +1,133 @@
+"""Reload wemo_config.yaml and cameras.yaml when they change on disk."""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Union
+
+from services.camera_archive import ARCHIVE_ENABLED, camera_archive_recorder
+from services.camera_service import camera_service
+from services.wemo_config import load_wemo_config
+from services.wemo_events import wemo_event_hub
+from services.wemo_schedule import wemo_schedule_manager
+from services.wemo_service import wemo_service
+
+logger = logging.getLogger(__name__)
+
+CONFIG_WATCH_INTERVAL_SECONDS = float(os.getenv("CONFIG_WATCH_INTERVAL_SECONDS", "5"))
+CAMERA_CONFIG_PATH = "config/cameras.yaml"
+
+ReloadCallback = Callable[[], Awaitable[None]]
+
+
+def _signature(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass
+class _WatchedFile:
+    path: Path
+    callback: ReloadCallback
+    signature: Optional[tuple[int, int]]
+
+
+class ConfigWatcher:
+    """Poll config file mtimes and run a reload callback when one changes.
+
+    Polling a couple of stat() calls every few seconds is cheap and works on
+    every platform and on bind-mounted config volumes, where inotify events
+    are unreliable.
+    """
+
+    def __init__(self, interval_seconds: float = CONFIG_WATCH_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._files: list[_WatchedFile] = []
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def watch(self, path: Union[str, Path], callback: ReloadCallback) -> None:
+        """Register a file; its current state is the baseline, so no reload runs until it changes."""
+        path = Path(path)
+        self._files = [watched for watched in self._files if watched.path != path]
+        self._files.append(_WatchedFile(path, callback, _signature(path)))
+
+    async def check(self) -> int:
+        """Reload every watched file that changed since the last check. Returns the number reloaded."""
+        reloaded = 0
+        for watched in self._files:
+            signature = _signature(watched.path)
+            if signature == watched.signature:
+                continue
+            watched.signature = signature
+            logger.info(f"Config changed, reloading: {watched.path}")
+            try:
+                await watched.callback()
+                self.reloads += 1
+                reloaded += 1
+            except Exception as e:
+                self.reload_errors += 1
+                logger.exception(f"Config reload failed for {watched.path}: {e}")
+        return reloaded
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Watching {len(self._files)} config files every {self.interval_seconds:g}s")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.check()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+async def reload_wemo_config() -> None:
+    """Parse wemo_config.yaml once and apply it to both devices and schedules."""
+    config = await asyncio.to_thread(load_wemo_config, wemo_service.config_file)
+    if config is None:
+        # Keep the running config rather than dropping every device on a bad edit.
+        return
+    devices = await wemo_service.reload_config(config)
+    tasks = wemo_schedule_manager.apply_config(config)
+    logger.info(
+        f"Wemo config reloaded: devices added={devices['added']} removed={devices['removed']} "
+        f"failed={devices['failed']}, tasks added={len(tasks['added'])} removed={len(tasks['removed'])}"
+    )
+    await asyncio.to_thread(wemo_service.revalidate_cached_devices)
+    wemo_event_hub.sync_devices()
+
+
+async def reload_camera_config() -> None:
+    if not camera_service.user:
+        # Cameras stay disabled without credentials, as at startup.
+        return
+    # Small file; applied on the loop so camera state is never mutated from a worker thread.
+    changes = camera_service.load_config(CAMERA_CONFIG_PATH)
+    if ARCHIVE_ENABLED:
+        camera_archive_recorder.start()
+    logger.info(
+        f"Camera config reloaded: added={changes['added']} removed={changes['removed']} changed={changes['changed']}"
+    )
+
+
+config_watcher = ConfigWatcher()
+
+
+def init_config_watcher() -> None:
+    config_watcher.watch(wemo_service.config_file, reload_wemo_config)
+    config_watcher.watch(Path(__file__).parent.parent / CAMERA_CONFIG_PATH, reload_camera_config)
+    config_watcher.start()
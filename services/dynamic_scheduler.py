@@ -6,14 +6,12 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Optional
 
-import pytz
-
 from services.action_executor import action_executor, get_action_display
+from services.time_utils import PACIFIC_TZ
+from services.tracing import create_background_task
 
 logger = logging.getLogger(__name__)
 
-PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
-
 MAX_COMPLETED_ACTIONS = 50
 MAX_PENDING_ACTIONS = 25
 
@@ -68,7 +66,7 @@ class DynamicScheduler:
         )
         
         self.pending_actions[action_id] = action
-        task = asyncio.create_task(self._execute_after(action))
+        task = create_background_task(self._execute_after(action))
         self._tasks[action_id] = task
         
         logger.info(f"Scheduled action {action_id}: {action_type} in {minutes} minutes (at {execute_at})")
@@ -6,6 +6,8 @@ from typing import Optional
 from phue import Bridge
 from dotenv import load_dotenv
 
+from services.metrics import BACKEND_RECONNECTS, observe
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -23,8 +25,10 @@ class HueService:
                 logger.error("HUE_BRIDGE_IP not set")
                 return False
             logger.info(f"Connecting to Hue Bridge at {self.bridge_ip}")
+            BACKEND_RECONNECTS.inc("hue", "connect")
             self.bridge = Bridge(self.bridge_ip)
-            self.bridge.connect()
+            with observe("hue", "connect"):
+                self.bridge.connect()
             logger.info("Connected to Hue Bridge")
             return True
         except Exception as e:
@@ -34,7 +38,9 @@ class HueService:
     def _get_light_id(self) -> Optional[int]:
         if not self.bridge:
             return None
-        for light in self.bridge.lights:
+        with observe("hue", "list_lights"):
+            lights = self.bridge.lights
+        for light in lights:
             if light.name == self.light_name:
                 return light.light_id
         return None
@@ -46,7 +52,8 @@ class HueService:
             light_id = self._get_light_id()
             if light_id is None:
                 return {"error": f"Light {self.light_name} not found", "is_on": False, "brightness": 0}
-            light = self.bridge.get_light(light_id)
+            with observe("hue", "get_light"):
+                light = self.bridge.get_light(light_id)
             state = light.get("state", {})
             return {
                 "name": self.light_name,
@@ -65,7 +72,8 @@ class HueService:
             light_id = self._get_light_id()
             if light_id is None:
                 return {"status": "error", "message": f"Light {self.light_name} not found"}
-            self.bridge.set_light(light_id, 'on', False)
+            with observe("hue", "set_light"):
+                self.bridge.set_light(light_id, 'on', False)
             return {
                 "status": "success",
                 "light": self.light_name,
@@ -84,7 +92,8 @@ class HueService:
             light_id = self._get_light_id()
             if light_id is None:
                 return {"status": "error", "message": f"Light {self.light_name} not found"}
-            self.bridge.set_light(light_id, {'on': True, 'bri': brightness})
+            with observe("hue", "set_light"):
+                self.bridge.set_light(light_id, {'on': True, 'bri': brightness})
             return {
                 "status": "success",
                 "light": self.light_name,
@@ -97,6 +106,11 @@ class HueService:
             msg = "Hue Bridge unreachable" if "route to host" in str(e).lower() or "errno 65" in str(e).lower() else str(e)
             return {"status": "error", "message": msg}
     
+    def apply_target(self, target: dict) -> dict:
+        if target.get("on"):
+            return self.turn_on(brightness=target.get("brightness", 128))
+        return self.turn_off()
+
     def toggle(self) -> dict:
         status = self.get_status()
         if status.get("error"):
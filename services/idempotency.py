@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from models.database import (
+    delete_expired_idempotent_results,
+    get_idempotent_result,
+    save_idempotent_result,
+)
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@dataclass
+class IdempotentResult:
+    fingerprint: str
+    status_code: int
+    content_type: str
+    body: bytes
+    created_at: float
+
+
+class IdempotencyStore:
+    """LRU cache of action responses keyed by Idempotency-Key, optionally backed by SQLite."""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 86400,
+        persist: bool = False,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self._entries: OrderedDict[str, IdempotentResult] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "IdempotencyStore":
+        return cls(
+            max_entries=int(os.getenv("SMART_HOME_IDEMPOTENCY_MAX_ENTRIES", "1000")),
+            ttl_seconds=float(os.getenv("SMART_HOME_IDEMPOTENCY_TTL_SECONDS", "86400")),
+            persist=os.getenv("SMART_HOME_IDEMPOTENCY_PERSIST", "").strip().lower() in TRUE_VALUES,
+        )
+
+    def get(self, key: str) -> Optional[IdempotentResult]:
+        min_created_at = time.time() - self.ttl_seconds
+        result = self._entries.get(key)
+        if result is not None:
+            if result.created_at >= min_created_at:
+                self._entries.move_to_end(key)
+                return result
+            del self._entries[key]
+
+        if not self.persist:
+            return None
+
+        try:
+            row = get_idempotent_result(key, min_created_at)
+        except Exception as e:
+            logger.warning(f"Failed to read idempotency result from DB: {e}")
+            return None
+        if not row:
+            return None
+
+        result = IdempotentResult(
+            fingerprint=row["fingerprint"],
+            status_code=row["status_code"],
+            content_type=row["content_type"] or "application/json",
+            body=bytes(row["body"]),
+            created_at=row["created_at"],
+        )
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: IdempotentResult) -> None:
+        self._remember(key, result)
+        if not self.persist:
+            return
+
+        try:
+            save_idempotent_result(
+                key,
+                result.fingerprint,
+                result.status_code,
+                result.content_type,
+                result.body,
+                result.created_at,
+            )
+            delete_expired_idempotent_results(time.time() - self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to persist idempotency result: {e}")
+
+    def _remember(self, key: str, result: IdempotentResult) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def begin(self, key: str) -> tuple[asyncio.Future, bool]:
+        """Return (future, True) to run the request, or (pending future, False) to wait for it."""
+        future = self._inflight.get(key)
+        if future is not None and not future.done():
+            return future, False
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future, True
+
+    def finish(self, key: str, result: Optional[IdempotentResult]) -> None:
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for header_name, value in scope.get("headers", []):
+        if header_name.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _cache_key(scope, idempotency_key: str) -> str:
+    # Scope cached results to the presented credentials so a replay never
+    # bypasses require_control_auth for a caller without the token.
+    credentials = f"{_header(scope, b'x-smart-home-token') or ''}|{_header(scope, b'authorization') or ''}"
+    raw = f"{scope['method']} {scope['path']}?{scope.get('query_string', b'').decode('latin-1')}|{credentials}|{idempotency_key}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+async def _send_json(send, status_code: int, payload: dict) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _is_cacheable(status_code: int, content_type: str, body: bytes) -> bool:
+    """Action routes report device failures as 200 with {"status": "error"}; those must stay retryable."""
+    if not 200 <= status_code < 300:
+        return False
+    if not content_type.startswith("application/json"):
+        return True
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return True
+    return not (isinstance(payload, dict) and payload.get("status") == "error")
+
+
+async def _replay(send, result: IdempotentResult) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": result.status_code,
+        "headers": [
+            (b"content-type", result.content_type.encode("latin-1")),
+            (b"content-length", str(len(result.body)).encode()),
+            (b"idempotent-replayed", b"true"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": result.body})
+
+
+class IdempotencyMiddleware:
+    """Replay the first response for mutating /api requests that repeat an Idempotency-Key.
+
+    Concurrent retries wait for the in-flight original instead of repeating the
+    physical action. Only 2xx responses whose JSON body is not {"status": "error"}
+    are cached, so a rejected attempt or a device failure can still be retried
+    with the same key; such retries run one at a time.
+    """
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith("/api/")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, IDEMPOTENCY_HEADER.lower().encode())
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters"})
+            return
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = _cache_key(scope, idempotency_key)
+
+        while True:
+            cached = self.store.get(key)
+            if cached is not None:
+                if cached.fingerprint != fingerprint:
+                    await _send_json(send, 422, {"detail": f"{IDEMPOTENCY_HEADER} was reused with a different request body"})
+                    return
+                await _replay(send, cached)
+                return
+            inflight, owner = self.store.begin(key)
+            if owner:
+                break
+            # If the original is not cached, the first waiter to wake runs next.
+            await asyncio.shield(inflight)
+
+        await self._run_and_store(scope, body, fingerprint, key, send)
+
+    async def _run_and_store(self, scope, body: bytes, fingerprint: str, key: str, send) -> None:
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return {"type": "http.disconnect"}
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status_code = 500
+        content_type = "application/json"
+        chunks: list[bytes] = []
+
+        async def capture_send(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        result: Optional[IdempotentResult] = None
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            response_body = b"".join(chunks)
+            if _is_cacheable(status_code, content_type, response_body):
+                result = IdempotentResult(
+                    fingerprint=fingerprint,
+                    status_code=status_code,
+                    content_type=content_type,
+                    body=response_body,
+                    created_at=time.time(),
+                )
+                self.store.put(key, result)
+        finally:
+            self.store.finish(key, result)
+
+
+idempotency_store = IdempotencyStore.from_env()
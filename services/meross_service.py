@@ -5,16 +5,21 @@ import os
 import secrets
 import time
 from datetime import datetime
+from typing import Optional
 
-import requests
+import httpx
 from dotenv import load_dotenv
 
+from models.database import save_device_state
+from services.metrics import BACKEND_RECONNECTS, observe
 from services.notification_service import notification_service
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+GARAGE_DOOR_STATE_NAMESPACE = "Appliance.GarageDoor.State"
+
 class MerossService:
     def __init__(self):
         self.client = None
@@ -25,6 +30,14 @@ class MerossService:
         self._connected = False
         self._verify_timeout_seconds = float(os.getenv("MEROSS_GARAGE_VERIFY_TIMEOUT_SECONDS", "20"))
         self._verify_poll_interval_seconds = float(os.getenv("MEROSS_GARAGE_VERIFY_POLL_INTERVAL_SECONDS", "2"))
+        self._verify_max_poll_interval_seconds = float(os.getenv("MEROSS_GARAGE_VERIFY_MAX_POLL_INTERVAL_SECONDS", "8"))
+        self._local_timeout_seconds = float(os.getenv("MEROSS_LOCAL_TIMEOUT_SECONDS", "8"))
+        self._http: Optional[httpx.AsyncClient] = None
+        self._local_url: Optional[str] = None
+        self._header_template: Optional[dict] = None
+        self._transport_key: Optional[tuple] = None
+        self._door_states: dict[int, dict] = {}
+        self._state_waiters: dict[int, list[asyncio.Future]] = {}
 
     def _select_garage_device(self, devices: list):
         expected_uuid = os.getenv("MEROSS_GARAGE_UUID")
@@ -56,6 +69,7 @@ class MerossService:
             logger.error("MEROSS_EMAIL or MEROSS_PASSWORD not set")
             return False
         
+        BACKEND_RECONNECTS.inc("meross", "connect")
         try:
             from meross_iot.http_api import MerossHttpClient
             from meross_iot.manager import MerossManager
@@ -78,7 +92,10 @@ class MerossService:
                 await self.device.async_update()
                 self._local_ip = getattr(self.device, "_inner_ip", None)
                 self._key = self.client.cloud_credentials.key
+                self._prepare_local_transport()
                 self._connected = True
+                self._seed_door_states()
+                self.manager.register_push_notification_handler_coroutine(self._handle_push_notification)
                 logger.info(f"Connected to Meross device: {self.device.name} ({self._local_ip})")
                 return True
             else:
@@ -89,46 +106,68 @@ class MerossService:
             return False
     
     async def close(self):
-        pass
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+        if self.manager:
+            try:
+                self.manager.unregister_push_notification_handler_coroutine(self._handle_push_notification)
+            except Exception:
+                pass
     
     def get_door_count(self) -> int:
         if not self.device:
             return 0
         return len(self.device.channels) - 1
 
+    def _prepare_local_transport(self) -> None:
+        """Precompute the parts of every signed local message that never change."""
+        self._transport_key = (self._local_ip, self.device.uuid)
+        self._local_url = f"http://{self._local_ip}/config"
+        self._header_template = {
+            "payloadVersion": 1,
+            "from": self._local_url,
+            "triggerSrc": "AndroidLocal",
+            "timestampMs": 0,
+            "uuid": self.device.uuid,
+        }
+
     def _build_local_message(self, namespace: str, method: str, payload: dict) -> dict:
+        if self._transport_key != (self._local_ip, self.device.uuid):
+            self._prepare_local_transport()
         timestamp = int(time.time())
         message_id = secrets.token_hex(16)
         sign = hashlib.md5(
             f"{message_id}{self._key}{timestamp}".encode(),
             usedforsecurity=False,
         ).hexdigest()
-        return {
-            "header": {
-                "messageId": message_id,
-                "namespace": namespace,
-                "method": method,
-                "payloadVersion": 1,
-                "from": f"http://{self._local_ip}/config",
-                "triggerSrc": "AndroidLocal",
-                "timestamp": timestamp,
-                "timestampMs": 0,
-                "sign": sign,
-                "uuid": self.device.uuid,
-            },
-            "payload": payload,
-        }
+        header = dict(self._header_template)
+        header.update({
+            "messageId": message_id,
+            "namespace": namespace,
+            "method": method,
+            "timestamp": timestamp,
+            "sign": sign,
+        })
+        return {"header": header, "payload": payload}
 
-    def _local_request(self, namespace: str, method: str, payload: dict) -> dict:
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            # A single garage controller: keep one warm connection to /config.
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self._local_timeout_seconds, connect=3.0),
+                limits=httpx.Limits(max_connections=2, max_keepalive_connections=1, keepalive_expiry=60.0),
+            )
+        return self._http
+
+    async def _local_request(self, namespace: str, method: str, payload: dict) -> dict:
         if not self._local_ip or not self._key:
             raise RuntimeError("Meross local IP or key is not available")
 
-        response = requests.post(
-            f"http://{self._local_ip}/config",
-            json=self._build_local_message(namespace, method, payload),
-            timeout=8,
-        )
-        response.raise_for_status()
+        message = self._build_local_message(namespace, method, payload)
+        with observe("meross", f"{method} {namespace}"):
+            response = await self._get_http_client().post(self._local_url, json=message)
+            response.raise_for_status()
         return response.json().get("payload", {})
 
     def _get_current_open_state(self, door_index: int, current_state: dict) -> bool:
@@ -136,30 +175,152 @@ class MerossService:
             return bool(current_state["open"])
         return bool(self.device.get_is_open(door_index))
 
-    def _read_door_state(self, door_index: int) -> tuple[dict, bool]:
-        payload = self._local_request(
-            "Appliance.GarageDoor.State",
+    async def _read_door_state(self, door_index: int) -> tuple[dict, bool]:
+        payload = await self._local_request(
+            GARAGE_DOOR_STATE_NAMESPACE,
             "GET",
             {"state": {"channel": door_index}},
         )
         state = payload.get("state", {}) if isinstance(payload, dict) else {}
         return state, self._get_current_open_state(door_index, state)
 
-    async def _wait_for_target_state(self, door_index: int, target_open: bool) -> tuple[bool, dict]:
+    def _seed_door_states(self) -> None:
+        if not hasattr(self.device, "get_is_open"):
+            return
+        for door_index in range(1, self.get_door_count() + 1):
+            try:
+                is_open = self.device.get_is_open(door_index)
+            except Exception:
+                continue
+            if is_open is not None:
+                self._record_door_state(door_index, {"channel": door_index, "open": int(is_open)}, bool(is_open), "cloud")
+
+    def _record_door_state(self, door_index: int, state: dict, is_open: bool, source: str) -> dict:
+        previous = self._door_states.get(door_index)
+        if previous is None or previous["open"] != is_open:
+            self._save_transition(door_index, is_open, source)
+        entry = {
+            "open": is_open,
+            "state": state,
+            "updated_at": time.time(),
+            "source": source,
+        }
+        self._door_states[door_index] = entry
+        for future in self._state_waiters.pop(door_index, []):
+            if not future.done():
+                future.set_result(entry)
+        return entry
+
+    def _save_transition(self, door_index: int, is_open: bool, source: str) -> None:
+        try:
+            save_device_state("garage", f"door_{door_index}", {"open": is_open, "source": source})
+        except Exception as e:
+            logger.warning(f"Failed to save garage door {door_index} state to DB: {e}")
+
+    async def refresh_door_states(self) -> list[dict]:
+        """Read every channel with one local GET and update the cached states."""
+        door_count = self.get_door_count()
+        if door_count == 0:
+            return []
+
+        payload = await self._local_request(
+            GARAGE_DOOR_STATE_NAMESPACE,
+            "GET",
+            {"state": [{"channel": door_index} for door_index in range(1, door_count + 1)]},
+        )
+        states = payload.get("state", []) if isinstance(payload, dict) else []
+        if isinstance(states, dict):
+            states = [states]
+        for state in states:
+            channel = state.get("channel")
+            if channel is None or "open" not in state:
+                continue
+            self._record_door_state(int(channel), state, bool(state["open"]), "poll")
+        return self.get_door_states()
+
+    def get_door_states(self) -> list[dict]:
+        doors = []
+        for door_index in range(1, self.get_door_count() + 1):
+            entry = self._door_states.get(door_index)
+            doors.append({
+                "door": door_index,
+                "open": entry["open"] if entry else None,
+                "updated_at": datetime.fromtimestamp(entry["updated_at"]).isoformat() if entry else None,
+                "source": entry["source"] if entry else None,
+            })
+        return doors
+
+    async def _handle_push_notification(self, push_notification, target_devices, manager) -> None:
+        namespace = getattr(push_notification.namespace, "value", push_notification.namespace)
+        if namespace != GARAGE_DOOR_STATE_NAMESPACE:
+            return
+        if not self.device or push_notification.originating_device_uuid != self.device.uuid:
+            return
+
+        payload = (push_notification.raw_data or {}).get("state") or []
+        if isinstance(payload, dict):
+            payload = [payload]
+        for door in payload:
+            channel = door.get("channel")
+            if channel is None or "open" not in door:
+                continue
+            self._record_door_state(int(channel), door, bool(door["open"]), "push")
+            logger.info(f"Garage door {channel} reported {'open' if door['open'] else 'closed'} via push")
+
+    async def _poll_door_state(self, door_index: int) -> tuple[dict, bool]:
+        state, is_open = await self._read_door_state(door_index)
+        self._record_door_state(door_index, state, is_open, "poll")
+        return state, is_open
+
+    async def _wait_for_push(self, door_index: int, timeout: float) -> Optional[dict]:
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._state_waiters.setdefault(door_index, [])
+        waiters.append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+
+    async def _wait_for_target_state(self, door_index: int, target_open: bool, since: Optional[float] = None) -> tuple[bool, dict]:
+        """Wait for the door to report target_open, preferring push updates.
+
+        Falls back to local state polls with exponential backoff whenever no
+        push arrives within the current interval.
+        """
         timeout = max(0.0, self._verify_timeout_seconds)
         interval = max(0.1, self._verify_poll_interval_seconds)
+        max_interval = max(interval, self._verify_max_poll_interval_seconds)
         deadline = time.monotonic() + timeout
+        since = time.time() if since is None else since
         last_state = {}
+        observed = False
 
         while True:
-            last_state, is_open = await asyncio.to_thread(self._read_door_state, door_index)
-            if is_open == target_open:
-                return True, last_state
+            cached = self._door_states.get(door_index)
+            if cached and cached["updated_at"] >= since:
+                observed = True
+                last_state = cached["state"]
+                if cached["open"] == target_open:
+                    return True, last_state
 
-            if time.monotonic() >= deadline:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if not observed:
+                    last_state, is_open = await self._poll_door_state(door_index)
+                    return is_open == target_open, last_state
                 return False, last_state
 
-            await asyncio.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+            if await self._wait_for_push(door_index, min(interval, remaining)) is not None:
+                continue
+
+            last_state, is_open = await self._poll_door_state(door_index)
+            observed = True
+            if is_open == target_open:
+                return True, last_state
+            interval = min(interval * 2, max_interval)
     
     async def toggle_door(self, door_index: int) -> dict:
         if not self.device:
@@ -172,11 +333,11 @@ class MerossService:
             if not hasattr(self.device, "get_is_open"):
                 return {"status": "error", "message": "Connected Meross device is not a garage opener"}
 
-            current_state, current_is_open = await asyncio.to_thread(self._read_door_state, door_index)
+            current_state, current_is_open = await self._poll_door_state(door_index)
             target_open = not current_is_open
-            response_payload = await asyncio.to_thread(
-                self._local_request,
-                "Appliance.GarageDoor.State",
+            command_sent_at = time.time()
+            response_payload = await self._local_request(
+                GARAGE_DOOR_STATE_NAMESPACE,
                 "SET",
                 {
                     "state": {
@@ -189,7 +350,7 @@ class MerossService:
             state = response_payload.get("state") if isinstance(response_payload, dict) else None
             if isinstance(state, list):
                 state = state[0] if state else None
-            verified, final_state = await self._wait_for_target_state(door_index, target_open)
+            verified, final_state = await self._wait_for_target_state(door_index, target_open, since=command_sent_at)
             status = "success" if verified else "triggered_unverified"
             result = {
                 "status": status,
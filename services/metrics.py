@@ -0,0 +1,235 @@
+"""In-process counters and histograms rendered in the Prometheus text format.
+
+Recording is a perf_counter pair, a bisect over a dozen buckets and a few
+integer adds under an uncontended lock, so it can wrap every device call.
+Values that already live elsewhere (queue sizes, cache stats) are exported
+through gauge callbacks evaluated only when /metrics is scraped.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Union
+
+from models.database import set_write_observer
+from services.tracing import record_span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = tuple[str, ...]
+GaugeValue = Union[float, dict[Labels, float]]
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._counts: dict[Labels, list[int]] = {}
+        self._sums: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items()]
+        for labels, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class CallbackGauge:
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], GaugeValue], labelnames: Labels = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def samples(self) -> Iterator[str]:
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.debug(f"Metric callback {self.name} failed: {e}")
+            return
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, sample in sorted(values.items()):
+            if sample is None:
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(sample)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Union[Counter, Histogram, CallbackGauge]] = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Labels = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help_text: str, callback: Callable[[], GaugeValue], labelnames: Labels = ()) -> CallbackGauge:
+        # Re-registering replaces the callback, so reloaded modules export fresh objects.
+        gauge = CallbackGauge(name, help_text, callback, labelnames)
+        self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help_text}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+BACKEND_LATENCY = registry.histogram(
+    "smart_home_backend_request_seconds",
+    "Latency of calls to device backends.",
+    ("backend", "operation"),
+)
+BACKEND_ERRORS = registry.counter(
+    "smart_home_backend_errors_total",
+    "Device backend calls that raised.",
+    ("backend", "operation"),
+)
+BACKEND_RECONNECTS = registry.counter(
+    "smart_home_backend_reconnects_total",
+    "Reconnects and rediscoveries per backend.",
+    ("backend", "reason"),
+)
+DB_WRITE_LATENCY = registry.histogram(
+    "smart_home_db_write_seconds",
+    "SQLite write transaction latency.",
+    ("table",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+DB_ROWS_WRITTEN = registry.counter(
+    "smart_home_db_rows_written_total",
+    "Rows written to SQLite.",
+    ("table",),
+)
+EVENT_LOOP_LAG = registry.histogram(
+    "smart_home_event_loop_lag_seconds",
+    "How late the event loop heartbeat woke up.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+EVENT_LOOP_STALLS = registry.counter(
+    "smart_home_event_loop_stalls_total",
+    "Times the event loop was blocked for longer than SMART_HOME_LOOP_LAG_MS.",
+)
+
+
+@contextmanager
+def observe(backend: str, operation: str):
+    """Time a device backend call; exceptions are counted and re-raised.
+
+    The call is also added as a span to the current request trace, if any.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        # Cancellation (a client hanging up) is not a backend failure.
+        BACKEND_ERRORS.inc(backend, operation)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        BACKEND_LATENCY.observe(duration, backend, operation)
+        record_span(f"{backend}.{operation}", started, duration)
+
+
+@contextmanager
+def observe_db_write(table: str, rows: int = 1):
+    started = time.perf_counter()
+    yield
+    duration = time.perf_counter() - started
+    DB_WRITE_LATENCY.observe(duration, table)
+    DB_ROWS_WRITTEN.inc(table, amount=rows)
+    record_span(f"db.{table}", started, duration)
+
+
+set_write_observer(observe_db_write)
@@ -7,6 +7,7 @@ from models.database import save_device_state
 from services.hue_service import hue_service
 from services.wemo_service import wemo_service
 from services.rinnai_service import rinnai_service
+from services.tracing import create_background_task
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,7 @@ async def schedule_collection(
     if delay_seconds is None:
         delay_seconds = DEFAULT_DELAYS.get(device_type, 10.0)
     
-    asyncio.create_task(_collect_and_save(device_type, device_name, delay_seconds))
+    create_background_task(_collect_and_save(device_type, device_name, delay_seconds))
     logger.debug(
         f"Scheduled collection for {device_type}/{device_name} in {delay_seconds}s"
     )
@@ -69,7 +70,11 @@ async def _fetch_device_status(device_type: str, device_name: str) -> Optional[d
             return {"is_on": status.get("is_on")}
         
         elif device_type == "rinnai":
-            status = await rinnai_service.get_status(trigger_maintenance=True)
+            status = await rinnai_service.get_status(
+                trigger_maintenance=True,
+                max_age_seconds=0,
+                device_id=device_name,
+            )
             if "error" in status:
                 return None
             inlet = status.get("inlet_temp")
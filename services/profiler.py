@@ -0,0 +1,242 @@
+"""Statistical stack sampler for all threads and an event-loop lag monitor.
+
+StackSampler wakes every few milliseconds in its own thread, reads
+sys._current_frames() and counts each thread's stack. The result is in the
+collapsed format ("thread;outer;inner count") that flamegraph.pl, speedscope
+and inferno read. Threads only pay for the GIL hand-off of each sample.
+
+LoopLagMonitor runs a heartbeat task on the event loop and a watchdog thread.
+When the heartbeat stops for longer than the threshold the watchdog captures
+the loop thread's stack while it is still blocked, and the heartbeat logs it
+once the loop gets control back.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Optional
+
+from services.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_INTERVAL_MS = float(os.getenv("SMART_HOME_PROFILE_INTERVAL_MS", "10"))
+PROFILE_MAX_SECONDS = float(os.getenv("SMART_HOME_PROFILE_MAX_SECONDS", "60"))
+LOOP_LAG_MS = float(os.getenv("SMART_HOME_LOOP_LAG_MS", "250"))
+LOOP_LAG_BUFFER = int(os.getenv("SMART_HOME_LOOP_LAG_BUFFER", "20"))
+
+# Leaf frames of threads parked waiting for work: pool workers, the APScheduler
+# and watchdog threads, and the event loop in select().
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+_THREAD_NUMBER = re.compile(r"\d+")
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+@functools.lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    for prefix in sorted({p for p in sys.path if p}, key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def _frame_label(frame: FrameType, lines: bool) -> str:
+    code = frame.f_code
+    location = _short_path(code.co_filename)
+    if lines:
+        location = f"{location}:{frame.f_lineno}"
+    return f"{code.co_name} ({location})".replace(";", ":")
+
+
+def _is_idle(frame: FrameType) -> bool:
+    filename = frame.f_code.co_filename
+    return any(filename.endswith(name) and frame.f_code.co_name == func for name, func in IDLE_LEAVES)
+
+
+def format_frame_stack(frame: FrameType) -> list[str]:
+    """Outermost-first "path:line in function" entries for a frame."""
+    entries = []
+    while frame is not None:
+        entries.append(f"{_short_path(frame.f_code.co_filename)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return entries[::-1]
+
+
+class StackSampler:
+    """Samples the stacks of every other thread until stopped."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, lines: bool = False, include_idle: bool = False):
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.lines = lines
+        self.include_idle = include_idle
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: _THREAD_NUMBER.sub("N", thread.name) for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.sample_frame(names.get(thread_id, "unknown"), frame)
+        self.duration = time.perf_counter() - started
+
+    def sample_frame(self, thread_name: str, frame: FrameType) -> None:
+        self.samples += 1
+        if _is_idle(frame):
+            self.idle_samples += 1
+            if not self.include_idle:
+                return
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame, self.lines))
+            frame = frame.f_back
+        labels.append(thread_name.replace(";", ":"))
+        self.stacks[";".join(reversed(labels))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """Runs one sampling session at a time for the debug endpoint."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval_ms = interval_ms
+        self._lock = asyncio.Lock()
+
+    async def profile(self, seconds: float, lines: bool = False, include_idle: bool = False) -> StackSampler:
+        if self._lock.locked():
+            raise ProfilerBusyError("A profile is already running")
+        async with self._lock:
+            sampler = StackSampler(self.interval_ms, lines=lines, include_idle=include_idle)
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+            logger.info(
+                f"Profiled {sampler.duration:.1f}s: {sampler.samples} samples, {sampler.idle_samples} idle"
+            )
+            return sampler
+
+
+class LoopLagMonitor:
+    """Logs and keeps the stack of each event-loop stall longer than the threshold."""
+
+    def __init__(self, threshold_ms: float = LOOP_LAG_MS, buffer_size: int = LOOP_LAG_BUFFER):
+        self.threshold = threshold_ms / 1000
+        self.check_interval = max(self.threshold / 4, 0.01)
+        self.stalls_total = 0
+        self.max_lag_ms = 0.0
+        self._stalls: deque = deque(maxlen=max(buffer_size, 1))
+        self._beat = 0.0
+        # (heartbeat seen as stale, loop stack captured by the watchdog)
+        self._captured: Optional[tuple[float, list[str]]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self.threshold <= 0 or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching for event loop stalls over {self.threshold * 1000:g}ms")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            previous_beat = self._beat
+            expected = time.monotonic() + self.check_interval
+            await asyncio.sleep(self.check_interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = max(0.0, now - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            captured, self._captured = self._captured, None
+            if lag >= self.threshold:
+                stack = captured[1] if captured and captured[0] == previous_beat else []
+                self._record(lag, stack)
+
+    def _watch(self) -> None:
+        # Capture once the loop is half the threshold late, while it is still blocked.
+        stale_after = self.check_interval + self.threshold / 2
+        while not self._stop.wait(self.check_interval):
+            beat = self._beat
+            if time.monotonic() - beat < stale_after or (self._captured and self._captured[0] == beat):
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured = (beat, format_frame_stack(frame))
+
+    def _record(self, lag: float, stack: list[str]) -> None:
+        blocked_ms = round(lag * 1000, 1)
+        self.stalls_total += 1
+        self.max_lag_ms = max(self.max_lag_ms, blocked_ms)
+        EVENT_LOOP_STALLS.inc()
+        self._stalls.append({
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "blocked_ms": blocked_ms,
+            "stack": stack,
+        })
+        where = "\n  ".join(stack) if stack else "(stack not captured)"
+        logger.warning(f"Event loop blocked for {blocked_ms:.0f}ms:\n  {where}")
+
+    def get_stalls(self) -> list[dict]:
+        return list(reversed(self._stalls))
+
+
+profiler = Profiler()
+loop_lag_monitor = LoopLagMonitor()
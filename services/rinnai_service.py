@@ -1,30 +1,115 @@
 import asyncio
+import base64
+import json
 import logging
 import os
 import inspect
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Optional, Callable, Awaitable
 
 from dotenv import load_dotenv
 
+from services.metrics import BACKEND_RECONNECTS, observe
+from services.time_utils import format_unix_time
+from services.tracing import create_background_task
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+MAINTENANCE_WAIT_SECONDS = float(os.getenv("RINNAI_MAINTENANCE_WAIT_SECONDS", "5"))
+SNAPSHOT_MIN_REFRESH_SECONDS = float(os.getenv("RINNAI_SNAPSHOT_MIN_REFRESH_SECONDS", "60"))
+TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("RINNAI_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+
+
+# (status key, GraphQL field) pairs; everything else in the payload is ignored.
+SHADOW_INT_FIELDS = (("set_temperature", "set_domestic_temperature"),)
+SHADOW_BOOL_FIELDS = (
+    ("operation_enabled", "operation_enabled"),
+    ("recirculation_enabled", "recirculation_enabled"),
+)
+SENSOR_INT_FIELDS = (
+    ("inlet_temp", "m08_inlet_temperature"),
+    ("outlet_temp", "m02_outlet_temperature"),
+    ("water_flow", "m01_water_flow_rate_raw"),
+)
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_device_status(info: dict, device_id: Optional[str]) -> dict:
+    """Build the status dict from a getDevice GraphQL response."""
+    data = (info.get("data") or {}).get("getDevice") or {}
+    shadow = data.get("shadow") or {}
+    sensor = data.get("info") or {}
+
+    status = {
+        "device_id": device_id,
+        "name": data.get("device_name", "Unknown"),
+        "is_online": True,
+    }
+    for key, field in SHADOW_INT_FIELDS:
+        status[key] = _to_int(shadow.get(field, 0))
+    for key, field in SHADOW_BOOL_FIELDS:
+        status[key] = bool(shadow.get(field, False))
+    for key, field in SENSOR_INT_FIELDS:
+        status[key] = _to_int(sensor.get(field, 0))
+    status["firmware"] = data.get("firmware", "unknown")
+
+    device_time = None
+    device_time_pacific = None
+    unix_time_raw = sensor.get("unix_time")
+    if unix_time_raw:
+        try:
+            device_time, device_time_pacific = format_unix_time(int(unix_time_raw))
+        except (ValueError, TypeError, OverflowError, OSError):
+            pass
+    status["device_time"] = device_time
+    status["device_time_pacific"] = device_time_pacific
+    return status
+
+
+def _token_expiry(token: Optional[str]) -> Optional[float]:
+    """Read the exp claim of a JWT without verifying it."""
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class _DeviceSnapshot:
+    status: Optional[dict] = None
+    taken_at: Optional[float] = None
+    taken_time: Optional[str] = None
+    refresh_task: Optional[asyncio.Task] = None
+
 
 class RinnaiService:
     def __init__(self):
         self.api: Optional[Any] = None
+        # device_id is the primary (first) heater; device_ids lists every heater on the account.
         self.device_id: Optional[str] = None
-        self._device: Optional[dict] = None
+        self.device_ids: list[str] = []
+        self._devices: dict[str, dict] = {}
         self._connected = False
         self._connect_lock = asyncio.Lock()
-
-    def _to_int(self, value) -> int:
-        try:
-            return int(value)
-        except (TypeError, ValueError):
-            return 0
+        self._snapshots: dict[str, _DeviceSnapshot] = {}
+        self._token_task: Optional[asyncio.Task] = None
+        self._login_count = 0
+        self._token_refresh_count = 0
+        self._cloud_calls: dict[str, int] = {}
 
     def _response_status(self, response) -> tuple[bool, str]:
         """Normalize aiorinnai response formats to (success, error_message)."""
@@ -44,6 +129,40 @@ class RinnaiService:
 
         return True, ""
 
+    async def _cloud_call(self, operation: str, call: Awaitable[Any]) -> Any:
+        self._cloud_calls[operation] = self._cloud_calls.get(operation, 0) + 1
+        with observe("rinnai", operation):
+            return await call
+
+    def get_metrics(self) -> dict:
+        expires_at = _token_expiry(getattr(self.api, "access_token", None)) if self.api else None
+        return {
+            "logins": self._login_count,
+            "token_refreshes": self._token_refresh_count,
+            "cloud_calls": dict(self._cloud_calls),
+            "device_count": len(self.device_ids),
+            "device_cached": bool(self._devices),
+            "token_expires_in_seconds": round(expires_at - time.time(), 1) if expires_at else None,
+        }
+
+    def invalidate_device_cache(self) -> None:
+        """Drop the cached device descriptors so the next use re-reads user info."""
+        self._devices = {}
+
+    async def _load_devices(self) -> list:
+        user_info = await self._cloud_call("user.get_info", self.api.user.get_info())
+        devices = [d for d in user_info.get("devices", {}).get("items", []) if d.get("id")]
+        self._devices = {device["id"]: device for device in devices}
+        return devices
+
+    def _resolve_device_id(self, device_id: Optional[str]) -> Optional[str]:
+        if device_id is None:
+            return self.device_id
+        return device_id if device_id in self.device_ids else None
+
+    def has_device(self, device_id: str) -> bool:
+        return device_id in self.device_ids
+
     async def connect(self) -> bool:
         username = os.getenv("RINNAI_USERNAME")
         password = os.getenv("RINNAI_PASSWORD")
@@ -66,16 +185,25 @@ class RinnaiService:
             username_str = str(username)
             password_str = str(password)
             self.api = API()
-            await self.api.async_login(username_str, password_str)
+            self._login_count += 1
+            BACKEND_RECONNECTS.inc("rinnai", "connect")
+            await self._cloud_call("login", self.api.async_login(username_str, password_str))
+
+            # A reconnect only needs a new session; reuse the cached descriptors.
+            if self._devices and self.device_ids:
+                self._connected = True
+                self._start_token_refresh()
+                logger.info(f"Reconnected to Rinnai devices: {', '.join(self.device_ids)}")
+                return True
 
-            user_info = await self.api.user.get_info()
-            devices = user_info.get("devices", {}).get("items", [])
+            devices = await self._load_devices()
 
             if devices:
-                self.device_id = devices[0].get("id")
-                self._device = devices[0]
+                self.device_ids = [device["id"] for device in devices]
+                self.device_id = self.device_ids[0]
                 self._connected = True
-                logger.info(f"Connected to Rinnai device: {self.device_id}")
+                self._start_token_refresh()
+                logger.info(f"Connected to {len(self.device_ids)} Rinnai device(s): {', '.join(self.device_ids)}")
                 return True
 
             logger.error("No Rinnai devices found")
@@ -88,6 +216,37 @@ class RinnaiService:
             self.api = None
             return False
 
+    def _start_token_refresh(self) -> None:
+        if self._token_task is None or self._token_task.done():
+            self._token_task = create_background_task(self._token_refresh_loop())
+
+    async def _token_refresh_loop(self) -> None:
+        """Renew the access token shortly before it expires instead of after a 401."""
+        while self.api:
+            expires_at = _token_expiry(getattr(self.api, "access_token", None))
+            if expires_at is None:
+                return
+            delay = expires_at - TOKEN_REFRESH_MARGIN_SECONDS - time.time()
+            # Never spin if the renewed token is already inside the margin.
+            await asyncio.sleep(max(delay, 30.0))
+
+            api = self.api
+            if not api:
+                return
+            try:
+                self._token_refresh_count += 1
+                await self._cloud_call("token_refresh", api.async_renew_access_token())
+                logger.info("Renewed Rinnai access token")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Rinnai token renewal failed, reconnecting: {e}")
+                self._token_task = None
+                async with self._connect_lock:
+                    # A successful connect() starts a fresh refresh loop.
+                    await self.connect()
+                return
+
     async def _ensure_connection(self) -> bool:
         if self._connected and self.api and getattr(self.api, "is_connected", False):
             return True
@@ -136,98 +295,178 @@ class RinnaiService:
                     logger.exception("Rinnai operation failed after reconnect")
             return None
 
-    async def _get_device(self) -> Optional[dict]:
+    async def _get_device(self, device_id: Optional[str] = None) -> Optional[dict]:
         api = self.api
-        if not api:
+        device_id = device_id or self.device_id
+        if not api or not device_id:
             return None
 
-        if self._device and self._device.get("id") == self.device_id:
-            return self._device
+        device = self._devices.get(device_id)
+        if device:
+            return device
 
         try:
-            user_info = await api.user.get_info()
-            devices = user_info.get("devices", {}).get("items", [])
-            for device in devices:
-                if device.get("id") == self.device_id:
-                    self._device = device
-                    return device
-            return None
+            await self._load_devices()
+            return self._devices.get(device_id)
         except Exception as exc:
             logger.error(f"Error getting Rinnai device list: {exc}")
             return None
 
-    async def _get_info(self) -> Optional[dict]:
+    async def _get_info(self, device_id: Optional[str] = None) -> Optional[dict]:
         api = self.api
-        if not self.device_id or not api:
+        device_id = device_id or self.device_id
+        if not device_id or not api:
             return None
-        info = await api.device.get_info(self.device_id)
+        info = await self._cloud_call("device.get_info", api.device.get_info(device_id))
         if not isinstance(info, dict):
             return None
         return info
 
-    async def _fetch_status(self) -> dict:
-        info = await self._get_info()
+    async def _fetch_status(self, device_id: Optional[str] = None) -> dict:
+        device_id = device_id or self.device_id
+        info = await self._get_info(device_id)
         if not info:
             return {"error": "Failed to fetch device info", "is_online": False}
-
-        data = info.get("data", {}).get("getDevice", {})
-        shadow = data.get("shadow", {}) or {}
-        sensor = data.get("info", {}) or {}
-
-        # Parse device time.
-        unix_time_raw = sensor.get("unix_time")
-        device_time = None
-        device_time_pacific = None
-        if unix_time_raw:
-            try:
-                unix_time = int(unix_time_raw)
-                from datetime import datetime, timezone as tz
-                dt = datetime.fromtimestamp(unix_time, tz=tz.utc)
-                device_time = dt.isoformat()
-                # Convert to Pacific Time.
-                import pytz
-                pacific = pytz.timezone('America/Los_Angeles')
-                dt_pacific = dt.astimezone(pacific)
-                device_time_pacific = dt_pacific.strftime('%Y-%m-%d %H:%M:%S %Z')
-            except (ValueError, TypeError):
-                pass
-
-        return {
-            "device_id": self.device_id,
-            "name": data.get("device_name", "Unknown"),
-            "is_online": True,
-            "set_temperature": self._to_int(shadow.get("set_domestic_temperature", 0)),
-            "operation_enabled": bool(shadow.get("operation_enabled", False)),
-            "recirculation_enabled": bool(shadow.get("recirculation_enabled", False)),
-            "inlet_temp": self._to_int(sensor.get("m08_inlet_temperature", 0)),
-            "outlet_temp": self._to_int(sensor.get("m02_outlet_temperature", 0)),
-            "water_flow": self._to_int(sensor.get("m01_water_flow_rate_raw", 0)),
-            "firmware": data.get("firmware", "unknown"),
-            "device_time": device_time,
-            "device_time_pacific": device_time_pacific,
-        }
-
-    async def get_status(self, trigger_maintenance: bool = False) -> dict:
-        if not self.device_id:
+        return parse_device_status(info, device_id)
+
+    async def get_status(
+        self,
+        trigger_maintenance: bool = False,
+        max_age_seconds: Optional[float] = None,
+        device_id: Optional[str] = None,
+    ) -> dict:
+        """Return status for one heater (the primary one by default).
+
+        With trigger_maintenance, the maintenance-refreshed snapshot is returned
+        immediately and refreshed in the background. Only when there is no
+        snapshot yet, or it is older than max_age_seconds, does the call wait
+        for a (shared) maintenance retrieval.
+        """
+        device_id = self._resolve_device_id(device_id)
+        if not device_id:
             return {"error": "Not connected", "is_online": False}
 
         if trigger_maintenance:
-            maintenance = await self.trigger_maintenance_retrieval(wait_seconds=5, include_status=False)
-            if maintenance.get("status") != "success":
-                return maintenance
+            return await self.get_snapshot(max_age_seconds=max_age_seconds, device_id=device_id)
 
-        status = await self._run_with_connection(self._fetch_status)
+        status = await self._run_with_connection(lambda: self._fetch_status(device_id))
         if not status or "error" in status:
-            return {"error": "Not connected", "is_online": False}
+            return {"device_id": device_id, "error": "Not connected", "is_online": False}
 
         return status
 
-    async def trigger_maintenance_retrieval(self, wait_seconds: float = 5.0, include_status: bool = True) -> dict:
-        if not self.device_id:
+    async def get_all_statuses(
+        self,
+        trigger_maintenance: bool = False,
+        max_age_seconds: Optional[float] = None,
+    ) -> dict[str, dict]:
+        """Fetch every heater concurrently; one slow or failing unit does not block the others."""
+        if not self.device_ids:
+            return {}
+
+        results = await asyncio.gather(
+            *[
+                self.get_status(trigger_maintenance, max_age_seconds, device_id=device_id)
+                for device_id in self.device_ids
+            ],
+            return_exceptions=True,
+        )
+        statuses = {}
+        for device_id, result in zip(self.device_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching Rinnai status for {device_id}: {result}")
+                result = {"device_id": device_id, "error": str(result), "is_online": False}
+            statuses[device_id] = result
+        return statuses
+
+    def _snapshot_state(self, device_id: str) -> _DeviceSnapshot:
+        return self._snapshots.setdefault(device_id, _DeviceSnapshot())
+
+    def _snapshot_age(self, device_id: str) -> Optional[float]:
+        state = self._snapshot_state(device_id)
+        if state.taken_at is None:
+            return None
+        return time.monotonic() - state.taken_at
+
+    def _with_snapshot_age(self, device_id: str, snapshot: dict) -> dict:
+        state = self._snapshot_state(device_id)
+        age = self._snapshot_age(device_id)
+        result = dict(snapshot)
+        result["snapshot_at"] = state.taken_time
+        result["snapshot_age_seconds"] = round(age, 1) if age is not None else None
+        result["refreshing"] = bool(state.refresh_task and not state.refresh_task.done())
+        return result
+
+    async def get_snapshot(self, max_age_seconds: Optional[float] = None, device_id: Optional[str] = None) -> dict:
+        device_id = device_id or self.device_id
+        state = self._snapshot_state(device_id)
+        age = self._snapshot_age(device_id)
+        if state.status is None or (max_age_seconds is not None and age > max_age_seconds):
+            return await self.refresh_snapshot(device_id)
+
+        if age >= SNAPSHOT_MIN_REFRESH_SECONDS:
+            self._start_refresh(device_id)
+        return self._with_snapshot_age(device_id, state.status)
+
+    async def refresh_snapshot(self, device_id: Optional[str] = None) -> dict:
+        """Run a maintenance retrieval, sharing one in-flight retrieval per device between callers."""
+        device_id = device_id or self.device_id
+        if not device_id:
+            return {"error": "Not connected", "is_online": False}
+        return dict(await asyncio.shield(self._start_refresh(device_id)))
+
+    async def refresh_all_snapshots(self) -> dict[str, dict]:
+        results = await asyncio.gather(
+            *[self.refresh_snapshot(device_id) for device_id in self.device_ids],
+            return_exceptions=True,
+        )
+        return {
+            device_id: result if isinstance(result, dict) else {"error": str(result), "is_online": False}
+            for device_id, result in zip(self.device_ids, results)
+        }
+
+    def _start_refresh(self, device_id: str) -> asyncio.Task:
+        state = self._snapshot_state(device_id)
+        if state.refresh_task is None or state.refresh_task.done():
+            state.refresh_task = create_background_task(self._refresh(device_id))
+        return state.refresh_task
+
+    async def _refresh(self, device_id: str) -> dict:
+        try:
+            result = await self.trigger_maintenance_retrieval(
+                wait_seconds=MAINTENANCE_WAIT_SECONDS,
+                include_status=True,
+                device_id=device_id,
+            )
+        except Exception as e:
+            logger.exception("Rinnai snapshot refresh failed")
+            return {"error": str(e), "is_online": False}
+
+        if result.get("status") == "error":
+            logger.warning(f"Rinnai snapshot refresh failed: {result.get('message')}")
+            return {"error": result.get("message", "Maintenance retrieval failed"), "is_online": False}
+
+        result.pop("maintenance_retrieval", None)
+        state = self._snapshot_state(device_id)
+        state.status = result
+        state.taken_at = time.monotonic()
+        state.taken_time = datetime.now().isoformat()
+        snapshot = self._with_snapshot_age(device_id, result)
+        snapshot["refreshing"] = False
+        return snapshot
+
+    async def trigger_maintenance_retrieval(
+        self,
+        wait_seconds: float = 5.0,
+        include_status: bool = True,
+        device_id: Optional[str] = None,
+    ) -> dict:
+        device_id = self._resolve_device_id(device_id)
+        if not device_id:
             return {"status": "error", "message": "Not connected", "is_online": False}
 
         async def retrieve():
-            device = await self._get_device()
+            device = await self._get_device(device_id)
             if not device:
                 return {"status": "error", "message": "Device not found", "is_online": False}
 
@@ -236,9 +475,10 @@ class RinnaiService:
                 return {"status": "error", "message": "Not connected", "is_online": False}
             assert api is not None
 
-            response = await api.device.do_maintenance_retrieval(device)
+            response = await self._cloud_call("device.do_maintenance_retrieval", api.device.do_maintenance_retrieval(device))
             success, error = self._response_status(response)
             if not success:
+                self.invalidate_device_cache()
                 return {
                     "status": "error",
                     "message": error or "Maintenance retrieval failed",
@@ -255,7 +495,7 @@ class RinnaiService:
                     "is_online": True,
                 }
 
-            status = await self._fetch_status()
+            status = await self._fetch_status(device_id)
             if "error" in status:
                 return {
                     "status": "error",
@@ -274,12 +514,13 @@ class RinnaiService:
             return {"status": "error", "message": "Not connected", "is_online": False}
         return result
 
-    async def start_circulation(self, duration: int = 5) -> dict:
-        if not self.api or not self.device_id:
+    async def start_circulation(self, duration: int = 5, device_id: Optional[str] = None) -> dict:
+        device_id = self._resolve_device_id(device_id)
+        if not self.api or not device_id:
             return {"status": "error", "message": "Not connected"}
 
         async def run() -> dict:
-            device = await self._get_device()
+            device = await self._get_device(device_id)
             if not device:
                 return {"status": "error", "message": "Device not found"}
 
@@ -287,14 +528,15 @@ class RinnaiService:
             if not api:
                 return {"status": "error", "message": "Not connected"}
 
-            response = await api.device.start_recirculation(device, duration)
+            response = await self._cloud_call("device.start_recirculation", api.device.start_recirculation(device, duration))
             success, error = self._response_status(response)
             if not success:
+                self.invalidate_device_cache()
                 return {"status": "error", "message": error or "Failed to start circulation"}
 
             return {
                 "status": "success",
-                "device": self.device_id,
+                "device": device_id,
                 "action": "circulation",
                 "duration_minutes": duration,
                 "timestamp": datetime.now().isoformat()
@@ -305,12 +547,13 @@ class RinnaiService:
             return {"status": "error", "message": "Failed to start circulation"}
         return result
 
-    async def get_schedules(self) -> list:
-        if not self.device_id:
+    async def get_schedules(self, device_id: Optional[str] = None) -> list:
+        device_id = self._resolve_device_id(device_id)
+        if not device_id:
             return []
 
         async def run() -> list:
-            info = await self._get_info()
+            info = await self._get_info(device_id)
             if not info:
                 return []
 
@@ -332,6 +575,9 @@ class RinnaiService:
         return result
 
     async def close(self):
+        if self._token_task and not self._token_task.done():
+            self._token_task.cancel()
+        self._token_task = None
         if self.api:
             await self.api.close()
             self.api = None
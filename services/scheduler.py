@@ -1,21 +1,41 @@
 import asyncio
 import logging
+import os
 from datetime import datetime
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-import pytz
 
 from services.hue_service import hue_service
 from services.wemo_service import wemo_service
 from services.rinnai_service import rinnai_service
-from models.database import save_device_state, init_db
+from services.meross_service import meross_service
+from models.database import init_db, rename_device_history, save_device_state
+from services.time_utils import PACIFIC_TZ
 
 logger = logging.getLogger(__name__)
 
-PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
+RINNAI_SNAPSHOT_REFRESH_MINUTES = float(os.getenv("RINNAI_SNAPSHOT_REFRESH_MINUTES", "10"))
+# Before multi-heater support the only heater's history was saved under this name.
+LEGACY_RINNAI_HISTORY_NAME = "main_house"
 
 scheduler = AsyncIOScheduler(timezone=PACIFIC_TZ)
+_rinnai_history_migrated = False
+
+
+def migrate_legacy_rinnai_history() -> None:
+    """Move main_house rows to the primary heater's id, once per process, as soon as it is known."""
+    global _rinnai_history_migrated
+    if _rinnai_history_migrated or not rinnai_service.device_id:
+        return
+    try:
+        moved = rename_device_history("rinnai", LEGACY_RINNAI_HISTORY_NAME, rinnai_service.device_id)
+    except Exception as e:
+        logger.warning(f"Failed to migrate Rinnai history from {LEGACY_RINNAI_HISTORY_NAME}: {e}")
+        return
+    _rinnai_history_migrated = True
+    if moved:
+        logger.info(f"Moved {moved} Rinnai history rows from {LEGACY_RINNAI_HISTORY_NAME} to {rinnai_service.device_id}")
 
 async def collect_device_states():
     logger.info("Collecting device states...")
@@ -35,12 +55,18 @@ async def collect_device_states():
                 "is_on": status.get("is_on")
             })
     
-    rinnai_status = await rinnai_service.get_status(trigger_maintenance=True)
-    if "error" not in rinnai_status:
+    rinnai_statuses = await rinnai_service.get_all_statuses(
+        trigger_maintenance=True,
+        max_age_seconds=RINNAI_SNAPSHOT_REFRESH_MINUTES * 60,
+    )
+    migrate_legacy_rinnai_history()
+    for device_id, rinnai_status in rinnai_statuses.items():
+        if "error" in rinnai_status:
+            continue
         inlet = rinnai_status.get("inlet_temp")
         outlet = rinnai_status.get("outlet_temp")
         if (inlet is not None and inlet != 0) or (outlet is not None and outlet != 0):
-            save_device_state("rinnai", "main_house", {
+            save_device_state("rinnai", device_id, {
                 "set_temperature": rinnai_status.get("set_temperature"),
                 "inlet_temp": inlet,
                 "outlet_temp": outlet,
@@ -48,8 +74,18 @@ async def collect_device_states():
                 "recirculation_enabled": rinnai_status.get("recirculation_enabled")
             })
     
+    if meross_service._connected:
+        try:
+            # Door transitions are written to history by the Meross service.
+            await meross_service.refresh_door_states()
+        except Exception as e:
+            logger.warning(f"Garage door state refresh failed: {e}")
+    
     logger.info("Device states collected")
 
+async def refresh_rinnai_snapshot():
+    await rinnai_service.refresh_all_snapshots()
+
 async def hue_morning_off():
     logger.info("Hue morning off: 08:20")
     hue_service.turn_off()
@@ -69,6 +105,15 @@ def init_scheduler():
         replace_existing=True
     )
     
+    scheduler.add_job(
+        refresh_rinnai_snapshot,
+        trigger='interval',
+        minutes=RINNAI_SNAPSHOT_REFRESH_MINUTES,
+        next_run_time=datetime.now(PACIFIC_TZ),
+        id='refresh_rinnai_snapshot',
+        replace_existing=True
+    )
+    
     scheduler.add_job(
         hue_morning_off,
         trigger=CronTrigger(hour=8, minute=20, timezone=PACIFIC_TZ),
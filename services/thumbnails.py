@@ -0,0 +1,97 @@
+import asyncio
+import io
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+RESIZE_WORKERS = int(os.getenv("CAMERA_RESIZE_WORKERS", "2"))
+VARIANT_CACHE_ENTRIES = int(os.getenv("CAMERA_VARIANT_CACHE_ENTRIES", "64"))
+
+
+def resize_jpeg(data: bytes, width: int, quality: int) -> bytes:
+    """Scale a JPEG down to `width` pixels wide and re-encode it.
+
+    draft() lets libjpeg decode at 1/2, 1/4 or 1/8 scale, so a multi-megapixel
+    frame is never fully decoded just to produce a small tile.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image.draft("RGB", (width, height))
+            image = image.convert("RGB").resize((width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        else:
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality)
+        return output.getvalue()
+
+
+class ThumbnailRenderer:
+    """Render resized snapshot variants on a worker pool and keep the recent ones.
+
+    Variants are keyed by the source snapshot's ETag, so a new camera frame
+    naturally invalidates every size rendered from the previous one.
+    """
+
+    def __init__(self, max_workers: int = RESIZE_WORKERS, max_entries: int = VARIANT_CACHE_ENTRIES):
+        self.max_workers = max(1, max_workers)
+        self.max_entries = max_entries
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._variants: OrderedDict[tuple, bytes] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.renders = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="thumbnail")
+        return self._executor
+
+    async def render(self, source_etag: str, data: bytes, width: int, quality: int) -> bytes:
+        key = (source_etag, width, quality)
+        variant = self._variants.get(key)
+        if variant is not None:
+            self._variants.move_to_end(key)
+            self.hits += 1
+            return variant
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.renders += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), resize_jpeg, data, width, quality)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.hits += 1
+        return await asyncio.shield(future)
+
+    def _finish(self, key: tuple, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._remember(key, future.result())
+
+    def _remember(self, key: tuple, variant: bytes) -> None:
+        self._variants[key] = variant
+        self._variants.move_to_end(key)
+        while len(self._variants) > self.max_entries:
+            self._variants.popitem(last=False)
+
+    def get_metrics(self) -> dict:
+        return {
+            "variants_cached": len(self._variants),
+            "variant_hits": self.hits,
+            "renders": self.renders,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
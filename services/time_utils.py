@@ -0,0 +1,30 @@
+"""Shared timezone and timestamp formatting helpers."""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+PACIFIC_TZ = ZoneInfo("America/Los_Angeles")
+UTC = timezone.utc
+
+PACIFIC_DISPLAY_FORMAT = "%Y-%m-%d %H:%M:%S %Z"
+
+
+def resolve_timezone(name: Optional[str]) -> ZoneInfo:
+    """Map config names such as 'Pacific' or 'UTC' to a timezone, defaulting to Pacific."""
+    if not name or name.lower() == "pacific":
+        return PACIFIC_TZ
+    if name.lower() == "utc":
+        return ZoneInfo("UTC")
+    try:
+        return ZoneInfo(name)
+    except (KeyError, ValueError):
+        return PACIFIC_TZ
+
+
+@lru_cache(maxsize=256)
+def format_unix_time(unix_time: int) -> tuple[str, str]:
+    """Return (UTC ISO 8601, Pacific display string) for a unix timestamp."""
+    dt = datetime.fromtimestamp(unix_time, tz=UTC)
+    return dt.isoformat(), dt.astimezone(PACIFIC_TZ).strftime(PACIFIC_DISPLAY_FORMAT)
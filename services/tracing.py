@@ -0,0 +1,261 @@
+"""Per-request span timing exposed as Server-Timing and a ring buffer of slow requests.
+
+A sampled request gets a Trace in a context variable. Device calls (via
+services.metrics.observe), SQLite writes, auth, the route handler and response
+serialization add spans to it; worker threads started with asyncio.to_thread
+or FastAPI's threadpool inherit the context. Unsampled requests only pay for
+two perf_counter calls and a context variable lookup per instrumented call.
+
+Tasks that can outlive the request are started with create_background_task so
+they do not keep adding spans to a finished trace.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import Coroutine, Iterable, Optional
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATE = float(os.getenv("SMART_HOME_TRACE_SAMPLE_RATE", "0.1"))
+SLOW_REQUEST_MS = float(os.getenv("SMART_HOME_SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_BUFFER = int(os.getenv("SMART_HOME_SLOW_REQUEST_BUFFER", "50"))
+
+# Any value forces tracing for one request, regardless of the sample rate.
+TRACE_HEADER = b"x-smart-home-trace"
+MAX_SPANS = 200
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+\-.^_`|~]+")
+_current: ContextVar[Optional["Trace"]] = ContextVar("smart_home_trace", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float
+
+
+@dataclass
+class Trace:
+    started: float = field(default_factory=time.perf_counter)
+    spans: list[Span] = field(default_factory=list)
+    handler_end: Optional[float] = None
+
+    def add(self, name: str, start: float, duration: float) -> None:
+        # list.append is atomic, so spans from worker threads need no lock.
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(Span(name, start, duration))
+
+    def server_timing(self, total: float) -> str:
+        totals: dict[str, list] = {}
+        for span in list(self.spans):
+            entry = totals.setdefault(_TOKEN_UNSAFE.sub("_", span.name), [0.0, 0])
+            entry[0] += span.duration
+            entry[1] += 1
+        parts = [f"total;dur={total * 1000:.1f}"]
+        for name, (duration, count) in totals.items():
+            desc = f';desc="{count} calls"' if count > 1 else ""
+            parts.append(f"{name};dur={duration * 1000:.1f}{desc}")
+        return ", ".join(parts)
+
+    def to_list(self) -> list[dict]:
+        return [
+            {
+                "name": span.name,
+                "start_ms": round((span.start - self.started) * 1000, 2),
+                "duration_ms": round(span.duration * 1000, 2),
+            }
+            for span in list(self.spans)
+        ]
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def record_span(name: str, start: float, duration: float) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, start, duration)
+
+
+@contextmanager
+def span(name: str):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter() - start)
+
+
+class _TraceGroup:
+    """Fans spans out to several traces, e.g. every request in a coalesced command batch."""
+
+    def __init__(self, traces: list[Trace]):
+        self.traces = traces
+
+    def add(self, name: str, start: float, duration: float) -> None:
+        for trace in self.traces:
+            trace.add(name, start, duration)
+
+
+@contextmanager
+def traced_by(traces: Iterable[Optional[Trace]]):
+    """Record spans of the enclosed code into each given trace instead of the current one."""
+    unique = list({id(trace): trace for trace in traces if trace is not None}.values())
+    target = None if not unique else unique[0] if len(unique) == 1 else _TraceGroup(unique)
+    token = _current.set(target)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def untraced_context() -> Context:
+    context = copy_context()
+    context.run(_current.set, None)
+    return context
+
+
+def create_background_task(coro: Coroutine) -> asyncio.Task:
+    """asyncio.create_task for work that may outlive the current request's trace."""
+    return asyncio.create_task(coro, context=untraced_context())
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that records the endpoint call as a "handler" span.
+
+    Everything between the end of the handler and the first response byte is
+    FastAPI's response_model validation and JSON rendering, which the
+    middleware reports as "serialize".
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+
+
+def _traced_endpoint(endpoint):
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def traced(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return await endpoint(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                trace.handler_end = time.perf_counter()
+                trace.add("handler", start, trace.handler_end - start)
+    else:
+        @functools.wraps(endpoint)
+        def traced(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return endpoint(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                trace.handler_end = time.perf_counter()
+                trace.add("handler", start, trace.handler_end - start)
+    return traced
+
+
+class SlowRequestLog:
+    """Most recent requests slower than the threshold, oldest dropped first."""
+
+    def __init__(self, threshold_ms: float = SLOW_REQUEST_MS, size: int = SLOW_REQUEST_BUFFER):
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=max(0, size))
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._entries.maxlen > 0
+
+    def record(self, scope, status_code: int, duration: float, trace: Optional[Trace]) -> None:
+        duration_ms = duration * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+        self.recorded += 1
+        self._entries.append({
+            "method": scope["method"],
+            "path": scope["path"],
+            "status_code": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "timestamp": time.time(),
+            "sampled": trace is not None,
+            "spans": trace.to_list() if trace is not None else [],
+        })
+
+    def get_entries(self) -> list[dict]:
+        return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TracingMiddleware:
+    """Time every HTTP request; sampled ones get spans and a Server-Timing header.
+
+    Timing stops at the start of the response, so long-lived streams are
+    measured by time to first byte.
+    """
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE, slow_log: Optional[SlowRequestLog] = None):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_log = slow_log or slow_request_log
+
+    def _sampled(self, scope) -> bool:
+        if self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return True
+        return any(name.lower() == TRACE_HEADER for name, _ in scope.get("headers", []))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        trace = Trace(started=started) if self._sampled(scope) else None
+        token = _current.set(trace)
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                if trace is not None:
+                    if trace.handler_end is not None:
+                        trace.add("serialize", trace.handler_end, now - trace.handler_end)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing(now - started).encode("latin-1")))
+                    message = {**message, "headers": headers}
+                try:
+                    self.slow_log.record(scope, message["status"], now - started, trace)
+                except Exception as e:
+                    logger.debug(f"Failed to record slow request: {e}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+
+
+slow_request_log = SlowRequestLog()
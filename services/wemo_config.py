@@ -0,0 +1,103 @@
+"""Parsed wemo_config.yaml, shared by WemoService and WemoScheduleManager."""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import yaml
+
+from services.time_utils import resolve_timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 49153
+ACTIONS = ("on", "off")
+
+
+@dataclass(frozen=True)
+class WemoDeviceConfig:
+    name: str
+    host: str
+    port: int = DEFAULT_PORT
+
+
+@dataclass(frozen=True)
+class WemoTaskConfig:
+    time: str
+    device: str
+    action: str
+    hour: int
+    minute: int
+    second: int
+
+
+@dataclass(frozen=True)
+class WemoConfig:
+    devices: tuple[WemoDeviceConfig, ...]
+    timezone: ZoneInfo
+    tasks: tuple[WemoTaskConfig, ...]
+
+
+def _parse_task(task: dict) -> Optional[WemoTaskConfig]:
+    time_str = str(task.get('time', ''))
+    device_name = task.get('device', '')
+    action = task.get('action', '')
+    # Unquoted on/off in YAML load as booleans.
+    if isinstance(action, bool):
+        action = 'on' if action else 'off'
+
+    if not all([time_str, device_name, action]):
+        logger.warning(f"Incomplete task config, skipping: {task}")
+        return None
+    if action not in ACTIONS:
+        logger.warning(f"Unknown action '{action}', skipping: {task}")
+        return None
+
+    try:
+        time_parts = [int(part) for part in time_str.split(':')]
+    except ValueError:
+        logger.warning(f"Invalid task time '{time_str}', skipping: {task}")
+        return None
+    hour = time_parts[0]
+    minute = time_parts[1] if len(time_parts) > 1 else 0
+    second = time_parts[2] if len(time_parts) > 2 else 0
+    return WemoTaskConfig(time_str, device_name, action, hour, minute, second)
+
+
+def parse_wemo_config(raw: Optional[dict]) -> WemoConfig:
+    """Validate a loaded YAML document, skipping invalid entries with a warning."""
+    raw = raw or {}
+
+    devices = []
+    for device_config in raw.get('devices') or []:
+        name = device_config.get('name', '')
+        host = device_config.get('host', '')
+        if not name or not host:
+            logger.warning(f"Wemo device config needs name and host, skipping: {device_config}")
+            continue
+        devices.append(WemoDeviceConfig(name, str(host), int(device_config.get('port') or DEFAULT_PORT)))
+
+    schedule_config = raw.get('schedule') or {}
+    tasks = [_parse_task(task) for task in schedule_config.get('tasks') or []]
+    return WemoConfig(
+        devices=tuple(devices),
+        timezone=resolve_timezone(schedule_config.get('timezone', 'Pacific')),
+        tasks=tuple(task for task in tasks if task),
+    )
+
+
+def load_wemo_config(config_file: str) -> Optional[WemoConfig]:
+    """Read and parse the config file. Returns None if it is missing or unreadable."""
+    config_path = Path(config_file)
+    if not config_path.exists():
+        logger.warning(f"Wemo config file not found: {config_file}")
+        return None
+
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return parse_wemo_config(yaml.safe_load(f))
+    except Exception as e:
+        logger.error(f"Error reading Wemo config {config_file}: {e}")
+        return None
@@ -0,0 +1,241 @@
+"""On-disk cache of Wemo device descriptors (setup.xml and service SCPDs).
+
+Building a pywemo device fetches setup.xml and one SCPD document per service
+before the first command can be sent. The documents rarely change, so they are
+kept per host:port and replayed on startup; the device object is built without
+touching the network and is revalidated against its serial number later.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+import pywemo
+import urllib3
+from pywemo import ouimeaux_device
+from pywemo.discovery import device_from_uuid_and_location
+from pywemo.exceptions import HTTPException
+from pywemo.ouimeaux_device.api.service import Session
+from pywemo.ouimeaux_device.api.xsd_types import DeviceDescription
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTOR_CACHE_FILE = Path(os.getenv("WEMO_DESCRIPTOR_CACHE_FILE", "data/wemo_descriptors.json"))
+if not DESCRIPTOR_CACHE_FILE.is_absolute():
+    DESCRIPTOR_CACHE_FILE = Path(__file__).parent.parent / DESCRIPTOR_CACHE_FILE
+
+SETUP_PATH = "/setup.xml"
+# Revalidation is a single background probe; rediscovery handles devices that stay down.
+REVALIDATE_RETRIES = 1
+REVALIDATE_TIMEOUT_SECONDS = 3.0
+
+# Documents being recorded or replayed by the current thread, keyed by URL path.
+_context = threading.local()
+
+# Device.__init__ creates its session through ouimeaux_device.Session. The
+# attribute points at DescriptorSession only while connect() builds a device;
+# the depth counts connect() calls running in parallel threads.
+_patch_lock = threading.Lock()
+_patch_depth = 0
+_unhooked_warned = False
+
+
+class DescriptorSession(Session):
+    """pywemo Session that records or replays descriptor GETs for the current thread.
+
+    Outside a record/replay block it behaves exactly like Session, so a device
+    built by another thread while the patch is active is unaffected.
+    """
+
+    def get(self, url: str, **kwargs) -> urllib3.HTTPResponse:
+        documents = getattr(_context, "documents", None)
+        if documents is None:
+            return super().get(url, **kwargs)
+
+        path = urlparse(url).path
+        _context.requests += 1
+        if _context.replay:
+            if path not in documents:
+                raise HTTPException(f"{url} not in descriptor cache")
+            # Device and Service construction only read .data.
+            return urllib3.HTTPResponse(body=documents[path].encode(), status=200, preload_content=True)
+
+        response = super().get(url, **kwargs)
+        documents[path] = response.data.decode()
+        return response
+
+
+@contextmanager
+def _descriptor_sessions():
+    global _patch_depth
+    with _patch_lock:
+        if _patch_depth == 0:
+            ouimeaux_device.Session = DescriptorSession
+        _patch_depth += 1
+    try:
+        yield
+    finally:
+        with _patch_lock:
+            _patch_depth -= 1
+            if _patch_depth == 0:
+                ouimeaux_device.Session = Session
+
+
+class _Documents:
+    def __init__(self, documents: dict, replay: bool):
+        self.documents = documents
+        self.replay = replay
+
+    def __enter__(self) -> "_Documents":
+        _context.documents = self.documents
+        _context.replay = self.replay
+        _context.requests = 0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.requests = _context.requests
+        _context.documents = None
+
+
+def _build(build, documents: dict, replay: bool) -> tuple[Optional[pywemo.WeMoDevice], int]:
+    """Build a device while recording or replaying its descriptors.
+
+    Returns (device, descriptor requests seen). The device gets a plain pywemo
+    Session afterwards, so nothing built here outlives connect().
+    """
+    with _descriptor_sessions(), _Documents(documents, replay) as context:
+        device = build()
+    if isinstance(getattr(device, "session", None), DescriptorSession):
+        device.session = Session(device.session.url)
+    return device, context.requests
+
+
+def _warn_unhooked() -> None:
+    # pywemo built the device without DescriptorSession, so it no longer creates
+    # sessions through ouimeaux_device.Session; the device works but is not cached.
+    global _unhooked_warned
+    if not _unhooked_warned:
+        _unhooked_warned = True
+        logger.warning("pywemo did not use the descriptor session; Wemo descriptor cache is inactive")
+
+
+class WemoDescriptorCache:
+    """Descriptor documents per host:port, persisted as one JSON file."""
+
+    def __init__(self, path: Path = DESCRIPTOR_CACHE_FILE):
+        self.path = Path(path)
+        self._entries: Optional[dict] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def _key(host: str, port: int) -> str:
+        return f"{host}:{port}"
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._entries = {}
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable Wemo descriptor cache {self.path}: {e}")
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def get_entry(self, host: str, port: int) -> Optional[dict]:
+        with self._lock:
+            return self._load().get(self._key(host, port))
+
+    def _store(self, host: str, port: int, entry: Optional[dict]) -> None:
+        with self._lock:
+            entries = self._load()
+            if entry is None:
+                entries.pop(self._key(host, port), None)
+            else:
+                entries[self._key(host, port)] = entry
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Failed to write Wemo descriptor cache {self.path}: {e}")
+
+    def connect(self, host: str, port: int) -> tuple[Optional[pywemo.WeMoDevice], bool]:
+        """Build a device, from cached descriptors when possible.
+
+        Returns (device, from_cache). Cached devices should be passed to
+        revalidate() once startup is done.
+        """
+        url = pywemo.setup_url_for_address(host, port)
+        entry = self.get_entry(host, port)
+        if entry:
+            device, requests = _build(
+                lambda: device_from_uuid_and_location(entry["udn"], url), entry["documents"], replay=True
+            )
+            if device is not None and requests:
+                self.hits += 1
+                return device, True
+            if device is not None:
+                _warn_unhooked()
+                return device, False
+            self._store(host, port, None)
+
+        self.misses += 1
+        documents: dict = {}
+        device, requests = _build(lambda: pywemo.device_from_description(url), documents, replay=False)
+        if device is not None and not requests:
+            _warn_unhooked()
+        if device is not None and SETUP_PATH in documents:
+            self._store(host, port, {
+                "udn": device.udn,
+                "serial": device.serial_number,
+                "documents": documents,
+                "cached_at": time.time(),
+            })
+        return device, False
+
+    def revalidate(self, host: str, port: int) -> bool:
+        """Fetch setup.xml and check the device at host:port is still the cached one.
+
+        Drops the entry and returns False when the serial number or UDN changed.
+        Unreachable devices keep their entry; command failures already trigger
+        rediscovery.
+        """
+        entry = self.get_entry(host, port)
+        if not entry:
+            return False
+        url = pywemo.setup_url_for_address(host, port)
+        try:
+            session = Session(url, retries=REVALIDATE_RETRIES, timeout=REVALIDATE_TIMEOUT_SECONDS)
+            description = DeviceDescription.dict_from_xml(session.get(url).data)
+        except Exception as e:
+            logger.info(f"Could not revalidate Wemo descriptors for {host}:{port}: {e}")
+            return True
+        if description["serial_number"] == entry["serial"] and description["udn"] == entry["udn"]:
+            return True
+
+        logger.info(f"Wemo device at {host}:{port} changed from {entry['serial']} to {description['serial_number']}")
+        self.invalidated += 1
+        self._store(host, port, None)
+        return False
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            entries = len(self._load())
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "invalidated": self.invalidated}
+
+
+wemo_descriptor_cache = WemoDescriptorCache()
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, Optional
+
+import pywemo
+
+from models.database import save_device_state
+from services.wemo_service import WemoService, wemo_service
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+SUBSCRIPTIONS_ENABLED = os.getenv("WEMO_SUBSCRIPTIONS_ENABLED", "true").strip().lower() in TRUE_VALUES
+EVENT_PORT = int(os.getenv("WEMO_EVENT_PORT", "0")) or None
+POLL_FALLBACK_SECONDS = float(os.getenv("WEMO_POLL_FALLBACK_SECONDS", "60"))
+SUBSCRIBER_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15.0
+
+
+class WemoEventHub:
+    """Keep Wemo state current from UPnP push events instead of polling.
+
+    Every registered device is subscribed through pywemo's SubscriptionRegistry.
+    Pushed state updates the device's cached state, is written to history and
+    fanned out to live clients. Devices whose subscription has lapsed are
+    polled every `poll_seconds` until it recovers.
+    """
+
+    def __init__(
+        self,
+        service: WemoService,
+        registry_factory: Callable[[], "pywemo.SubscriptionRegistry"] = lambda: pywemo.SubscriptionRegistry(EVENT_PORT),
+        poll_seconds: float = POLL_FALLBACK_SECONDS,
+    ):
+        self.service = service
+        self.registry_factory = registry_factory
+        self.poll_seconds = poll_seconds
+        self.registry = None
+        self._registered: dict[str, object] = {}
+        self._states: dict[str, dict] = {}
+        self._states_lock = threading.Lock()
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self.events_received = 0
+        self.polls = 0
+
+    def start(self) -> bool:
+        if self.registry is not None:
+            return True
+        self._loop = asyncio.get_running_loop()
+        try:
+            registry = self.registry_factory()
+            registry.start()
+        except Exception as e:
+            logger.warning(f"Wemo push subscriptions unavailable, falling back to polling: {e}")
+            registry = None
+        self.registry = registry
+        self.service.subscriptions = self
+        self.sync_devices()
+        if self.poll_seconds > 0:
+            self._poll_task = asyncio.create_task(self._poll_lapsed())
+        return registry is not None
+
+    def sync_devices(self) -> None:
+        """Subscribe new or replaced device objects and drop removed ones."""
+        if self.registry is None:
+            return
+        current = dict(self.service.devices)
+        for name, device in list(self._registered.items()):
+            if current.get(name) is not device:
+                self._unregister(name, device)
+        for name, device in current.items():
+            if name in self._registered:
+                continue
+            try:
+                self.registry.register(device)
+                self.registry.on(device, None, self._on_event)
+                self._registered[name] = device
+            except Exception as e:
+                logger.warning(f"Failed to subscribe to Wemo events from {name}: {e}")
+
+    def _unregister(self, name: str, device) -> None:
+        self._registered.pop(name, None)
+        try:
+            self.registry.unregister(device)
+        except Exception as e:
+            logger.debug(f"Failed to unsubscribe Wemo {name}: {e}")
+
+    def is_subscribed(self, device) -> bool:
+        if self.registry is None:
+            return False
+        try:
+            return bool(self.registry.is_subscribed(device))
+        except Exception:
+            return False
+
+    def _name_for(self, device) -> Optional[str]:
+        for name, registered in list(self._registered.items()):
+            if registered is device:
+                return name
+        return None
+
+    def _on_event(self, device, type_: str, value: str) -> None:
+        # Runs on pywemo's HTTP server thread.
+        name = self._name_for(device)
+        if name is None:
+            return
+        self.events_received += 1
+        processed = device.subscription_update(type_, value)
+        if type_ != getattr(device, "EVENT_TYPE_BINARY_STATE", "BinaryState"):
+            return
+        try:
+            if processed:
+                state = device.get_state(force_update=False)
+            else:
+                state = self.service.fetch_state(name, device)
+        except Exception as e:
+            logger.warning(f"Wemo {name} pushed {type_} but state read failed: {e}")
+            return
+        self.record_state(name, state, "push")
+
+    async def _poll_lapsed(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                self.sync_devices()
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Wemo fallback poll failed: {e}")
+
+    async def poll_once(self) -> int:
+        """Poll devices without a live subscription. Returns the number polled."""
+        lapsed = {
+            name: device for name, device in list(self.service.devices.items())
+            if not self.is_subscribed(device)
+        }
+
+        def read(name: str, device) -> None:
+            try:
+                self.record_state(name, self.service.fetch_state(name, device), "poll")
+            except Exception as e:
+                logger.debug(f"Wemo fallback poll failed for {name}: {e}")
+
+        await asyncio.gather(*(asyncio.to_thread(read, name, device) for name, device in lapsed.items()))
+        self.polls += len(lapsed)
+        return len(lapsed)
+
+    def record_state(self, name: str, state, source: str) -> None:
+        """Store a state change and publish it; a state equal to the last one recorded is dropped.
+
+        Pushes, fallback polls and scheduled tasks all record through here, so
+        one transition is written to history once. Safe to call from any thread.
+        """
+        is_on = bool(state)
+        with self._states_lock:
+            previous = self._states.get(name)
+            if previous is not None and previous["is_on"] == is_on:
+                return
+            event = {"name": name, "is_on": is_on, "source": source, "timestamp": time.time()}
+            self._states[name] = event
+        try:
+            save_device_state("wemo", name, {"is_on": is_on, "source": source})
+        except Exception as e:
+            logger.warning(f"Failed to record Wemo {name} state change: {e}")
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._publish, event)
+
+    def _publish(self, event: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled client misses intermediate states; the next one still arrives.
+                pass
+
+    async def events(self) -> AsyncIterator[bytes]:
+        """Server-sent events: current states first, then every change."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            for event in list(self._states.values()):
+                yield f"event: state\ndata: {json.dumps(event)}\n\n".encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield f"event: state\ndata: {json.dumps(event)}\n\n".encode()
+        finally:
+            self._subscribers.discard(queue)
+
+    def get_stats(self) -> dict:
+        devices = dict(self.service.devices)
+        return {
+            "enabled": self.registry is not None,
+            "subscribed": sorted(name for name, device in devices.items() if self.is_subscribed(device)),
+            "polling": sorted(name for name, device in devices.items() if not self.is_subscribed(device)),
+            "events_received": self.events_received,
+            "fallback_polls": self.polls,
+            "clients": len(self._subscribers),
+        }
+
+    async def stop(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            await asyncio.gather(self._poll_task, return_exceptions=True)
+            self._poll_task = None
+        if self.registry is not None:
+            for name, device in list(self._registered.items()):
+                self._unregister(name, device)
+            try:
+                await asyncio.to_thread(self.registry.stop)
+            except Exception as e:
+                logger.debug(f"Failed to stop Wemo subscription registry: {e}")
+            self.registry = None
+        self.service.subscriptions = None
+
+
+wemo_event_hub = WemoEventHub(wemo_service)
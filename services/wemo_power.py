@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from models.database import delete_power_samples_before, get_daily_energy, save_power_samples
+from services.time_utils import PACIFIC_TZ
+from services.tracing import create_background_task
+from services.wemo_service import WemoService, wemo_service
+
+logger = logging.getLogger(__name__)
+
+POWER_INTERVAL_SECONDS = float(os.getenv("WEMO_POWER_INTERVAL_SECONDS", "10"))
+POWER_FLUSH_SECONDS = float(os.getenv("WEMO_POWER_FLUSH_SECONDS", "60"))
+POWER_RETENTION_DAYS = float(os.getenv("WEMO_POWER_RETENTION_DAYS", "90"))
+POWER_READ_TIMEOUT_SECONDS = float(os.getenv("WEMO_POWER_READ_TIMEOUT_SECONDS", "5"))
+POWER_MAX_BACKOFF_SECONDS = float(os.getenv("WEMO_POWER_MAX_BACKOFF_SECONDS", "300"))
+ENERGY_PRICE_PER_KWH = float(os.getenv("WEMO_ENERGY_PRICE_PER_KWH", "0"))
+
+# Insight energy counters are in milliwatt-minutes.
+MW_MINUTES_PER_KWH = 60_000_000
+RETENTION_CHECK_SECONDS = 3600
+
+
+@dataclass
+class PowerReading:
+    device: str
+    ts: int
+    power_mw: int
+    today_mw_minutes: int
+    on_today_seconds: int
+    state: int
+
+    def to_row(self) -> tuple:
+        return (self.device, self.ts, self.power_mw, self.today_mw_minutes, self.on_today_seconds, self.state)
+
+    def to_dict(self) -> dict:
+        return {
+            "device": self.device,
+            "timestamp": datetime.fromtimestamp(self.ts, tz=PACIFIC_TZ).isoformat(),
+            "power_w": self.power_mw / 1000,
+            "today_kwh": round(self.today_mw_minutes / MW_MINUTES_PER_KWH, 4),
+            "on_today_seconds": self.on_today_seconds,
+            # 0 off, 1 on, 8 on with the load idle (below the power threshold)
+            "state": self.state,
+        }
+
+
+def is_insight(device) -> bool:
+    return callable(getattr(device, "update_insight_params", None))
+
+
+def read_insight(service: WemoService, name: str) -> PowerReading:
+    """Read one Insight device through WemoService, which serializes it with commands."""
+    result = service.read_insight(name)
+    if result.get("status") != "success":
+        raise RuntimeError(result.get("message", f"Insight read failed for {name}"))
+    params = result["params"]
+    return PowerReading(
+        device=name,
+        ts=int(time.time()),
+        power_mw=int(params["currentpower"]),
+        today_mw_minutes=int(params["todaymw"]),
+        on_today_seconds=int(params["ontoday"]),
+        state=int(params["state"]),
+    )
+
+
+class WemoPowerCollector:
+    """Poll Insight devices for power telemetry and write it to SQLite in batches.
+
+    Samples are buffered in memory and flushed every `flush_seconds` in one
+    transaction, so a 10 s poll interval costs one write per minute.
+
+    A read that fails or takes longer than `read_timeout` is skipped, and that
+    device is polled less often (doubling up to `max_backoff`) until it
+    answers again, so an unplugged Insight does not hold up the others.
+    """
+
+    def __init__(
+        self,
+        service: WemoService,
+        interval_seconds: float = POWER_INTERVAL_SECONDS,
+        flush_seconds: float = POWER_FLUSH_SECONDS,
+        retention_days: float = POWER_RETENTION_DAYS,
+        read_timeout: float = POWER_READ_TIMEOUT_SECONDS,
+        max_backoff: float = POWER_MAX_BACKOFF_SECONDS,
+    ):
+        self.service = service
+        self.interval_seconds = interval_seconds
+        self.flush_seconds = flush_seconds
+        self.retention_days = retention_days
+        self.read_timeout = read_timeout
+        self.max_backoff = max_backoff
+        self._buffer: list[tuple] = []
+        self._latest: dict[str, PowerReading] = {}
+        self._errors: dict[str, str] = {}
+        # name -> (consecutive failures, monotonic time of the next attempt)
+        self._backoff: dict[str, tuple[int, float]] = {}
+        # Reads that timed out keep running in their thread; the device is not
+        # polled again until they finish.
+        self._reads: dict[str, asyncio.Task] = {}
+        self._last_flush = time.monotonic()
+        self._last_retention = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def insight_devices(self) -> dict:
+        return {name: device for name, device in list(self.service.devices.items()) if is_insight(device)}
+
+    def _due(self, name: str, now: float) -> bool:
+        read = self._reads.get(name)
+        if read is not None and not read.done():
+            return False
+        return now >= self._backoff.get(name, (0, 0.0))[1]
+
+    async def _read(self, name: str) -> PowerReading:
+        read = self._reads[name] = create_background_task(asyncio.to_thread(read_insight, self.service, name))
+        try:
+            return await asyncio.wait_for(asyncio.shield(read), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Insight read timed out after {self.read_timeout:g}s") from None
+
+    def _record_failure(self, name: str) -> float:
+        failures = self._backoff.get(name, (0, 0.0))[0] + 1
+        delay = min(self.interval_seconds * 2 ** failures, self.max_backoff)
+        self._backoff[name] = (failures, time.monotonic() + delay)
+        return delay
+
+    async def collect_once(self) -> int:
+        now = time.monotonic()
+        names = [name for name in self.insight_devices() if self._due(name, now)]
+        results = await asyncio.gather(*(self._read(name) for name in names), return_exceptions=True)
+        collected = 0
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                delay = self._record_failure(name)
+                if self._errors.get(name) != str(result):
+                    logger.warning(f"Failed to read Insight power for {name}, retrying in {delay:g}s: {result}")
+                self._errors[name] = str(result)
+                continue
+            self._backoff.pop(name, None)
+            self._errors.pop(name, None)
+            self._latest[name] = result
+            self._buffer.append(result.to_row())
+            collected += 1
+        return collected
+
+    async def flush(self) -> int:
+        self._last_flush = time.monotonic()
+        batch, self._buffer = self._buffer, []
+        if batch:
+            try:
+                await asyncio.to_thread(save_power_samples, batch)
+            except Exception as e:
+                logger.error(f"Failed to save {len(batch)} Insight power samples: {e}")
+                return 0
+        if self.retention_days > 0 and time.monotonic() - self._last_retention >= RETENTION_CHECK_SECONDS:
+            self._last_retention = time.monotonic()
+            min_ts = int(time.time() - self.retention_days * 86400)
+            await asyncio.to_thread(delete_power_samples_before, min_ts)
+        return len(batch)
+
+    def start(self) -> None:
+        # Runs even with no Insight devices yet; a config reload may add some.
+        if self.interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Collecting Insight power every {self.interval_seconds:g}s")
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.collect_once()
+                if time.monotonic() - self._last_flush >= self.flush_seconds:
+                    await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Insight power collection failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval_seconds - (time.monotonic() - started)))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def get_latest(self) -> dict:
+        result = {name: reading.to_dict() for name, reading in self._latest.items()}
+        for name, error in self._errors.items():
+            result.setdefault(name, {"device": name})["error"] = error
+        return result
+
+
+def get_energy_by_day(days: int = 7, device_name: Optional[str] = None, price_per_kwh: float = ENERGY_PRICE_PER_KWH) -> list[dict]:
+    """Per device and Pacific-local day energy totals from stored samples."""
+    now = datetime.now(PACIFIC_TZ)
+    # The offset of "now" is applied to the whole window; a DST change inside it
+    # shifts at most one hour of samples into the neighbouring day.
+    utc_offset = int(now.utcoffset().total_seconds())
+    since_ts = int(now.timestamp()) - days * 86400
+    rows = get_daily_energy(since_ts, utc_offset, device_name)
+    result = []
+    for row in rows:
+        kwh = row["today_mw_minutes"] / MW_MINUTES_PER_KWH
+        result.append({
+            "device": row["device_name"],
+            "day": row["day"],
+            "kwh": round(kwh, 4),
+            "cost": round(kwh * price_per_kwh, 4) if price_per_kwh else None,
+            "avg_power_w": round(row["avg_power_mw"] / 1000, 2),
+            "max_power_w": round(row["max_power_mw"] / 1000, 2),
+            "on_hours": round(row["on_seconds"] / 3600, 2),
+            "samples": row["samples"],
+        })
+    return result
+
+
+wemo_power_collector = WemoPowerCollector(wemo_service)
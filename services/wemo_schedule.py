@@ -1,208 +1,191 @@
-"""Wemo scheduled task manager using APScheduler and YAML config."""
+"""Wemo scheduled tasks from YAML config, run on the app's AsyncIOScheduler."""
 
-import yaml
 import logging
-import pytz
 import os
+import time
+from dataclasses import dataclass
 from typing import Dict, List, Optional
-from pathlib import Path
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from services.action_executor import action_executor
+from services.wemo_config import WemoConfig, load_wemo_config
+from services.wemo_events import wemo_event_hub
+
 logger = logging.getLogger(__name__)
 
-# Pacific timezone
-PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
+JOB_PREFIX = "wemo_schedule:"
+
+
+@dataclass
+class TaskStats:
+    runs: int = 0
+    failures: int = 0
+    latency_seconds_total: float = 0.0
+    latency_seconds_max: float = 0.0
+    last_run: Optional[str] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+
+    def record(self, seconds: float, result: dict) -> None:
+        self.runs += 1
+        self.latency_seconds_total += seconds
+        self.latency_seconds_max = max(self.latency_seconds_max, seconds)
+        self.last_run = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        self.last_status = result.get("status")
+        if self.last_status == "success":
+            self.last_error = None
+        else:
+            self.failures += 1
+            self.last_error = result.get("message") or result.get("error")
+
+    def to_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "avg_latency_ms": round(self.latency_seconds_total / self.runs * 1000, 1) if self.runs else None,
+            "max_latency_ms": round(self.latency_seconds_max * 1000, 1) if self.runs else None,
+            "last_run": self.last_run,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+        }
+
 
 class WemoScheduleManager:
-    """Manage Wemo scheduled tasks with APScheduler."""
-    
-    def __init__(self, config_file: str = "config/wemo_config.yaml"):
+    """Manage Wemo scheduled tasks on the shared AsyncIOScheduler.
+
+    Tasks run through action_executor, the same path as API and delayed
+    actions: per-device command queue, shared worker threads and WemoService's
+    rediscovery on failure. State changes are recorded to device history
+    through the Wemo event hub, which also records pushed state.
+    """
+
+    def __init__(self, config_file: str = "config/wemo_config.yaml", scheduler: Optional[AsyncIOScheduler] = None):
         """
         Initialize the scheduled task manager.
-        
+
         Args:
             config_file: YAML config path relative to the project root.
+            scheduler: Scheduler to add jobs to; defaults to the app scheduler.
         """
         self.config_file = config_file
-        self.devices: Dict[str, any] = {}
-        self.scheduler: Optional[BackgroundScheduler] = None
-        self.config: Optional[Dict] = None
-        
-    def register_device(self, name: str, device):
-        """
-        Register one Wemo device.
-        
-        Args:
-            name: Device name used in config references.
-            device: pywemo device object.
-        """
-        self.devices[name.lower()] = device
-        logger.info(f"Registered device: {name}")
-    
-    def load_config(self) -> Optional[Dict]:
-        """
-        Load the YAML config file.
-        
-        Returns:
-            Config dict, or None if loading fails.
-        """
-        config_path = Path(self.config_file)
-        
-        if not config_path.exists():
-            logger.warning(f"Config file does not exist: {self.config_file}")
-            return None
-        
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            logger.info(f"Loaded config file: {self.config_file}")
-            return config
-        except Exception as e:
-            logger.error(f"Error reading config file: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
-    
-    def execute_task(self, device_name: str, action: str):
+        self._scheduler = scheduler
+        self.tasks: Dict[str, Dict] = {}
+        self.stats: Dict[str, TaskStats] = {}
+
+    @property
+    def scheduler(self) -> AsyncIOScheduler:
+        if self._scheduler is None:
+            from services.scheduler import scheduler
+
+            self._scheduler = scheduler
+        return self._scheduler
+
+    async def execute_task(self, task_id: str, device_name: str, action: str) -> dict:
         """
         Execute one scheduled task.
-        
+
         Args:
+            task_id: Scheduler job ID, used for stats.
             device_name: Device name.
             action: Action, either on or off.
         """
-        device_name_lower = device_name.lower()
-        
-        if device_name_lower not in self.devices:
-            logger.error(f"Device not registered: {device_name}")
-            return
-        
-        device = self.devices[device_name_lower]
-        
-        try:
-            if action == 'on':
-                device.on()
-                logger.info(f"Scheduled task executed: {device_name} on")
-            elif action == 'off':
-                device.off()
-                logger.info(f"Scheduled task executed: {device_name} off")
-        except Exception as e:
-            logger.error(f"Error executing task ({device_name} {action}): {str(e)}")
-            import traceback
-            traceback.print_exc()
-    
-    def start(self):
-        """Start the scheduled task manager."""
-        if self.scheduler and self.scheduler.running:
+        started = time.perf_counter()
+        result = await action_executor.execute(f"wemo.{action}", {"device": device_name})
+        elapsed = time.perf_counter() - started
+        self.stats.setdefault(task_id, TaskStats()).record(elapsed, result)
+
+        if result.get("status") == "success":
+            logger.info(f"Scheduled task executed: {device_name} {action} ({elapsed * 1000:.0f} ms)")
+            if result.get("is_on") is not None:
+                # The event hub drops the push event for the same transition.
+                wemo_event_hub.record_state(device_name.lower(), result["is_on"], "schedule")
+        else:
+            logger.error(f"Error executing task ({device_name} {action}): {result.get('message')}")
+        return result
+
+    def start(self, config: Optional[WemoConfig] = None):
+        """Add tasks from config to the scheduler, loading the config file if none is given."""
+        if self.tasks:
             logger.warning("Scheduled task manager is already running")
             return
-        
-        # Load config file.
-        self.config = self.load_config()
-        
-        if not self.config:
-            logger.info("No config file, skipping scheduled task initialization")
-            return
-        
-        schedule_config = self.config.get('schedule', {})
-        tasks = schedule_config.get('tasks', [])
-        
-        if not tasks:
-            logger.info("No scheduled tasks to run")
+
+        if config is None:
+            config = load_wemo_config(self.config_file)
+        if config is None or not config.tasks:
+            logger.info("No scheduled Wemo tasks to run")
             return
-        
-        # Resolve timezone.
-        timezone_str = schedule_config.get('timezone', 'Pacific')
-        if timezone_str.lower() == 'pacific':
-            timezone = PACIFIC_TZ
-        elif timezone_str.lower() == 'utc':
-            timezone = pytz.UTC
-        else:
-            timezone = pytz.timezone('America/Los_Angeles')
-        
-        # Create scheduler.
-        self.scheduler = BackgroundScheduler(timezone=timezone)
-        
-        # Add tasks.
-        for task in tasks:
+
+        self.apply_config(config)
+        logger.info(f"Scheduled {len(self.tasks)} Wemo tasks")
+
+    def apply_config(self, config: WemoConfig) -> dict:
+        """Reschedule only tasks that were added, removed or changed."""
+        desired = {}
+        for task in config.tasks:
+            task_id = f"{JOB_PREFIX}{task.device}_{task.action}_{task.time.replace(':', '')}"
+            desired[task_id] = (task, {
+                'time': task.time,
+                'device': task.device,
+                'action': task.action,
+                'timezone': str(config.timezone),
+            })
+
+        removed = [task_id for task_id in self.tasks if task_id not in desired]
+        for task_id in removed:
+            self._remove_job(task_id)
+            self.tasks.pop(task_id)
+            self.stats.pop(task_id, None)
+
+        added = []
+        for task_id, (task, record) in desired.items():
+            if self.tasks.get(task_id) == record:
+                continue
             try:
-                time_str = task.get('time', '')
-                device_name = task.get('device', '')
-                action = task.get('action', '')
-                
-                if not all([time_str, device_name, action]):
-                    logger.warning(f"Incomplete task config, skipping: {task}")
-                    continue
-                
-                # Parse time.
-                time_parts = time_str.split(':')
-                hour = int(time_parts[0])
-                minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-                second = int(time_parts[2]) if len(time_parts) > 2 else 0
-                
-                # Create task ID.
-                task_id = f"{device_name}_{action}_{time_str.replace(':', '')}"
-                
-                # Create CronTrigger.
-                trigger = CronTrigger(
-                    hour=hour,
-                    minute=minute,
-                    second=second,
-                    timezone=timezone
-                )
-                
-                # Add task.
                 self.scheduler.add_job(
-                    func=lambda d=device_name, a=action: self.execute_task(d, a),
-                    trigger=trigger,
+                    self.execute_task,
+                    trigger=CronTrigger(hour=task.hour, minute=task.minute, second=task.second, timezone=config.timezone),
+                    args=[task_id, task.device, task.action],
                     id=task_id,
-                    name=f"{device_name} {action} at {time_str}"
+                    name=f"{task.device} {task.action} at {task.time}",
+                    replace_existing=True,
                 )
-                
-                logger.info(f"Scheduled task: {time_str} {device_name} {action}")
-                
             except Exception as e:
-                logger.error(f"Error adding task: {str(e)}")
-                import traceback
-                traceback.print_exc()
-        
-        # Start scheduler.
-        self.scheduler.start()
-        logger.info("Scheduled task manager started")
-    
+                logger.error(f"Error adding task {task_id}: {str(e)}")
+                continue
+            self.tasks[task_id] = record
+            added.append(task_id)
+            logger.info(f"Scheduled task: {task.time} {task.device} {task.action}")
+
+        return {"added": added, "removed": removed}
+
+    def _remove_job(self, task_id: str):
+        try:
+            self.scheduler.remove_job(task_id)
+        except JobLookupError:
+            pass
+
     def stop(self):
-        """Stop the scheduled task manager."""
-        if self.scheduler and self.scheduler.running:
-            self.scheduler.shutdown()
-            logger.info("Scheduled task manager stopped")
-    
+        """Remove this manager's jobs from the scheduler."""
+        for task_id in list(self.tasks):
+            self._remove_job(task_id)
+        self.tasks.clear()
+        logger.info("Scheduled task manager stopped")
+
     def get_scheduled_tasks(self) -> List[Dict]:
-        """Return all scheduled task records."""
-        if not self.scheduler or not self.scheduler.running:
-            return []
-        
+        """Return all scheduled task records with run stats."""
         tasks = []
-        for job in self.scheduler.get_jobs():
-            # Extract task info from the job name.
-            name_parts = job.name.split()
-            if len(name_parts) >= 3:
-                device = name_parts[0]
-                action = name_parts[1]
-                time_str = ' '.join(name_parts[3:]) if len(name_parts) > 3 else ''
-                
-                tasks.append({
-                    'time': time_str,
-                    'device': device,
-                    'action': action,
-                    'timezone': str(self.scheduler.timezone) if self.scheduler.timezone else 'Pacific',
-                    'next_run': str(job.next_run_time) if job.next_run_time else 'N/A'
-                })
-            else:
-                tasks.append({
-                    'job_id': job.id,
-                    'name': job.name,
-                    'next_run': str(job.next_run_time) if job.next_run_time else 'N/A'
-                })
-        
+        for task_id, task in self.tasks.items():
+            job = self.scheduler.get_job(task_id)
+            next_run = getattr(job, 'next_run_time', None) if job else None
+            tasks.append({
+                'id': task_id,
+                **task,
+                'next_run': str(next_run) if next_run else 'N/A',
+                **self.stats.get(task_id, TaskStats()).to_dict(),
+            })
         return tasks
+
+
+wemo_schedule_manager = WemoScheduleManager(os.getenv("WEMO_CONFIG_FILE", "config/wemo_config.yaml"))
@@ -1,5 +1,8 @@
+import asyncio
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict, Optional
 from datetime import datetime
 
@@ -7,54 +10,159 @@ import pywemo
 import yaml
 from pathlib import Path
 
+from services.metrics import BACKEND_RECONNECTS, observe
+from services.wemo_config import WemoConfig, WemoDeviceConfig, load_wemo_config
+from services.wemo_descriptors import wemo_descriptor_cache
+
 logger = logging.getLogger(__name__)
 
+CONNECT_WORKERS = int(os.getenv("WEMO_CONNECT_WORKERS", "8"))
+
 class WemoService:
     def __init__(self):
         self.devices: Dict[str, pywemo.WeMoDevice] = {}
         self.config_file = os.getenv("WEMO_CONFIG_FILE", "config/wemo_config.yaml")
+        self._unvalidated: set[str] = set()
+        # Names in the last applied config (None until one is applied). Rediscovery
+        # and revalidation run in worker threads and must not re-add a device a
+        # reload just removed, so they store devices through _store_device.
+        self._configured: Optional[set[str]] = None
+        self._devices_lock = threading.Lock()
+        # Set by WemoEventHub; devices with a live push subscription are read from cache.
+        self.subscriptions = None
+        # One SOAP exchange per device at a time: queued commands, state and power reads.
+        self._device_locks: Dict[str, threading.RLock] = {}
+        self._device_locks_guard = threading.Lock()
     
-    def init_devices(self) -> bool:
-        config_path = Path(self.config_file)
-        
-        if not config_path.exists():
-            logger.warning(f"Wemo config file not found: {self.config_file}")
+    def init_devices(self, config: Optional[WemoConfig] = None) -> bool:
+        if config is None:
+            config = load_wemo_config(self.config_file)
+        if config is None:
             return False
 
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            
-            devices_config = config.get('devices', [])
-            logger.info(f"Loading {len(devices_config)} Wemo devices from config")
-            
-            for device_config in devices_config:
-                name = device_config.get('name', '')
-                host = device_config.get('host', '')
-                port = device_config.get('port', 49153)
-                
-                if not name or not host:
+        logger.info(f"Loading {len(config.devices)} Wemo devices from config")
+        self.apply_config(config)
+        return len(self.devices) > 0
+
+    def apply_config(self, config: WemoConfig) -> dict:
+        """Sync registered devices with the config.
+
+        Devices whose name and address are unchanged keep their existing
+        connection; only new or moved devices are set up, concurrently, and
+        devices no longer in the config are dropped.
+        """
+        configured, pending = self._plan_config(config)
+        return self._commit_config(configured, pending, self._connect_all(pending))
+
+    async def reload_config(self, config: WemoConfig) -> dict:
+        """apply_config for a running server.
+
+        Only the connections run in worker threads; self.devices is changed on
+        the loop, like the camera config reload.
+        """
+        configured, pending = self._plan_config(config)
+        connected = await asyncio.to_thread(self._connect_all, pending)
+        return self._commit_config(configured, pending, connected)
+
+    def _plan_config(self, config: WemoConfig) -> tuple[set[str], list[WemoDeviceConfig]]:
+        configured = {device.name.lower(): device for device in config.devices}
+        pending = [
+            device for name, device in configured.items()
+            if not self._matches(self.devices.get(name), device)
+        ]
+        return set(configured), pending
+
+    def _connect_all(self, pending: list[WemoDeviceConfig]) -> list[Optional[pywemo.WeMoDevice]]:
+        if not pending:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(pending), CONNECT_WORKERS)) as pool:
+            return list(pool.map(self._connect, pending))
+
+    def _commit_config(
+        self,
+        configured: set[str],
+        pending: list[WemoDeviceConfig],
+        connected: list[Optional[pywemo.WeMoDevice]],
+    ) -> dict:
+        added, failed = [], []
+        with self._devices_lock:
+            self._configured = configured
+            removed = [name for name in list(self.devices) if name not in configured]
+            for name in removed:
+                self.devices.pop(name, None)
+                self._unvalidated.discard(name)
+                logger.info(f"Removed Wemo device: {name}")
+            for device_config, device in zip(pending, connected):
+                if device is None:
+                    failed.append(device_config.name)
                     continue
-                
-                try:
-                    url = pywemo.setup_url_for_address(host, port)
-                    device = pywemo.device_from_description(url)
-                    self.devices[name.lower()] = device
-                    logger.info(f"Registered Wemo device: {name} ({host}:{port})")
-                except Exception as e:
-                    logger.warning(f"Failed to connect to {name}: {e}")
-            
-            return len(self.devices) > 0
+                self.devices[device_config.name.lower()] = device
+                added.append(device_config.name)
+        return {"added": added, "removed": removed, "failed": failed}
+
+    def _store_device(self, name: str, device: Optional[pywemo.WeMoDevice]) -> bool:
+        """Set or drop a device from a worker thread, unless a reload removed it from the config."""
+        with self._devices_lock:
+            if self._configured is not None and name not in self._configured:
+                return False
+            if device is None:
+                self.devices.pop(name, None)
+            else:
+                self.devices[name] = device
+            return True
+
+    @staticmethod
+    def _matches(device: Optional[pywemo.WeMoDevice], device_config: WemoDeviceConfig) -> bool:
+        return (
+            device is not None
+            and getattr(device, "host", None) == device_config.host
+            and getattr(device, "port", None) == device_config.port
+        )
+
+    def _connect(self, device_config: WemoDeviceConfig) -> Optional[pywemo.WeMoDevice]:
+        try:
+            device, from_cache = wemo_descriptor_cache.connect(device_config.host, device_config.port)
         except Exception as e:
-            logger.error(f"Error initializing Wemo devices: {e}")
-            return False
+            logger.warning(f"Failed to connect to {device_config.name}: {e}")
+            return None
+        if device is None:
+            logger.warning(f"Failed to connect to {device_config.name}: no Wemo device description")
+            return None
+        if from_cache:
+            self._unvalidated.add(device_config.name.lower())
+        source = "cached descriptors" if from_cache else "device"
+        logger.info(f"Registered Wemo device: {device_config.name} ({device_config.host}:{device_config.port}, {source})")
+        return device
+
+    def revalidate_cached_devices(self) -> int:
+        """Check devices built from cached descriptors against the live device.
+
+        A device whose serial changed is rebuilt from the network. Returns the
+        number of devices that were replaced.
+        """
+        replaced = 0
+        for name in list(self._unvalidated):
+            self._unvalidated.discard(name)
+            device = self.devices.get(name)
+            if device is None or wemo_descriptor_cache.revalidate(device.host, device.port):
+                continue
+            fresh, _ = wemo_descriptor_cache.connect(device.host, device.port)
+            if fresh is not None and getattr(fresh, "name", "").lower() == name:
+                self._store_device(name, fresh)
+            elif self._store_device(name, None):
+                # A different device now answers at this address; find ours by name.
+                self.refresh_device(name)
+            replaced += 1
+        return replaced
 
     def refresh_device(self, name: str) -> Optional[pywemo.WeMoDevice]:
         """Rediscover a Wemo device by name and update the local cache/config."""
         target_name = name.lower()
+        BACKEND_RECONNECTS.inc("wemo", "rediscovery")
 
         try:
-            devices = pywemo.discover_devices()
+            with observe("wemo", "discover"):
+                devices = pywemo.discover_devices()
         except Exception as e:
             logger.warning(f"Failed to discover Wemo devices while refreshing {name}: {e}")
             return None
@@ -64,7 +172,9 @@ class WemoService:
             if discovered_name != target_name:
                 continue
 
-            self.devices[target_name] = device
+            if not self._store_device(target_name, device):
+                logger.info(f"Ignoring rediscovered Wemo device {name}: no longer configured")
+                return None
             self._update_config_device(device)
             logger.info(
                 "Rediscovered Wemo device: %s (%s:%s)",
@@ -119,7 +229,8 @@ class WemoService:
                 return {"status": "error", "message": f"Device {name} not found"}
 
         try:
-            return operation(device)
+            with self._device_lock(name), observe("wemo", action):
+                return operation(device)
         except Exception as first_error:
             logger.warning(f"Wemo {action} failed for {name}, rediscovering: {first_error}")
 
@@ -128,17 +239,40 @@ class WemoService:
             return {"status": "error", "message": f"{action} failed for {name}; rediscovery did not find device"}
 
         try:
-            result = operation(refreshed_device)
+            with self._device_lock(name), observe("wemo", action):
+                result = operation(refreshed_device)
             result["rediscovered"] = True
             return result
         except Exception as second_error:
             return {"status": "error", "message": str(second_error)}
     
+    def _device_lock(self, name: str) -> threading.RLock:
+        key = name.lower()
+        with self._device_locks_guard:
+            lock = self._device_locks.get(key)
+            if lock is None:
+                lock = self._device_locks[key] = threading.RLock()
+            return lock
+
+    def fetch_state(self, name: str, device: pywemo.WeMoDevice) -> int:
+        """SOAP state read, serialized with commands and other reads of the same device."""
+        with self._device_lock(name), observe("wemo", "read_state"):
+            return device.get_state(force_update=True)
+
+    def _read_state(self, name: str, device: pywemo.WeMoDevice, fresh: bool = True) -> int:
+        pushed = self.subscriptions is not None and self.subscriptions.is_subscribed(device)
+        if pushed:
+            return device.get_state(force_update=False)
+        if not fresh:
+            # pywemo's last known state; it only goes to the device if it has none.
+            return device.get_state()
+        return self.fetch_state(name, device)
+
     def get_all_status(self) -> dict:
         result = {}
         for name, device in list(self.devices.items()):
             try:
-                state = device.get_state()
+                state = self._read_state(name, device, fresh=False)
                 result[name] = {
                     "name": name,
                     "is_on": state,
@@ -148,7 +282,7 @@ class WemoService:
                 refreshed_device = self.refresh_device(name)
                 if refreshed_device:
                     try:
-                        state = refreshed_device.get_state()
+                        state = self._read_state(name, refreshed_device, fresh=False)
                         result[name] = {
                             "name": name,
                             "is_on": state,
@@ -195,9 +329,37 @@ class WemoService:
 
         return self._run_with_refresh(name, "off", operation)
     
+    def get_state(self, name: str) -> dict:
+        def operation(device: pywemo.WeMoDevice) -> dict:
+            return {"status": "success", "device": name, "is_on": self._read_state(name, device)}
+
+        return self._run_with_refresh(name, "get_state", operation)
+
+    def read_insight(self, name: str) -> dict:
+        """Fetch fresh Insight power params (one SOAP call).
+
+        Telemetry never rediscovers: a failed read is returned as an error and
+        the next command to the device does the rediscovery.
+        """
+        device = self.get_device(name)
+        if not device:
+            return {"status": "error", "message": f"Device {name} not found"}
+        try:
+            with self._device_lock(name), observe("wemo", "read_insight"):
+                device.update_insight_params()
+                params = dict(device.insight_params)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        return {"status": "success", "device": name, "params": params}
+
+    def apply_target(self, name: str, target: dict) -> dict:
+        if target.get("on"):
+            return self.turn_on(name)
+        return self.turn_off(name)
+
     def toggle(self, name: str) -> dict:
         def operation(device: pywemo.WeMoDevice) -> dict:
-            current_state = device.get_state()
+            current_state = self._read_state(name, device)
             if current_state:
                 device.off()
             else:
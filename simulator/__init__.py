@@ -0,0 +1,21 @@
+"""Local device simulators for load testing without hardware or cloud accounts.
+
+Each simulator is a threaded HTTP server on 127.0.0.1 speaking the protocol the
+app's client library uses (phue, pywemo SOAP, Meross signed /config, aiorinnai
+GraphQL, Amcrest Digest-auth snapshots), with injectable latency, jitter and
+failure rate. SimulatedFleet starts them all and attaches the app's services.
+"""
+
+from simulator.base import FaultProfile
+from simulator.fleet import SimulatedFleet
+from simulator.load import Endpoint, default_endpoints, format_report, run_load, write_endpoints
+
+__all__ = [
+    "Endpoint",
+    "FaultProfile",
+    "SimulatedFleet",
+    "default_endpoints",
+    "format_report",
+    "run_load",
+    "write_endpoints",
+]
@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Latency and failures injected into every simulated device response."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+
+    def delay_seconds(self, rng: random.Random) -> float:
+        jitter = rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+
+class SimulatedServer(ThreadingHTTPServer):
+    """Threaded HTTP server on 127.0.0.1 with an ephemeral port, run in a daemon thread."""
+
+    daemon_threads = True
+    # Benchmarks open many concurrent connections; the default backlog of 5 drops some.
+    request_queue_size = 128
+    # serve_forever checks for shutdown this often; the default 0.5s makes a fleet slow to stop.
+    poll_interval = 0.05
+
+    def __init__(self, handler, profile: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.profile = profile or FaultProfile()
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "SimulatedServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(self.poll_interval,), name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def next_fault(self) -> tuple[float, bool]:
+        """Return (delay in seconds, fail) for the next request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.profile.delay_seconds(self._rng)
+            fail = self.profile.failure_rate > 0 and self._rng.random() < self.profile.failure_rate
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+
+class SimulatedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    server: SimulatedServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def respond(self, status: int, body: bytes, content_type: str = "application/json", headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inject_fault(self) -> bool:
+        """Sleep for the simulated latency; answer 500 and return True for a failed request."""
+        delay, fail = self.server.next_fault()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.respond(500, b"simulated failure", "text/plain")
+        return fail
@@ -0,0 +1,56 @@
+import hashlib
+import re
+from typing import Optional
+
+from simulator.base import FaultProfile, SimulatedHandler, SimulatedServer
+
+USER = "admin"
+PASSWORD = "simulator"
+REALM = "Login to camera"
+
+
+def _md5(value: str) -> str:
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+
+
+class DigestCameraHandler(SimulatedHandler):
+    server: "SimulatedCamera"
+
+    def _authorized(self) -> bool:
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        fields = dict(re.findall(r'(\w+)="?([^",]+)"?', header[len("Digest "):]))
+        if fields.get("nonce") != self.server.nonce:
+            return False
+        ha1 = _md5(f"{USER}:{REALM}:{PASSWORD}")
+        ha2 = _md5(f"GET:{fields.get('uri', '')}")
+        expected = _md5(f"{ha1}:{fields['nonce']}:{fields.get('nc')}:{fields.get('cnonce')}:{fields.get('qop')}:{ha2}")
+        return fields.get("response") == expected
+
+    def do_GET(self):
+        if not self._authorized():
+            self.server.challenges += 1
+            self.respond(401, b"Unauthorized", "text/plain", {
+                "WWW-Authenticate": f'Digest realm="{REALM}", qop="auth", nonce="{self.server.nonce}", opaque="x"',
+            })
+            return
+        if self.inject_fault():
+            return
+        if self.path.split("?")[0] != "/cgi-bin/snapshot.cgi":
+            self.respond(404, b"", "text/plain")
+            return
+        self.respond(200, self.server.image, "image/jpeg")
+
+
+class SimulatedCamera(SimulatedServer):
+    """Amcrest-style camera: Digest auth and /cgi-bin/snapshot.cgi."""
+
+    def __init__(self, name: str, image_bytes: int = 50_000, profile: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(DigestCameraHandler, profile, seed)
+        self.name = name
+        self.nonce = _md5(name)
+        self.challenges = 0
+        # JPEG markers around filler; not decodable, so resized snapshots fail as a bad image would.
+        filler = max(0, image_bytes - 4)
+        self.image = b"\xff\xd8" + (name.encode() * (filler // max(1, len(name)) + 1))[:filler] + b"\xff\xd9"
@@ -0,0 +1,174 @@
+import logging
+from typing import Optional
+
+import pywemo
+from phue import Bridge
+
+from simulator import camera, hue, meross
+from simulator.base import FaultProfile
+from simulator.camera import SimulatedCamera
+from simulator.hue import SimulatedHueBridge
+from simulator.meross import SimulatedGarageDevice, SimulatedMerossGarage
+from simulator.rinnai import SimulatedRinnaiAPI, SimulatedRinnaiCloud
+from simulator.wemo import SimulatedWemoSwitch
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class SimulatedFleet:
+    """Every device backend the app talks to, served from local threads.
+
+    attach() points the app's service singletons at the simulators, so the
+    FastAPI app can be driven without any hardware or cloud account;
+    detach() restores them.
+    """
+
+    def __init__(
+        self,
+        profile: Optional[FaultProfile] = None,
+        profiles: Optional[dict[str, FaultProfile]] = None,
+        wemo_count: int = 3,
+        camera_count: int = 2,
+        rinnai_count: int = 1,
+        door_count: int = 2,
+        seed: Optional[int] = None,
+    ):
+        """`profiles` overrides `profile` per backend: hue, wemo, meross, rinnai, camera."""
+        default = profile or FaultProfile()
+        profiles = profiles or {}
+
+        def profile_for(backend: str) -> FaultProfile:
+            return profiles.get(backend, default)
+
+        self.hue = SimulatedHueBridge(profile=profile_for("hue"), seed=seed)
+        self.wemo = [
+            SimulatedWemoSwitch(f"Switch {index}", f"SIM{index:010d}", profile=profile_for("wemo"), seed=seed)
+            for index in range(1, wemo_count + 1)
+        ]
+        self.meross = SimulatedMerossGarage(door_count, profile=profile_for("meross"), seed=seed)
+        self.rinnai = SimulatedRinnaiCloud(rinnai_count, profile=profile_for("rinnai"), seed=seed)
+        self.cameras = [
+            SimulatedCamera(f"cam{index}", profile=profile_for("camera"), seed=seed)
+            for index in range(1, camera_count + 1)
+        ]
+        self._saved: list[tuple[object, str, object]] = []
+        self._rinnai_api: Optional[SimulatedRinnaiAPI] = None
+        self._wemo_devices: dict[str, pywemo.WeMoDevice] = {}
+
+    @property
+    def servers(self) -> list:
+        return [self.hue, *self.wemo, self.meross, self.rinnai, *self.cameras]
+
+    def start(self) -> "SimulatedFleet":
+        for server in self.servers:
+            server.start()
+        return self
+
+    def stop(self) -> None:
+        for server in self.servers:
+            server.stop()
+
+    def __enter__(self) -> "SimulatedFleet":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _patch(self, target, name: str, value) -> None:
+        self._saved.append((target, name, target.__dict__.get(name, _MISSING)))
+        setattr(target, name, value)
+
+    def attach(self) -> None:
+        from services.camera_service import camera_service
+        from services.hue_service import hue_service
+        from services.meross_service import meross_service
+        from services.rinnai_service import rinnai_service
+        from services.wemo_service import wemo_service
+
+        light_name = next(iter(self.hue.lights.values()))["name"]
+        self._patch(hue_service, "bridge", Bridge(self.hue.address, username=hue.USERNAME))
+        self._patch(hue_service, "light_name", light_name)
+
+        self._wemo_devices = {
+            server.name.lower(): pywemo.device_from_description(pywemo.setup_url_for_address("127.0.0.1", server.port))
+            for server in self.wemo
+        }
+        self._patch(wemo_service, "devices", dict(self._wemo_devices))
+        self._patch(wemo_service, "subscriptions", None)
+        # Real rediscovery is an SSDP multicast; answer it from the fleet instead.
+        self._patch(wemo_service, "refresh_device", self._rediscover_wemo)
+
+        self._rinnai_api = SimulatedRinnaiAPI(self.rinnai)
+        device_ids = list(self.rinnai.devices)
+        self._patch(rinnai_service, "api", self._rinnai_api)
+        self._patch(rinnai_service, "device_ids", device_ids)
+        self._patch(rinnai_service, "device_id", device_ids[0] if device_ids else None)
+        self._patch(rinnai_service, "_devices", {})
+        self._patch(rinnai_service, "_snapshots", {})
+        self._patch(rinnai_service, "_connected", True)
+        # A failed call reconnects; never let that log in to the real cloud.
+        self._patch(rinnai_service, "connect", self._reconnect_rinnai)
+
+        self._patch(meross_service, "device", SimulatedGarageDevice(len(self.meross.doors)))
+        self._patch(meross_service, "_local_ip", self.meross.address)
+        self._patch(meross_service, "_key", meross.DEVICE_KEY)
+        self._patch(meross_service, "_connected", True)
+        self._patch(meross_service, "_http", None)
+        self._patch(meross_service, "_transport_key", None)
+        self._patch(meross_service, "_door_states", {})
+
+        self._patch(camera_service, "_client", None)
+        self._patch(camera_service, "user", camera.USER)
+        self._patch(camera_service, "password", camera.PASSWORD)
+        self._patch(camera_service, "_auths", {})
+        self._patch(camera_service, "cameras", [
+            {"name": server.name, "id": server.name, "ip": server.address} for server in self.cameras
+        ])
+        for name in ("_snapshots", "_inflight", "_metrics", "_host_limits", "_connection_stats"):
+            self._patch(camera_service, name, {})
+
+    async def detach(self) -> None:
+        from services.camera_service import camera_service
+        from services.meross_service import meross_service
+
+        # Clients were opened against the simulators; close them before restoring.
+        if camera_service._client is not None:
+            await camera_service._client.aclose()
+        if meross_service._http is not None:
+            await meross_service._http.aclose()
+        if self._rinnai_api is not None:
+            await self._rinnai_api.close()
+            self._rinnai_api = None
+
+        for target, name, value in reversed(self._saved):
+            if value is _MISSING:
+                target.__dict__.pop(name, None)
+            else:
+                setattr(target, name, value)
+        self._saved.clear()
+
+    def _rediscover_wemo(self, name: str) -> Optional[pywemo.WeMoDevice]:
+        from services.wemo_service import wemo_service
+
+        device = self._wemo_devices.get(name.lower())
+        if device is not None:
+            wemo_service.devices[name.lower()] = device
+        return device
+
+    async def _reconnect_rinnai(self) -> bool:
+        from services.rinnai_service import rinnai_service
+
+        rinnai_service.api = self._rinnai_api
+        rinnai_service._connected = self._rinnai_api is not None
+        return rinnai_service._connected
+
+    def get_stats(self) -> dict:
+        return {
+            type(server).__name__ + (f":{server.name}" if hasattr(server, "name") else ""): {
+                "requests": server.requests,
+                "failures": server.failures,
+            }
+            for server in self.servers
+        }
@@ -0,0 +1,69 @@
+import json
+import re
+import threading
+from typing import Optional
+
+from simulator.base import FaultProfile, SimulatedHandler, SimulatedServer
+
+USERNAME = "simulator"
+_LIGHTS_PATH = re.compile(r"^/api/(?P<user>[^/]+)/lights/?(?P<light_id>\d+)?(?P<state>/state)?/?$")
+
+
+class HueBridgeHandler(SimulatedHandler):
+    server: "SimulatedHueBridge"
+
+    def _route(self):
+        match = _LIGHTS_PATH.match(self.path)
+        if not match or match["user"] != USERNAME:
+            self.respond(200, json.dumps([{"error": {"type": 1, "description": "unauthorized user"}}]).encode())
+            return None
+        return match
+
+    def do_GET(self):
+        if self.inject_fault():
+            return
+        match = self._route()
+        if match is None:
+            return
+        with self.server.lock:
+            if match["light_id"] is None:
+                payload = {light_id: dict(light, state=dict(light["state"])) for light_id, light in self.server.lights.items()}
+            else:
+                light = self.server.lights.get(match["light_id"])
+                if light is None:
+                    payload = [{"error": {"type": 3, "description": "resource not available"}}]
+                else:
+                    payload = dict(light, state=dict(light["state"]))
+        self.respond(200, json.dumps(payload).encode())
+
+    def do_PUT(self):
+        body = self.read_body()
+        if self.inject_fault():
+            return
+        match = self._route()
+        if match is None:
+            return
+        changes = json.loads(body or b"{}")
+        with self.server.lock:
+            light = self.server.lights.get(match["light_id"] or "")
+            if light is None or not match["state"]:
+                payload = [{"error": {"type": 3, "description": "resource not available"}}]
+            else:
+                light["state"].update(changes)
+                payload = [
+                    {"success": {f"/lights/{match['light_id']}/state/{key}": value}}
+                    for key, value in changes.items()
+                ]
+        self.respond(200, json.dumps(payload).encode())
+
+
+class SimulatedHueBridge(SimulatedServer):
+    """Hue bridge REST API: light list, light state and state changes."""
+
+    def __init__(self, light_names: tuple[str, ...] = ("Baby room",), profile: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(HueBridgeHandler, profile, seed)
+        self.lock = threading.Lock()
+        self.lights = {
+            str(index): {"name": name, "type": "Extended color light", "state": {"on": False, "bri": 128, "reachable": True}}
+            for index, name in enumerate(light_names, start=1)
+        }
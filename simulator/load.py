@@ -0,0 +1,150 @@
+"""Drive the FastAPI app with concurrent in-process clients and report latency percentiles."""
+
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    path: str
+    method: str = "GET"
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Counter = field(default_factory=Counter)
+
+    def record(self, latency: float, status_code: Optional[int]) -> None:
+        self.latencies.append(latency)
+        if status_code is None or status_code >= 400:
+            self.errors += 1
+        self.status_codes[status_code if status_code is not None else "exception"] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+            "p50_ms": _ms(percentile(latencies, 50)),
+            "p95_ms": _ms(percentile(latencies, 95)),
+            "p99_ms": _ms(percentile(latencies, 99)),
+            "max_ms": _ms(latencies[-1] if latencies else None),
+            "status_codes": {str(code): count for code, count in sorted(self.status_codes.items(), key=str)},
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def default_endpoints(fleet) -> list[Endpoint]:
+    endpoints = [
+        Endpoint("status", "/api/status"),
+        Endpoint("hue.status", "/api/hue/status"),
+        Endpoint("wemo.status", "/api/wemo/status"),
+        Endpoint("rinnai.status", "/api/rinnai/status"),
+        Endpoint("garage.refresh", "/api/garage/status?refresh=true"),
+        Endpoint("history", "/api/history?hours=24"),
+    ]
+    if fleet.cameras:
+        endpoints.append(Endpoint("camera.snapshot", f"/api/cameras/snapshot/{fleet.cameras[0].name}"))
+    return endpoints
+
+
+def write_endpoints(fleet) -> list[Endpoint]:
+    endpoints = [Endpoint("hue.toggle", "/api/hue/toggle", "POST")]
+    if fleet.wemo:
+        endpoints.append(Endpoint("wemo.toggle", f"/api/wemo/{fleet.wemo[0].name.lower()}/toggle", "POST"))
+    return endpoints
+
+
+async def run_load(
+    app,
+    endpoints: list[Endpoint],
+    concurrency: int = 10,
+    duration_seconds: Optional[float] = 10.0,
+    total_requests: Optional[int] = None,
+    headers: Optional[dict] = None,
+) -> dict:
+    """Send requests round-robin over `endpoints` from `concurrency` clients.
+
+    Stops after `total_requests` if given, otherwise after `duration_seconds`.
+    The app is called in-process through httpx's ASGI transport, so results
+    include the app and device I/O but no HTTP server or loopback hop.
+    """
+    stats = {endpoint.name: EndpointStats() for endpoint in endpoints}
+    schedule = itertools.cycle(endpoints)
+    issued = 0
+    deadline = None
+
+    def next_endpoint() -> Optional[Endpoint]:
+        nonlocal issued
+        if total_requests is not None:
+            if issued >= total_requests:
+                return None
+        elif time.perf_counter() >= deadline:
+            return None
+        issued += 1
+        return next(schedule)
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while (endpoint := next_endpoint()) is not None:
+            started = time.perf_counter()
+            try:
+                response = await client.request(endpoint.method, endpoint.path)
+                status_code = response.status_code
+            except Exception:
+                status_code = None
+            stats[endpoint.name].record(time.perf_counter() - started, status_code)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60.0) as client:
+        started = time.perf_counter()
+        deadline = started + (duration_seconds or 0)
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        for latency in endpoint_stats.latencies:
+            total.latencies.append(latency)
+        total.errors += endpoint_stats.errors
+        total.status_codes.update(endpoint_stats.status_codes)
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": {name: endpoint_stats.summary(elapsed) for name, endpoint_stats in stats.items()},
+        "total": total.summary(elapsed),
+    }
+
+
+def format_report(result: dict) -> str:
+    columns = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    rows = [(name, summary) for name, summary in result["endpoints"].items()] + [("TOTAL", result["total"])]
+    width = max(len(name) for name, _ in rows)
+    lines = [f"{'endpoint':<{width}}  " + "  ".join(f"{column:>9}" for column in columns)]
+    for name, summary in rows:
+        cells = ["-" if summary[column] is None else str(summary[column]) for column in columns]
+        lines.append(f"{name:<{width}}  " + "  ".join(f"{cell:>9}" for cell in cells))
+    lines.append(f"{result['concurrency']} clients, {result['elapsed_seconds']}s")
+    return "\n".join(lines)
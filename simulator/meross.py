@@ -0,0 +1,69 @@
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from simulator.base import FaultProfile, SimulatedHandler, SimulatedServer
+
+DEVICE_KEY = "simulator-key"
+DEVICE_UUID = "simulator-garage"
+
+
+class MerossGarageHandler(SimulatedHandler):
+    server: "SimulatedMerossGarage"
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.inject_fault():
+            return
+        message = json.loads(body)
+        header = message["header"]
+        expected_sign = hashlib.md5(
+            f"{header['messageId']}{self.server.key}{header['timestamp']}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+
+        if header["sign"] != expected_sign:
+            payload = {"error": {"code": 5001, "detail": "sign error"}}
+        elif header["method"] == "SET":
+            state = message["payload"]["state"]
+            with self.server.lock:
+                self.server.doors[state["channel"]] = int(state["open"])
+            payload = {"state": {"channel": state["channel"], "open": int(state["open"]), "execute": 1}}
+        else:
+            requested = message["payload"]["state"]
+            with self.server.lock:
+                if isinstance(requested, list):
+                    payload = {"state": [
+                        {"channel": item["channel"], "open": self.server.doors.get(item["channel"], 0)}
+                        for item in requested
+                    ]}
+                else:
+                    payload = {"state": {"channel": requested["channel"], "open": self.server.doors.get(requested["channel"], 0)}}
+
+        self.respond(200, json.dumps({"header": header, "payload": payload}).encode())
+
+
+class SimulatedMerossGarage(SimulatedServer):
+    """Meross garage controller local /config endpoint with signed messages."""
+
+    def __init__(self, door_count: int = 2, profile: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(MerossGarageHandler, profile, seed)
+        self.key = DEVICE_KEY
+        self.uuid = DEVICE_UUID
+        self.lock = threading.Lock()
+        self.doors = {channel: 0 for channel in range(1, door_count + 1)}
+
+
+class SimulatedGarageDevice:
+    """Stand-in for the meross_iot device object MerossService reads channels from."""
+
+    uuid = DEVICE_UUID
+    name = "Simulated Garage"
+
+    def __init__(self, door_count: int):
+        # Channel 0 is the hub itself.
+        self.channels = [{} for _ in range(door_count + 1)]
+
+    def get_is_open(self, door_index: int):
+        return None
@@ -0,0 +1,128 @@
+import base64
+import json
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+from aiorinnai.device import Device
+from aiorinnai.user import User
+
+from simulator.base import FaultProfile, SimulatedHandler, SimulatedServer
+
+USER_EMAIL = "simulator@example.com"
+
+
+class RinnaiCloudHandler(SimulatedHandler):
+    server: "SimulatedRinnaiCloud"
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.inject_fault():
+            return
+        request = json.loads(body or b"{}")
+        query = request.get("query", "")
+        variables = request.get("variables", {})
+        if "getUserByEmail" in query:
+            payload = {"data": {"getUserByEmail": {"items": [{
+                "email": variables.get("email"),
+                "devices": {"items": [dict(device["descriptor"]) for device in self.server.devices.values()]},
+            }]}}}
+        elif "getDevice" in query:
+            payload = {"data": {"getDevice": self.server.device_payload(variables.get("id"))}}
+        else:
+            payload = {"errors": [{"message": "unsupported query"}]}
+        self.respond(200, json.dumps(payload).encode())
+
+    def do_PATCH(self):
+        body = self.read_body()
+        if self.inject_fault():
+            return
+        # /Prod/thing/<thing_name>/shadow
+        thing_name = self.path.rstrip("/").split("/")[-2]
+        settings = json.loads(body or b"{}")
+        with self.server.lock:
+            for device in self.server.devices.values():
+                if device["descriptor"]["thing_name"] == thing_name:
+                    device["shadow_updates"].append(settings)
+                    if "set_recirculation_enabled" in settings:
+                        device["shadow"]["recirculation_enabled"] = bool(settings["set_recirculation_enabled"])
+        self.respond(200, b"success", "text/plain")
+
+
+class SimulatedRinnaiCloud(SimulatedServer):
+    """Rinnai GraphQL (getUserByEmail, getDevice) and device shadow PATCH endpoints."""
+
+    def __init__(self, device_count: int = 1, profile: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(RinnaiCloudHandler, profile, seed)
+        self.lock = threading.Lock()
+        self.devices = {}
+        for index in range(1, device_count + 1):
+            device_id = f"sim-heater-{index}"
+            self.devices[device_id] = {
+                "descriptor": {"id": device_id, "thing_name": f"sim-thing-{index}", "device_name": f"Heater {index}"},
+                "shadow": {"set_domestic_temperature": "125", "operation_enabled": True, "recirculation_enabled": False},
+                "shadow_updates": [],
+            }
+
+    def device_payload(self, device_id: str) -> Optional[dict]:
+        device = self.devices.get(device_id)
+        if device is None:
+            return None
+        with self.lock:
+            shadow = dict(device["shadow"])
+        return {
+            "device_name": device["descriptor"]["device_name"],
+            "firmware": "233",
+            "shadow": shadow,
+            "info": {
+                "m08_inlet_temperature": "66",
+                "m02_outlet_temperature": "121",
+                "m01_water_flow_rate_raw": "0",
+                "unix_time": str(int(time.time())),
+            },
+        }
+
+
+def _fake_jwt(expires_at: float) -> str:
+    def encode(value: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none'})}.{encode({'exp': int(expires_at)})}.sig"
+
+
+class SimulatedRinnaiAPI:
+    """aiorinnai API stand-in: the library's own User and Device handlers, sent to the simulator.
+
+    Cognito login is skipped; every GraphQL and shadow request goes over HTTP
+    to SimulatedRinnaiCloud whatever host the library addresses.
+    """
+
+    def __init__(self, cloud: SimulatedRinnaiCloud, token_lifetime_seconds: float = 3600):
+        self.base_url = f"http://{cloud.address}"
+        self._client = httpx.AsyncClient(timeout=10.0)
+        self.access_token = _fake_jwt(time.time() + token_lifetime_seconds)
+        self.user = User(self._request, USER_EMAIL)
+        self.device = Device(self._request)
+        self.is_connected = True
+
+    async def _request(self, method: str, url: str, data=None, headers=None, **kwargs):
+        response = await self._client.request(method.upper(), self.base_url + urlparse(url).path, content=data, headers=headers)
+        if response.text == "success":
+            return "success"
+        response.raise_for_status()
+        return response.json()
+
+    async def async_login(self, email: str, password: str) -> None:
+        self.is_connected = True
+
+    async def async_check_token(self) -> None:
+        return None
+
+    async def async_renew_access_token(self, *args, **kwargs) -> None:
+        self.access_token = _fake_jwt(time.time() + 3600)
+
+    async def close(self) -> None:
+        self.is_connected = False
+        await self._client.aclose()
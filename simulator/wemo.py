@@ -0,0 +1,99 @@
+import re
+from typing import Optional
+
+from simulator.base import FaultProfile, SimulatedHandler, SimulatedServer
+
+SETUP_XML = """<?xml version="1.0"?>
+<root xmlns="urn:Belkin:device-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <device>
+    <deviceType>urn:Belkin:device:controllee:1</deviceType>
+    <friendlyName>{name}</friendlyName>
+    <manufacturer>Belkin International Inc.</manufacturer>
+    <manufacturerURL>http://www.belkin.com</manufacturerURL>
+    <modelDescription>Belkin Plugin Socket 1.0</modelDescription>
+    <modelName>Socket</modelName>
+    <modelNumber>1.0</modelNumber>
+    <modelURL>http://www.belkin.com/plugin/</modelURL>
+    <serialNumber>{serial}</serialNumber>
+    <UDN>uuid:Socket-1_0-{serial}</UDN>
+    <macAddress>AABBCCDDEEFF</macAddress>
+    <firmwareVersion>WeMo_WW_2.00.11532.PVT-OWRT-SNSV2</firmwareVersion>
+    <serviceList>
+      <service>
+        <serviceType>urn:Belkin:service:basicevent:1</serviceType>
+        <serviceId>urn:Belkin:serviceId:basicevent1</serviceId>
+        <controlURL>/upnp/control/basicevent1</controlURL>
+        <eventSubURL>/upnp/event/basicevent1</eventSubURL>
+        <SCPDURL>/eventservice.xml</SCPDURL>
+      </service>
+    </serviceList>
+  </device>
+</root>
+"""
+
+SCPD_XML = """<?xml version="1.0"?>
+<scpd xmlns="urn:Belkin:service-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <actionList>
+    <action><name>GetBinaryState</name><argumentList><argument>
+      <retval/><name>BinaryState</name><relatedStateVariable>BinaryState</relatedStateVariable><direction>out</direction>
+    </argument></argumentList></action>
+    <action><name>SetBinaryState</name><argumentList><argument>
+      <retval/><name>BinaryState</name><relatedStateVariable>BinaryState</relatedStateVariable><direction>in</direction>
+    </argument></argumentList></action>
+  </actionList>
+  <serviceStateTable>
+    <stateVariable sendEvents="yes"><name>BinaryState</name><dataType>Boolean</dataType><defaultValue>0</defaultValue></stateVariable>
+  </serviceStateTable>
+</scpd>
+"""
+
+SOAP_RESPONSE = """<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">
+<s:Body><u:{action}Response xmlns:u="urn:Belkin:service:basicevent:1"><BinaryState>{state}</BinaryState></u:{action}Response></s:Body>
+</s:Envelope>"""
+
+_BINARY_STATE = re.compile(rb"<BinaryState>(\d+)</BinaryState>")
+
+
+class WemoSwitchHandler(SimulatedHandler):
+    server: "SimulatedWemoSwitch"
+
+    def do_GET(self):
+        # Descriptor fetches are not delayed; only SOAP actions model device latency.
+        documents = {
+            "/setup.xml": SETUP_XML.format(name=self.server.name, serial=self.server.serial),
+            "/eventservice.xml": SCPD_XML,
+        }
+        body = documents.get(self.path)
+        if body is None:
+            self.respond(404, b"", "text/plain")
+            return
+        self.respond(200, body.encode(), "text/xml")
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.inject_fault():
+            return
+        if self.path != "/upnp/control/basicevent1":
+            self.respond(404, b"", "text/plain")
+            return
+        action = self.headers.get("SOAPACTION", "").strip('"').rpartition("#")[2]
+        if action == "SetBinaryState":
+            match = _BINARY_STATE.search(body)
+            if match:
+                self.server.state = 1 if int(match.group(1)) else 0
+        elif action != "GetBinaryState":
+            self.respond(500, b"", "text/xml")
+            return
+        self.respond(200, SOAP_RESPONSE.format(action=action, state=self.server.state).encode(), "text/xml")
+
+
+class SimulatedWemoSwitch(SimulatedServer):
+    """One Wemo switch: setup.xml, the basicevent SCPD and Get/SetBinaryState SOAP actions."""
+
+    def __init__(self, name: str, serial: str, profile: Optional[FaultProfile] = None, seed: Optional[int] = None):
+        super().__init__(WemoSwitchHandler, profile, seed)
+        self.name = name
+        self.serial = serial
+        self.state = 0
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    """Keep history writes made by services under test out of data/smart_home.db."""
+    from models import database
+
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "smart_home.db")
+    database.init_db()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_wemo_descriptors(tmp_path, monkeypatch):
+    """Keep Wemo descriptor cache reads and writes out of data/wemo_descriptors.json."""
+    from services.wemo_descriptors import wemo_descriptor_cache
+
+    monkeypatch.setattr(wemo_descriptor_cache, "path", tmp_path / "wemo_descriptors.json")
+    monkeypatch.setattr(wemo_descriptor_cache, "_entries", None)
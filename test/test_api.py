@@ -100,10 +100,12 @@ class TestControlAuth:
         assert response.status_code == 401
         mock_toggle.assert_not_called()
 
-    @patch('services.hue_service.hue_service.toggle')
-    def test_control_token_allows_mutation(self, mock_toggle, monkeypatch):
+    @patch('services.hue_service.hue_service.turn_off')
+    @patch('services.hue_service.hue_service.get_status')
+    def test_control_token_allows_mutation(self, mock_get_status, mock_turn_off, monkeypatch):
         monkeypatch.setenv("SMART_HOME_API_TOKEN", "test-token")
-        mock_toggle.return_value = {"status": "success"}
+        mock_get_status.return_value = {"name": "Baby room", "is_on": True, "brightness": 128}
+        mock_turn_off.return_value = {"status": "success"}
 
         response = client.post("/api/hue/toggle", headers={"X-Smart-Home-Token": "test-token"})
 
@@ -150,12 +152,15 @@ class TestWemoEndpoints:
         response = client.get("/api/wemo/status")
         assert response.status_code == 200
     
-    @patch('services.wemo_service.wemo_service.toggle')
-    def test_wemo_toggle(self, mock_toggle):
-        mock_toggle.return_value = {"status": "success", "device": "coffee"}
+    @patch('services.wemo_service.wemo_service.turn_on')
+    @patch('services.wemo_service.wemo_service.get_state')
+    def test_wemo_toggle(self, mock_get_state, mock_turn_on):
+        mock_get_state.return_value = {"status": "success", "device": "coffee", "is_on": 0}
+        mock_turn_on.return_value = {"status": "success", "device": "coffee"}
         
         response = client.post("/api/wemo/coffee/toggle")
         assert response.status_code == 200
+        mock_turn_on.assert_called_once_with("coffee")
 
 
 class TestRinnaiEndpoints:
@@ -186,6 +191,181 @@ class TestRinnaiEndpoints:
         response = client.post("/api/rinnai/circulate?duration=0")
         assert response.status_code == 422
 
+    @patch('api.rinnai.rinnai_service.get_status', new_callable=AsyncMock)
+    def test_get_rinnai_device_status(self, mock_get_status):
+        mock_get_status.return_value = {"device_id": "heater-2", "is_online": True}
+
+        with patch('api.rinnai.rinnai_service.device_ids', ["heater-1", "heater-2"]):
+            response = client.get("/api/rinnai/heater-2/status")
+
+        assert response.status_code == 200
+        assert response.json()["device_id"] == "heater-2"
+        mock_get_status.assert_called_once_with(trigger_maintenance=False, device_id="heater-2")
+
+    def test_get_rinnai_unknown_device_status(self):
+        with patch('api.rinnai.rinnai_service.device_ids', ["heater-1"]):
+            response = client.get("/api/rinnai/heater-9/status")
+
+        assert response.status_code == 404
+
+    @patch('api.rinnai.schedule_collection', new_callable=AsyncMock)
+    @patch('api.rinnai.rinnai_service.start_circulation', new_callable=AsyncMock)
+    def test_rinnai_device_circulate(self, mock_circulate, mock_collect):
+        mock_circulate.return_value = {"status": "success", "device": "heater-2"}
+
+        with patch('api.rinnai.rinnai_service.device_ids', ["heater-1", "heater-2"]):
+            response = client.post("/api/rinnai/heater-2/circulate?duration=3")
+
+        assert response.status_code == 200
+        mock_circulate.assert_called_once_with(3, device_id="heater-2")
+        mock_collect.assert_called_once_with("rinnai", "heater-2")
+
+    @patch('api.rinnai.rinnai_service.get_all_statuses', new_callable=AsyncMock)
+    def test_get_all_rinnai_devices(self, mock_all):
+        mock_all.return_value = {
+            "heater-1": {"device_id": "heater-1", "is_online": True},
+            "heater-2": {"device_id": "heater-2", "is_online": False, "error": "Not connected"},
+        }
+
+        response = client.get("/api/rinnai/devices")
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"heater-1", "heater-2"}
+
+
+class TestCameraEndpoints:
+
+    @staticmethod
+    def _snapshot(data=b"jpeg-bytes"):
+        from services.camera_service import CachedSnapshot
+
+        return CachedSnapshot(data=data, etag='"abc123"', fetched_at=0, last_modified=1771462025)
+
+    @patch('api.cameras.camera_service.get_cached_snapshot', new_callable=AsyncMock)
+    def test_snapshot_sets_validators(self, mock_snapshot):
+        mock_snapshot.return_value = (self._snapshot(), None)
+
+        response = client.get("/api/cameras/snapshot/front")
+
+        assert response.status_code == 200
+        assert response.content == b"jpeg-bytes"
+        assert response.headers["etag"] == '"abc123"'
+        assert response.headers["last-modified"] == "Thu, 19 Feb 2026 00:47:05 GMT"
+
+    @patch('api.cameras.camera_service.get_cached_snapshot', new_callable=AsyncMock)
+    def test_snapshot_revalidation_returns_304(self, mock_snapshot):
+        mock_snapshot.return_value = (self._snapshot(), None)
+
+        by_etag = client.get("/api/cameras/snapshot/front", headers={"If-None-Match": '"abc123"'})
+        by_date = client.get(
+            "/api/cameras/snapshot/front",
+            headers={"If-Modified-Since": "Thu, 19 Feb 2026 00:47:05 GMT"},
+        )
+        changed = client.get("/api/cameras/snapshot/front", headers={"If-None-Match": '"old"'})
+
+        assert by_etag.status_code == 304
+        assert by_etag.content == b""
+        assert by_date.status_code == 304
+        assert changed.status_code == 200
+
+    @patch('api.cameras.camera_service.get_resized_snapshot', new_callable=AsyncMock)
+    def test_snapshot_width_requests_resized_variant(self, mock_resized):
+        mock_resized.return_value = (self._snapshot(b"small"), None)
+
+        response = client.get("/api/cameras/snapshot/front?width=320&quality=70")
+
+        assert response.status_code == 200
+        assert response.content == b"small"
+        mock_resized.assert_called_once_with("front", 320, 70)
+
+    def test_snapshot_width_is_validated(self):
+        response = client.get("/api/cameras/snapshot/front?width=100000")
+
+        assert response.status_code == 422
+
+    @patch('api.cameras.camera_service.get_snapshots', new_callable=AsyncMock)
+    def test_batch_snapshots_returns_base64_and_errors(self, mock_snapshots):
+        mock_snapshots.return_value = {
+            "front": (self._snapshot(b"front-jpeg"), None),
+            "back": (None, "Timeout fetching snapshot from Back"),
+        }
+
+        response = client.get("/api/cameras/snapshots?ids=front,back&timeout=2")
+
+        assert response.status_code == 200
+        snapshots = {s["camera_id"]: s for s in response.json()["snapshots"]}
+        assert snapshots["front"]["data"] == "ZnJvbnQtanBlZw=="
+        assert snapshots["front"]["etag"] == '"abc123"'
+        assert snapshots["back"]["error"] == "Timeout fetching snapshot from Back"
+        mock_snapshots.assert_called_once_with(["front", "back"], timeout_seconds=2.0, width=None, quality=75)
+
+    @patch('api.cameras.camera_service.get_camera_by_id', return_value={"id": "front"})
+    def test_snapshot_history_returns_archived_frame(self, _mock_camera):
+        from services.camera_archive import ArchivedFrame
+
+        frame = ArchivedFrame(camera_id="front", timestamp=1771462025, data=b"archived")
+        with patch('api.cameras.camera_archive.find', return_value=frame) as mock_find:
+            response = client.get("/api/cameras/front/history?at=2026-02-19T00:50:00Z")
+
+        assert response.status_code == 200
+        assert response.content == b"archived"
+        assert response.headers["last-modified"] == "Thu, 19 Feb 2026 00:47:05 GMT"
+        mock_find.assert_called_once_with("front", 1771462200.0)
+
+    @patch('api.cameras.camera_service.get_camera_by_id', return_value={"id": "front"})
+    def test_snapshot_history_missing(self, _mock_camera):
+        with patch('api.cameras.camera_archive.find', return_value=None):
+            response = client.get("/api/cameras/front/history?at=2026-02-19T00:50:00Z")
+
+        assert response.status_code == 404
+
+    def test_snapshot_history_unknown_camera_does_not_touch_archive(self):
+        with patch('api.cameras.camera_archive.find') as mock_find:
+            response = client.get("/api/cameras/nope/history?at=2026-02-19T00:50:00Z")
+            traversal = client.get("/api/cameras/%2E%2E/history?at=2026-02-19T00:50:00Z")
+
+        assert response.status_code == 404
+        assert traversal.status_code == 404
+        mock_find.assert_not_called()
+
+    @patch('api.cameras.camera_service.get_cached_snapshot', new_callable=AsyncMock)
+    def test_snapshot_of_camera_named_history_is_not_archive_lookup(self, mock_snapshot):
+        mock_snapshot.return_value = (self._snapshot(b"live"), None)
+
+        response = client.get("/api/cameras/snapshot/history")
+
+        assert response.status_code == 200
+        assert response.content == b"live"
+        mock_snapshot.assert_called_once_with("history")
+
+    def test_stream_unknown_camera(self):
+        response = client.get("/api/cameras/stream/nope")
+
+        assert response.status_code == 404
+
+    @patch('api.cameras.camera_service.get_cached_snapshot', new_callable=AsyncMock)
+    def test_snapshot_not_found(self, mock_snapshot):
+        from services.camera_service import SnapshotError
+
+        mock_snapshot.return_value = (None, SnapshotError(SnapshotError.NOT_FOUND, "Camera not found: nope"))
+
+        response = client.get("/api/cameras/snapshot/nope")
+
+        assert response.status_code == 404
+
+    @patch('api.cameras.camera_service.get_cached_snapshot', new_callable=AsyncMock)
+    def test_snapshot_status_comes_from_error_kind_not_wording(self, mock_snapshot):
+        from services.camera_service import SnapshotError
+
+        mock_snapshot.return_value = (None, SnapshotError(SnapshotError.UPSTREAM, "Camera returned status 500 (Timeout not found)"))
+        upstream = client.get("/api/cameras/snapshot/front")
+        mock_snapshot.return_value = (None, SnapshotError(SnapshotError.TIMEOUT, "Camera took too long"))
+        timeout = client.get("/api/cameras/snapshot/front")
+
+        assert upstream.status_code == 502
+        assert upstream.json()["detail"] == "Camera returned status 500 (Timeout not found)"
+        assert timeout.status_code == 504
+
 
 class TestGarageEndpoints:
 
@@ -201,6 +381,37 @@ class TestGarageEndpoints:
         assert response.json()["status"] == "success"
         mock_toggle.assert_awaited_once_with(1)
 
+    @patch('api.garage.meross_service.get_door_count')
+    @patch('api.garage.meross_service.toggle_door', new_callable=AsyncMock)
+    def test_garage_toggle_retry_with_idempotency_key(self, mock_toggle, mock_door_count):
+        mock_door_count.return_value = 2
+        mock_toggle.return_value = {"status": "success", "door": 2}
+        headers = {"Idempotency-Key": "garage-retry-1"}
+
+        first = client.post("/api/garage/2/toggle", headers=headers)
+        second = client.post("/api/garage/2/toggle", headers=headers)
+
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        mock_toggle.assert_awaited_once_with(2)
+
+    @patch('api.garage.meross_service.get_door_states')
+    @patch('api.garage.meross_service.get_door_count')
+    def test_garage_status_includes_cached_door_states(self, mock_door_count, mock_door_states):
+        mock_door_count.return_value = 2
+        mock_door_states.return_value = [
+            {"door": 1, "open": False, "updated_at": "2026-06-25T08:00:00", "source": "push"},
+            {"door": 2, "open": None, "updated_at": None, "source": None},
+        ]
+
+        response = client.get("/api/garage/status")
+
+        assert response.status_code == 200
+        doors = response.json()["doors"]
+        assert doors[0]["open"] is False
+        assert doors[1]["open"] is None
+
 class TestStatusEndpoint:
 
     @patch('api.status.rinnai_service.get_status', new_callable=AsyncMock)
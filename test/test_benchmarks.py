@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from benchmarks.runner import (
+    BenchmarkCase,
+    BenchmarkResult,
+    check_cases,
+    compare,
+    format_comparisons,
+    load_baselines,
+    run_case,
+    save_baselines,
+)
+
+
+def _result(name: str, median_s: float) -> BenchmarkResult:
+    return BenchmarkResult(
+        name=name, rounds=5, min_s=median_s / 2, median_s=median_s, mean_s=median_s, stdev_s=0.0, spread_s=0.0
+    )
+
+
+def test_compare_flags_only_medians_beyond_threshold():
+    baselines = {"fast": {"median_s": 0.100, "spread_s": 0.0}, "slow": {"median_s": 0.100, "spread_s": 0.0}}
+    results = [_result("fast", 0.120), _result("slow", 0.130), _result("brand_new", 0.5)]
+
+    comparisons = {c.name: c for c in compare(results, baselines, threshold=0.25)}
+
+    assert comparisons["fast"].status == "ok"
+    assert comparisons["slow"].status == "REGRESSED"
+    assert comparisons["slow"].change == pytest.approx(0.30)
+    assert comparisons["slow"].limit_s == pytest.approx(0.125)
+    assert comparisons["brand_new"].status == "new"
+    assert "REGRESSED" in format_comparisons(list(comparisons.values()))
+
+
+def test_compare_widens_the_limit_for_noisy_baselines():
+    # Three spreads of 0.02s allow 0.06s, more than 25% of the median.
+    baselines = {"noisy": {"median_s": 0.100, "spread_s": 0.020}, "old_format": {"min_s": 0.100}}
+    results = [_result("noisy", 0.150), _result("old_format", 0.5)]
+
+    comparisons = {c.name: c for c in compare(results, baselines, threshold=0.25)}
+
+    assert comparisons["noisy"].limit_s == pytest.approx(0.160)
+    assert comparisons["noisy"].status == "ok"
+    assert compare([_result("noisy", 0.170)], baselines, threshold=0.25)[0].regressed
+    # Baselines recorded before medians were stored are treated as missing.
+    assert comparisons["old_format"].status == "new"
+
+
+def test_result_from_timings_measures_interquartile_spread():
+    result = BenchmarkResult.from_timings("case", [0.1, 0.2, 0.3, 0.4, 0.5])
+
+    assert result.median_s == pytest.approx(0.3)
+    assert result.min_s == pytest.approx(0.1)
+    assert result.spread_s == pytest.approx(0.3)
+    assert BenchmarkResult.from_timings("single", [0.1]).spread_s == 0.0
+
+
+def test_save_baselines_merges_with_existing_entries(tmp_path):
+    path = tmp_path / "baselines.json"
+    save_baselines([_result("a", 0.1), _result("b", 0.2)], path)
+    save_baselines([_result("b", 0.3)], path)
+
+    baselines = load_baselines(path)
+    assert baselines["a"]["median_s"] == 0.1
+    assert baselines["b"]["median_s"] == 0.3
+    assert "machine" in json.loads(path.read_text())
+    assert load_baselines(tmp_path / "missing.json") == {}
+
+
+@pytest.mark.asyncio
+async def test_run_case_times_rounds_after_warmup_and_tears_down():
+    calls = []
+
+    async def factory():
+        async def work():
+            calls.append("call")
+            await asyncio.sleep(0)
+
+        yield work
+        calls.append("teardown")
+
+    result = await run_case(BenchmarkCase("tiny", factory, rounds=3, warmup=2))
+
+    assert result.rounds == 3
+    assert calls == ["call"] * 5 + ["teardown"]
+    assert 0 <= result.min_s <= result.median_s
+
+
+def _sleep_case(name: str, delays: list[float]) -> BenchmarkCase:
+    async def factory():
+        async def work():
+            await asyncio.sleep(delays.pop(0) if delays else 0)
+
+        yield work
+
+    return BenchmarkCase(name, factory, rounds=1, warmup=0)
+
+
+@pytest.mark.asyncio
+async def test_check_cases_retries_cases_over_the_limit():
+    baselines = {"flaky": {"median_s": 0.01, "spread_s": 0.0}, "slow": {"median_s": 0.01, "spread_s": 0.0}}
+    # "flaky" is slow once and then back to normal; "slow" stays slow on every run.
+    flaky = _sleep_case("flaky", [0.05])
+    slow = _sleep_case("slow", [0.05, 0.05, 0.05])
+
+    results, comparisons = await check_cases([flaky, slow], baselines, threshold=0.25, retries=2)
+
+    status = {c.name: c.status for c in comparisons}
+    assert status == {"flaky": "ok", "slow": "REGRESSED"}
+    assert [r.name for r in results] == ["flaky", "slow"]
+
+
+@pytest.mark.skipif(
+    os.getenv("RUN_BENCHMARKS", "false").lower() != "true",
+    reason="Set RUN_BENCHMARKS=true to check benchmarks against the stored baselines.",
+)
+@pytest.mark.asyncio
+async def test_no_benchmark_regressed():
+    import benchmarks.cases  # noqa: F401
+    from benchmarks.runner import get_cases
+
+    threshold = float(os.getenv("SMART_HOME_BENCH_THRESHOLD", "0.25"))
+    _, comparisons = await check_cases(get_cases(), load_baselines(), threshold)
+
+    assert not [c for c in comparisons if c.regressed], format_comparisons(comparisons)
@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from services.camera_archive import INDEX_RECORD, CameraArchive, CameraArchiveRecorder
+from services.camera_service import CachedSnapshot
+
+
+def _ts(day, hour=0, minute=0, second=0):
+    return datetime(2026, 3, day, hour, minute, second, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return CameraArchive(root=tmp_path / "archive", max_bytes=10 * 1024 * 1024)
+
+
+class TestCameraArchive:
+
+    def test_finds_latest_frame_at_or_before_time(self, archive):
+        for minute in range(0, 60, 10):
+            archive.append("front", f"frame-{minute}".encode(), _ts(1, 12, minute))
+
+        assert archive.find("front", _ts(1, 12, 25)).data == b"frame-20"
+        assert archive.find("front", _ts(1, 12, 30)).data == b"frame-30"
+        assert archive.find("front", _ts(1, 11, 59)) is None
+        assert archive.find("back", _ts(1, 12, 30)) is None
+
+    def test_lookup_falls_back_to_previous_partition(self, archive):
+        archive.append("front", b"late-day-1", _ts(1, 23, 59))
+        archive.append("front", b"day-3", _ts(3, 8))
+
+        assert archive.find("front", _ts(2, 12)).data == b"late-day-1"
+        assert archive.find("front", _ts(3, 7)).data == b"late-day-1"
+        assert archive.find("front", _ts(4)).data == b"day-3"
+
+    def test_layout_is_date_partitioned_and_append_only(self, archive):
+        archive.append("front", b"a" * 10, _ts(1, 1))
+        archive.append("front", b"b" * 20, _ts(1, 2))
+        archive.append("front", b"c" * 30, _ts(2, 1))
+
+        camera_dir = archive.root / "front"
+        assert sorted(p.name for p in camera_dir.iterdir()) == [
+            "2026-03-01.idx",
+            "2026-03-01.jpg.bin",
+            "2026-03-02.idx",
+            "2026-03-02.jpg.bin",
+        ]
+        assert (camera_dir / "2026-03-01.jpg.bin").read_bytes() == b"a" * 10 + b"b" * 20
+        assert (camera_dir / "2026-03-01.idx").stat().st_size == 2 * INDEX_RECORD.size
+
+    def test_lookup_reads_only_log_n_index_records(self, archive, monkeypatch):
+        import services.camera_archive as archive_module
+
+        for second in range(1024):
+            archive.append("front", b"x", _ts(1, 0, 0) + second)
+        reads = []
+        real_pread = archive_module.os.pread
+
+        def counting_pread(fd, size, offset):
+            reads.append(offset)
+            return real_pread(fd, size, offset)
+
+        monkeypatch.setattr(archive_module.os, "pread", counting_pread)
+        frame = archive.find("front", _ts(1, 0, 0) + 500.5)
+
+        assert frame.timestamp == _ts(1, 0, 0) + 500
+        assert len(reads) <= 12
+
+    def test_quota_evicts_oldest_partitions_first(self, tmp_path):
+        archive = CameraArchive(root=tmp_path / "archive", max_bytes=2500)
+        archive.append("front", b"x" * 1000, _ts(1))
+        archive.append("back", b"y" * 1000, _ts(2))
+        archive.append("front", b"z" * 1000, _ts(3))
+
+        assert archive.find("front", _ts(1, 12)) is None
+        assert archive.find("back", _ts(2, 12)).data == b"y" * 1000
+        assert archive.find("front", _ts(3, 12)).data == b"z" * 1000
+        assert archive.total_bytes() <= 2500
+
+    def test_timestamps_never_go_backwards(self, archive):
+        archive.append("front", b"first", _ts(1, 12))
+        archive.append("front", b"clock-skew", _ts(1, 11))
+
+        assert archive.find("front", _ts(1, 12)).data == b"clock-skew"
+
+
+class FakeCameraService:
+    def __init__(self):
+        self.cameras = [{"id": "front", "name": "Front"}, {"id": "off", "name": "Off", "archive_interval_seconds": 0}]
+        self.calls = 0
+
+    async def get_cached_snapshot(self, camera_id, max_age_seconds=None):
+        self.calls += 1
+        # Two consecutive reads return the same frame; only one should be archived.
+        frame = (self.calls + 1) // 2
+        data = f"frame-{frame}".encode()
+        return CachedSnapshot(data=data, etag=f'"{frame}"', fetched_at=0, last_modified=_ts(1) + self.calls), None
+
+
+@pytest.mark.asyncio
+async def test_recorder_archives_changed_frames(archive):
+    camera = FakeCameraService()
+    recorder = CameraArchiveRecorder(camera, archive, interval_seconds=0.01)
+
+    recorder.start()
+    await asyncio.sleep(0.1)
+    await recorder.stop()
+
+    stats = archive.get_stats()["cameras"]
+    assert list(stats) == ["front"]
+    assert 0 < stats["front"]["frames"] <= (camera.calls + 1) // 2
+
+
+@pytest.mark.asyncio
+async def test_recorder_follows_interval_changes_on_reload(archive):
+    camera = FakeCameraService()
+    recorder = CameraArchiveRecorder(camera, archive, interval_seconds=60)
+
+    recorder.start()
+    front = recorder._tasks["front"]
+    assert list(recorder._tasks) == ["front"]
+
+    recorder.start()
+    assert recorder._tasks["front"] is front
+
+    camera.cameras = [{"id": "front", "archive_interval_seconds": 30}, {"id": "off", "archive_interval_seconds": 5}]
+    recorder.start()
+    await asyncio.sleep(0)
+    assert front.cancelled()
+    assert recorder._intervals == {"front": 30.0, "off": 5.0}
+
+    camera.cameras = [{"id": "front", "archive_interval_seconds": 0}]
+    recorder.start()
+    assert recorder._tasks == {}
+    await recorder.stop()
+
+
+def test_find_treats_evicted_partition_as_missing(archive, monkeypatch):
+    archive.append("front", b"old", _ts(1, 10))
+    archive.append("front", b"new", _ts(2, 10))
+    data_path, _ = archive._paths("front", "2026-03-02")
+    real_find = archive._find_in_partition
+
+    def evicted_during_read(camera_id, partition, at):
+        if partition == "2026-03-02":
+            # The quota deletes the data file between the index read and the data read.
+            data_path.unlink()
+        return real_find(camera_id, partition, at)
+
+    monkeypatch.setattr(archive, "_find_in_partition", evicted_during_read)
+
+    assert archive.find("front", _ts(2, 12)).data == b"old"
@@ -1,6 +1,9 @@
+import asyncio
+import time
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from services.camera_service import CameraService
+from services.camera_service import CameraService, SnapshotError
 
 
 @pytest.fixture
@@ -51,6 +54,7 @@ class TestCameraService:
         image_data, error = await camera_service.get_snapshot("nonexistent")
         assert image_data is None
         assert "not found" in error
+        assert error.kind == SnapshotError.NOT_FOUND
 
     @pytest.mark.asyncio
     async def test_get_snapshot_timeout(self, camera_service):
@@ -64,6 +68,7 @@ class TestCameraService:
             image_data, error = await camera_service.get_snapshot("test_cam")
             assert image_data is None
             assert "Timeout" in error
+            assert error.kind == SnapshotError.TIMEOUT
 
     @pytest.mark.asyncio
     async def test_close_client(self, camera_service):
@@ -73,3 +78,228 @@ class TestCameraService:
         await camera_service.close()
         assert camera_service._client is None
         mock_client.aclose.assert_called_once()
+
+
+class TestSnapshotCache:
+
+    @staticmethod
+    def _slow_fetch(camera_service, delay=0.05):
+        calls = []
+
+        async def fake_fetch(camera):
+            calls.append(camera["id"])
+            await asyncio.sleep(delay)
+            return f"jpeg-{len(calls)}".encode(), None
+
+        camera_service._fetch_snapshot = fake_fetch
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_concurrent_viewers_share_one_fetch(self, camera_service):
+        calls = self._slow_fetch(camera_service)
+
+        results = await asyncio.gather(*[camera_service.get_snapshot("test_cam") for _ in range(8)])
+
+        assert calls == ["test_cam"]
+        assert all(result == (b"jpeg-1", None) for result in results)
+        metrics = camera_service.get_snapshot_metrics()["cameras"]["test_cam"]
+        assert metrics["misses"] == 1
+        assert metrics["coalesced"] == 7
+        assert metrics["fetches"] == 1
+
+    @pytest.mark.asyncio
+    async def test_fresh_snapshot_is_served_from_cache(self, camera_service):
+        calls = self._slow_fetch(camera_service, delay=0)
+
+        first, _ = await camera_service.get_cached_snapshot("test_cam")
+        second, _ = await camera_service.get_cached_snapshot("test_cam")
+
+        assert len(calls) == 1
+        assert second is first
+        assert camera_service.get_snapshot_metrics()["totals"]["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_expired_snapshot_is_refetched(self, camera_service):
+        calls = self._slow_fetch(camera_service, delay=0)
+
+        first, _ = await camera_service.get_cached_snapshot("test_cam")
+        second, _ = await camera_service.get_cached_snapshot("test_cam", max_age_seconds=0)
+
+        assert len(calls) == 2
+        assert first.etag != second.etag
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self, camera_service):
+        results = iter([(None, "Camera returned status 500"), (b"jpeg", None)])
+
+        async def flaky_fetch(camera):
+            return next(results)
+
+        camera_service._fetch_snapshot = flaky_fetch
+
+        assert await camera_service.get_snapshot("test_cam") == (None, "Camera returned status 500")
+        assert await camera_service.get_snapshot("test_cam") == (b"jpeg", None)
+        assert camera_service.get_snapshot_metrics()["totals"]["fetch_errors"] == 1
+
+
+class TestBatchSnapshots:
+
+    @pytest.fixture
+    def grid_service(self):
+        service = CameraService()
+        service.cameras = [
+            {"name": f"Camera {i}", "id": f"cam{i}", "ip": f"192.168.1.{100 + i}"}
+            for i in range(6)
+        ]
+        return service
+
+    @pytest.mark.asyncio
+    async def test_fetches_all_cameras_with_bounded_concurrency(self, grid_service):
+        active = 0
+        peak = 0
+
+        async def fake_fetch(camera):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return camera["id"].encode(), None
+
+        grid_service._fetch_snapshot = fake_fetch
+        results = await grid_service.get_snapshots(concurrency=3)
+
+        assert list(results) == [f"cam{i}" for i in range(6)]
+        assert all(snapshot.data == camera_id.encode() for camera_id, (snapshot, _) in results.items())
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_slow_camera_times_out_without_blocking_others(self, grid_service):
+        async def fake_fetch(camera):
+            if camera["id"] == "cam1":
+                await asyncio.sleep(1)
+            return b"jpeg", None
+
+        grid_service._fetch_snapshot = fake_fetch
+        started = time.perf_counter()
+        results = await grid_service.get_snapshots(["cam0", "cam1", "missing"], timeout_seconds=0.05)
+        elapsed = time.perf_counter() - started
+
+        assert results["cam0"][0].data == b"jpeg"
+        assert results["cam1"] == (None, "Timeout fetching snapshot from Camera 1")
+        assert results["cam1"][1].kind == SnapshotError.TIMEOUT
+        assert results["missing"][1].kind == SnapshotError.NOT_FOUND
+        assert elapsed < 0.5
+
+
+def _jpeg(width=1920, height=1080):
+    Image = pytest.importorskip("PIL.Image")
+    import io
+
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(output, format="JPEG", quality=95)
+    return output.getvalue()
+
+
+class TestResizedSnapshots:
+
+    @pytest.mark.asyncio
+    async def test_resizes_off_the_event_loop_and_caches_variants(self, camera_service):
+        Image = pytest.importorskip("PIL.Image")
+        import io
+        import threading
+
+        source = _jpeg()
+
+        async def fake_fetch(camera):
+            return source, None
+
+        render_threads = []
+        from services import thumbnails
+
+        original_resize = thumbnails.resize_jpeg
+
+        def tracking_resize(data, width, quality):
+            render_threads.append(threading.current_thread().name)
+            return original_resize(data, width, quality)
+
+        camera_service._fetch_snapshot = fake_fetch
+        with patch.object(thumbnails, "resize_jpeg", tracking_resize):
+            results = await asyncio.gather(
+                *[camera_service.get_resized_snapshot("test_cam", 320, 70) for _ in range(4)]
+            )
+
+        snapshot, error = results[0]
+        assert error is None
+        assert len(snapshot.data) < len(source)
+        assert Image.open(io.BytesIO(snapshot.data)).size == (320, 180)
+        assert snapshot.etag.endswith('-w320q70"')
+        assert len(render_threads) == 1
+        assert render_threads[0].startswith("thumbnail")
+        assert camera_service.get_snapshot_metrics()["resize"]["renders"] == 1
+        await camera_service.close()
+
+    @pytest.mark.asyncio
+    async def test_new_frame_renders_new_variant(self, camera_service):
+        frames = iter([_jpeg(800, 600), _jpeg(640, 480)])
+
+        async def fake_fetch(camera):
+            return next(frames), None
+
+        camera_service._fetch_snapshot = fake_fetch
+        first, _ = await camera_service.get_resized_snapshot("test_cam", 200, 70)
+        second, _ = await camera_service.get_resized_snapshot("test_cam", 200, 70, max_age_seconds=0)
+
+        assert first.etag != second.etag
+        assert camera_service.get_snapshot_metrics()["resize"]["renders"] == 2
+        await camera_service.close()
+
+    @pytest.mark.asyncio
+    async def test_wider_than_source_is_reencoded_not_upscaled(self, camera_service):
+        Image = pytest.importorskip("PIL.Image")
+        import io
+
+        async def fake_fetch(camera):
+            return _jpeg(320, 240), None
+
+        camera_service._fetch_snapshot = fake_fetch
+        snapshot, _ = await camera_service.get_resized_snapshot("test_cam", 1280, 50)
+
+        assert Image.open(io.BytesIO(snapshot.data)).size == (320, 240)
+        await camera_service.close()
+
+
+class TestApplyConfig:
+
+    @pytest.mark.asyncio
+    async def test_keeps_cache_for_unchanged_cameras(self, camera_service):
+        async def fake_fetch(camera):
+            return camera["id"].encode(), None
+
+        camera_service._fetch_snapshot = fake_fetch
+        camera_service.cameras.append({"name": "Back", "id": "back", "ip": "192.168.1.101"})
+        await camera_service.get_cached_snapshot("test_cam")
+        await camera_service.get_cached_snapshot("back")
+
+        changes = camera_service.apply_config([
+            {"name": "Test Camera", "id": "test_cam", "ip": "192.168.1.100"},
+            {"name": "Side", "id": "side", "ip": "192.168.1.102"},
+        ])
+
+        assert changes == {"added": ["side"], "removed": ["back"], "changed": []}
+        assert [camera["id"] for camera in camera_service.cameras] == ["test_cam", "side"]
+        assert "test_cam" in camera_service._snapshots
+        assert "back" not in camera_service._snapshots
+
+    @pytest.mark.asyncio
+    async def test_changed_camera_drops_cached_state(self, camera_service):
+        async def fake_fetch(camera):
+            return b"old", None
+
+        camera_service._fetch_snapshot = fake_fetch
+        await camera_service.get_cached_snapshot("test_cam")
+
+        changes = camera_service.apply_config([{"name": "Test Camera", "id": "test_cam", "ip": "192.168.1.200"}])
+
+        assert changes["changed"] == ["test_cam"]
+        assert "test_cam" not in camera_service._snapshots
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from services.camera_service import CachedSnapshot
+from services.camera_stream import CameraStreamHub, FrameRing
+
+
+class FakeCameraService:
+    def __init__(self):
+        self.fetches = 0
+
+    async def get_cached_snapshot(self, camera_id, max_age_seconds=None):
+        self.fetches += 1
+        data = f"{camera_id}-{self.fetches}".encode()
+        return CachedSnapshot(data=data, etag=f'"{self.fetches}"', fetched_at=0, last_modified=0), None
+
+
+class TestFrameRing:
+
+    @pytest.mark.asyncio
+    async def test_reader_within_capacity_gets_every_frame(self):
+        ring = FrameRing(capacity=3)
+        ring.publish(b"1")
+        ring.publish(b"2")
+
+        first = await ring.next_frame(0, timeout=0.1)
+        second = await ring.next_frame(first.seq, timeout=0.1)
+
+        assert (first.data, second.data) == (b"1", b"2")
+
+    @pytest.mark.asyncio
+    async def test_slow_reader_skips_dropped_frames(self):
+        ring = FrameRing(capacity=2)
+        for i in range(1, 6):
+            ring.publish(str(i).encode())
+
+        frame = await ring.next_frame(1, timeout=0.1)
+
+        assert frame.data == b"4"
+
+    @pytest.mark.asyncio
+    async def test_waits_for_next_publish(self):
+        ring = FrameRing(capacity=2)
+        waiter = asyncio.create_task(ring.next_frame(0, timeout=1))
+        await asyncio.sleep(0)
+        ring.publish(b"new")
+
+        assert (await waiter).data == b"new"
+        assert await ring.next_frame(1, timeout=0.01) is None
+
+
+class TestCameraStreamHub:
+
+    @pytest.mark.asyncio
+    async def test_viewers_share_one_camera_poll(self):
+        camera = FakeCameraService()
+        hub = CameraStreamHub(camera, fps=20, buffer_frames=2)
+
+        viewers = [hub.frames("front") for _ in range(5)]
+        parts = [await viewer.__anext__() for viewer in viewers]
+        await asyncio.sleep(0.2)
+        for viewer in viewers:
+            await viewer.__anext__()
+
+        assert all(part.startswith(b"--frame\r\nContent-Type: image/jpeg\r\n") for part in parts)
+        # Five viewers for ~0.2s at 20 fps: one poll loop, not one per viewer.
+        assert camera.fetches <= 7
+        assert hub.get_stats()["front"]["viewers"] == 5
+
+        for viewer in viewers:
+            await viewer.aclose()
+        await asyncio.sleep(0.1)
+        assert hub.get_stats() == {}
+
+    @pytest.mark.asyncio
+    async def test_slow_viewer_drops_frames_instead_of_buffering(self):
+        camera = FakeCameraService()
+        hub = CameraStreamHub(camera, fps=50, buffer_frames=2)
+        viewer = hub.frames("front")
+
+        await viewer.__anext__()
+        await asyncio.sleep(0.2)
+        await viewer.__anext__()
+
+        stats = hub.get_stats()["front"]
+        assert stats["frames_dropped"] > 0
+        assert stats["frames_sent"] == 2
+        await viewer.aclose()
+        await hub.close()
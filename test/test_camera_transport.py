@@ -0,0 +1,131 @@
+"""Local fake Amcrest cameras with Digest auth for exercising the camera HTTP client."""
+
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.camera_service import CameraService
+
+USER = "admin"
+PASSWORD = "secret"
+REALM = "Login to camera"
+
+
+def _md5(value: str) -> str:
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+
+
+class FakeCameraHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _authorized(self) -> bool:
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        fields = dict(re.findall(r'(\w+)="?([^",]+)"?', header[len("Digest "):]))
+        if fields.get("nonce") != self.server.nonce:
+            return False
+        ha1 = _md5(f"{USER}:{REALM}:{PASSWORD}")
+        ha2 = _md5(f"GET:{fields['uri']}")
+        expected = _md5(f"{ha1}:{fields['nonce']}:{fields['nc']}:{fields['cnonce']}:{fields['qop']}:{ha2}")
+        return fields.get("response") == expected
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        self.server.requests += 1
+
+        if not self._authorized():
+            self.server.challenges += 1
+            body = b"Unauthorized"
+            self.send_response(401)
+            self.send_header(
+                "WWW-Authenticate",
+                f'Digest realm="{REALM}", qop="auth", nonce="{self.server.nonce}", opaque="x"',
+            )
+        else:
+            body = b"\xff\xd8jpeg-from-" + self.server.name.encode() + b"\xff\xd9"
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _start_camera(name: str):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCameraHandler)
+    server.name = name
+    server.nonce = _md5(name)
+    server.connections = set()
+    server.requests = 0
+    server.challenges = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def fake_cameras():
+    servers = [_start_camera("front"), _start_camera("back")]
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def service(fake_cameras):
+    service = CameraService(snapshot_max_age_seconds=0)
+    service.set_credentials(USER, PASSWORD)
+    service.cameras = [
+        {"name": server.name, "id": server.name, "ip": "{}:{}".format(*server.server_address)}
+        for server in fake_cameras
+    ]
+    return service
+
+
+@pytest.mark.asyncio
+async def test_nonce_is_reused_per_camera_when_alternating(service, fake_cameras):
+    for _ in range(10):
+        for camera_id in ("front", "back"):
+            data, error = await service.get_snapshot(camera_id)
+            assert error is None
+            assert data.endswith(f"jpeg-from-{camera_id}\xff\xd9".encode("latin-1"))
+    await service.close()
+
+    for server in fake_cameras:
+        # One challenge per camera, then every request authenticates first time.
+        assert server.challenges == 1
+        assert server.requests == 11
+        assert len(server.connections) == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_stats_report_reuse(service):
+    for _ in range(5):
+        await service.get_snapshot("front")
+    await service.close()
+
+    stats = service.get_connection_stats()["front"]
+    assert stats["requests"] == 5
+    assert stats["auth_challenges"] == 1
+    assert stats["connections_opened"] == 1
+    assert stats["connection_reuse_rate"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_rotated_nonce_is_renegotiated(service, fake_cameras):
+    await service.get_snapshot("front")
+    fake_cameras[0].nonce = "rotated"
+    data, error = await service.get_snapshot("front")
+    await service.close()
+
+    assert error is None
+    assert fake_cameras[0].challenges == 2
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from services.command_queue import DeviceCommandQueue
+
+
+class FakeDevice:
+    def __init__(self, is_on=False):
+        self.is_on = is_on
+        self.applied = []
+        self.reads = 0
+
+    def apply(self, target):
+        self.applied.append(target)
+        self.is_on = target["on"]
+        return {"status": "success", "is_on": self.is_on, "target": target}
+
+    def read_state(self):
+        self.reads += 1
+        return {"is_on": self.is_on}
+
+
+async def _submit(queue, device, target, key="hue:baby room"):
+    return await queue.submit(key, target, device.apply, device.read_state)
+
+
+class TestDeviceCommandQueue:
+
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced_into_final_target(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0.01)
+        device = FakeDevice()
+
+        results = await asyncio.gather(
+            _submit(queue, device, None),
+            _submit(queue, device, {"on": True, "brightness": 200}),
+            _submit(queue, device, {"on": True, "brightness": 50}),
+        )
+
+        assert device.applied == [{"on": True, "brightness": 50}]
+        # The toggle is overridden by a later absolute target, so no state read.
+        assert device.reads == 0
+        assert all(r["coalesced"] == 3 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_burst_of_toggles_reads_state_once(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0.01)
+        device = FakeDevice(is_on=False)
+
+        await asyncio.gather(*(_submit(queue, device, None) for _ in range(3)))
+
+        assert device.reads == 1
+        assert device.applied == [{"on": True}]
+
+    @pytest.mark.asyncio
+    async def test_toggle_resolves_against_preceding_target(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0.01)
+        device = FakeDevice(is_on=False)
+
+        await asyncio.gather(
+            _submit(queue, device, {"on": True}),
+            _submit(queue, device, None),
+        )
+
+        assert device.applied == [{"on": False}]
+        assert device.reads == 0
+
+    @pytest.mark.asyncio
+    async def test_toggle_reads_current_state(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0)
+        device = FakeDevice(is_on=True)
+
+        result = await _submit(queue, device, None)
+
+        assert result["status"] == "success"
+        assert device.applied == [{"on": False}]
+        assert "coalesced" not in result
+
+    @pytest.mark.asyncio
+    async def test_toggle_state_error_skips_apply(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0)
+        device = FakeDevice()
+        device.read_state = lambda: {"error": "Bridge not connected", "is_on": False}
+
+        result = await _submit(queue, device, None)
+
+        assert result == {"status": "error", "message": "Bridge not connected"}
+        assert device.applied == []
+
+    @pytest.mark.asyncio
+    async def test_commands_for_different_devices_are_independent(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0.01)
+        hue = FakeDevice()
+        wemo = FakeDevice()
+
+        await asyncio.gather(
+            _submit(queue, hue, {"on": True}, key="hue:baby room"),
+            _submit(queue, wemo, {"on": True}, key="wemo:coffee"),
+        )
+
+        assert hue.applied == [{"on": True}]
+        assert wemo.applied == [{"on": True}]
+
+    @pytest.mark.asyncio
+    async def test_sequential_toggles_do_not_race(self):
+        queue = DeviceCommandQueue(coalesce_seconds=0)
+        device = FakeDevice(is_on=False)
+
+        first = asyncio.create_task(_submit(queue, device, None))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(_submit(queue, device, None))
+        await asyncio.gather(first, second)
+
+        assert device.is_on is False
+        assert [t["on"] for t in device.applied] == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_submit_wemo_uses_one_normalized_name(monkeypatch):
+    from services import command_queue as command_queue_module
+    from services.wemo_service import wemo_service
+
+    calls = []
+    monkeypatch.setattr(command_queue_module, "command_queue", DeviceCommandQueue(coalesce_seconds=0.01))
+    monkeypatch.setattr(wemo_service, "apply_target", lambda name, target: calls.append(name) or {"status": "success"})
+
+    await asyncio.gather(
+        command_queue_module.submit_wemo("coffee", {"on": True}),
+        command_queue_module.submit_wemo("Coffee", {"on": False}),
+    )
+
+    assert calls == ["coffee"]
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from services.config_watcher import ConfigWatcher
+
+
+@pytest.mark.asyncio
+async def test_reloads_only_changed_files(tmp_path):
+    wemo = tmp_path / "wemo_config.yaml"
+    cameras = tmp_path / "cameras.yaml"
+    wemo.write_text("devices: []\n")
+    cameras.write_text("cameras: []\n")
+    reloaded = []
+
+    async def on_wemo():
+        reloaded.append("wemo")
+
+    async def on_cameras():
+        reloaded.append("cameras")
+
+    watcher = ConfigWatcher(interval_seconds=0)
+    watcher.watch(wemo, on_wemo)
+    watcher.watch(cameras, on_cameras)
+
+    assert await watcher.check() == 0
+
+    wemo.write_text("devices:\n  - {name: Coffee, host: 192.0.2.10}\n")
+    os.utime(wemo, ns=(1, 1))
+    assert await watcher.check() == 1
+    assert await watcher.check() == 0
+    assert reloaded == ["wemo"]
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_is_counted_and_not_retried_until_next_change(tmp_path):
+    config = tmp_path / "cameras.yaml"
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise ValueError("bad yaml")
+
+    watcher = ConfigWatcher(interval_seconds=0)
+    watcher.watch(config, broken)
+    config.write_text("cameras: [\n")
+
+    assert await watcher.check() == 0
+    assert await watcher.check() == 0
+    assert watcher.reload_errors == 1
+    assert len(calls) == 1
@@ -0,0 +1,173 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from services.idempotency import IdempotencyMiddleware, IdempotencyStore, IdempotentResult
+
+
+def _make_app(store):
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=store)
+    calls = {"toggle": 0, "fail": 0, "device": 0}
+
+    @app.post("/api/garage/1/toggle")
+    async def toggle():
+        calls["toggle"] += 1
+        return {"status": "success", "count": calls["toggle"]}
+
+    @app.post("/api/fail")
+    async def fail():
+        calls["fail"] += 1
+        raise HTTPException(status_code=400, detail="bad")
+
+    @app.post("/api/wemo/coffee/toggle")
+    async def device_toggle():
+        # Unreachable on the first attempt, like a device dropping off Wi-Fi.
+        calls["device"] += 1
+        await asyncio.sleep(0.05)
+        if calls["device"] == 1:
+            return {"status": "error", "message": "Device not reachable"}
+        return {"status": "success", "count": calls["device"]}
+
+    return app, calls
+
+
+def _make_client(store):
+    app, calls = _make_app(store)
+    return TestClient(app), calls
+
+
+class TestIdempotencyMiddleware:
+
+    def test_retry_with_same_key_replays_first_result(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        first = client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "abc"})
+        second = client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "abc"})
+
+        assert calls["toggle"] == 1
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+
+    def test_requests_without_key_are_not_cached(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        client.post("/api/garage/1/toggle")
+        client.post("/api/garage/1/toggle")
+
+        assert calls["toggle"] == 2
+
+    def test_different_credentials_do_not_share_results(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "abc", "X-Smart-Home-Token": "a"})
+        client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "abc", "X-Smart-Home-Token": "b"})
+
+        assert calls["toggle"] == 2
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "abc"}, content=b"one")
+        response = client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "abc"}, content=b"two")
+
+        assert response.status_code == 422
+        assert calls["toggle"] == 1
+
+    def test_error_responses_are_not_cached(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        client.post("/api/fail", headers={"Idempotency-Key": "abc"})
+        client.post("/api/fail", headers={"Idempotency-Key": "abc"})
+
+        assert calls["fail"] == 2
+
+    def test_device_error_body_is_not_cached(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        first = client.post("/api/wemo/coffee/toggle", headers={"Idempotency-Key": "abc"})
+        second = client.post("/api/wemo/coffee/toggle", headers={"Idempotency-Key": "abc"})
+        third = client.post("/api/wemo/coffee/toggle", headers={"Idempotency-Key": "abc"})
+
+        assert first.json()["status"] == "error"
+        assert second.json()["status"] == "success"
+        assert third.headers["idempotent-replayed"] == "true"
+        assert calls["device"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_retries_after_failure_run_one_at_a_time(self):
+        app, calls = _make_app(IdempotencyStore())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.post("/api/wemo/coffee/toggle", headers={"Idempotency-Key": "abc"}) for _ in range(4)
+            ))
+
+        # The first attempt fails; one waiter retries and the rest replay its success.
+        assert calls["device"] == 2
+        assert [r.json()["status"] for r in responses].count("success") == 3
+
+    def test_overlong_key_is_rejected(self):
+        client, calls = _make_client(IdempotencyStore())
+
+        response = client.post("/api/garage/1/toggle", headers={"Idempotency-Key": "x" * 256})
+
+        assert response.status_code == 400
+        assert calls["toggle"] == 0
+
+
+class TestIdempotencyStore:
+
+    def _result(self, created_at=None):
+        import time
+        return IdempotentResult("fp", 200, "application/json", b"{}", created_at or time.time())
+
+    def test_lru_evicts_oldest_entry(self):
+        store = IdempotencyStore(max_entries=2)
+        store.put("a", self._result())
+        store.put("b", self._result())
+        store.get("a")
+        store.put("c", self._result())
+
+        assert store.get("a") is not None
+        assert store.get("b") is None
+        assert store.get("c") is not None
+
+    @pytest.mark.asyncio
+    async def test_begin_returns_pending_future_to_later_callers(self):
+        store = IdempotencyStore()
+
+        future, owner = store.begin("a")
+        again, again_owner = store.begin("a")
+        store.finish("a", None)
+        after, after_owner = store.begin("a")
+
+        assert owner and not again_owner
+        assert again is future
+        assert after_owner and after is not future
+
+    def test_expired_entries_are_ignored(self):
+        store = IdempotencyStore(ttl_seconds=60)
+        store.put("a", self._result(created_at=1.0))
+
+        assert store.get("a") is None
+
+    def test_persisted_results_survive_restart(self, tmp_path):
+        from models import database
+        original_path = database.DB_PATH
+        database.DB_PATH = tmp_path / "test.db"
+        try:
+            database.init_db()
+            IdempotencyStore(persist=True).put("a", self._result())
+
+            restored = IdempotencyStore(persist=True).get("a")
+
+            assert restored is not None
+            assert restored.body == b"{}"
+            assert restored.status_code == 200
+        finally:
+            database.DB_PATH = original_path
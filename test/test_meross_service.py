@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 import pytest
 
 from services.meross_service import MerossService
@@ -85,7 +88,7 @@ async def test_toggle_door_uses_local_http_backend(monkeypatch):
     calls = []
     get_calls = 0
 
-    def fake_local_request(namespace, method, payload):
+    async def fake_local_request(namespace, method, payload):
         nonlocal get_calls
         calls.append((namespace, method, payload))
         if method == "GET":
@@ -122,7 +125,7 @@ async def test_toggle_door_reports_unverified_when_state_does_not_change(monkeyp
     service._verify_timeout_seconds = 0.01
     service._verify_poll_interval_seconds = 0.01
 
-    def fake_local_request(namespace, method, payload):
+    async def fake_local_request(namespace, method, payload):
         if method == "GET":
             return {"state": {"channel": 1, "open": 1}}
         return {"state": {"channel": 1, "open": 1, "execute": 1}}
@@ -135,3 +138,130 @@ async def test_toggle_door_reports_unverified_when_state_does_not_change(monkeyp
     assert result["verified"] is False
     assert result["target_open"] is False
     assert "not verified" in result["message"]
+
+
+class FakePushNotification:
+    def __init__(self, raw_data, namespace="Appliance.GarageDoor.State", uuid="device-uuid"):
+        self.namespace = namespace
+        self.originating_device_uuid = uuid
+        self.raw_data = raw_data
+
+
+@pytest.mark.asyncio
+async def test_push_notification_updates_cached_door_state():
+    service = MerossService()
+    service.device = DummyDevice()
+
+    await service._handle_push_notification(
+        FakePushNotification({"state": [{"channel": 1, "open": 1}, {"channel": 2, "open": 0}]}),
+        [],
+        None,
+    )
+
+    doors = service.get_door_states()
+    assert [d["open"] for d in doors] == [True, False]
+    assert doors[0]["source"] == "push"
+
+
+@pytest.mark.asyncio
+async def test_push_notification_ignores_other_devices():
+    service = MerossService()
+    service.device = DummyDevice()
+
+    await service._handle_push_notification(
+        FakePushNotification({"state": [{"channel": 1, "open": 1}]}, uuid="other"),
+        [],
+        None,
+    )
+
+    assert service.get_door_states()[0]["open"] is None
+
+
+@pytest.mark.asyncio
+async def test_wait_for_target_state_completes_on_push(monkeypatch):
+    service = MerossService()
+    service.device = DummyDevice()
+    service._verify_timeout_seconds = 5
+    service._verify_poll_interval_seconds = 5
+
+    async def fail_local_request(namespace, method, payload):
+        raise AssertionError("verification should not poll when a push arrives")
+
+    monkeypatch.setattr(service, "_local_request", fail_local_request)
+
+    async def push_later():
+        await asyncio.sleep(0.01)
+        await service._handle_push_notification(
+            FakePushNotification({"state": [{"channel": 1, "open": 0}]}),
+            [],
+            None,
+        )
+
+    pusher = asyncio.create_task(push_later())
+    verified, final_state = await service._wait_for_target_state(1, False)
+    await pusher
+
+    assert verified is True
+    assert final_state == {"channel": 1, "open": 0}
+
+
+@pytest.mark.asyncio
+async def test_wait_for_target_state_backs_off_between_polls(monkeypatch):
+    service = MerossService()
+    service.device = DummyDevice()
+    service._verify_timeout_seconds = 0.75
+    service._verify_poll_interval_seconds = 0.1
+    service._verify_max_poll_interval_seconds = 0.4
+
+    poll_times = []
+
+    async def fake_local_request(namespace, method, payload):
+        poll_times.append(time.monotonic())
+        return {"state": {"channel": 1, "open": 1}}
+
+    monkeypatch.setattr(service, "_local_request", fake_local_request)
+
+    verified, _ = await service._wait_for_target_state(1, False)
+
+    assert verified is False
+    gaps = [b - a for a, b in zip(poll_times, poll_times[1:])]
+    assert len(poll_times) <= 4
+    assert gaps and gaps[0] >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_refresh_door_states_reads_all_channels_in_one_request(monkeypatch):
+    service = MerossService()
+    service.device = DummyDevice()
+    calls = []
+
+    async def fake_local_request(namespace, method, payload):
+        calls.append((namespace, method, payload))
+        return {"state": [{"channel": 1, "open": 0}, {"channel": 2, "open": 1}]}
+
+    monkeypatch.setattr(service, "_local_request", fake_local_request)
+
+    doors = await service.refresh_door_states()
+
+    assert calls == [
+        ("Appliance.GarageDoor.State", "GET", {"state": [{"channel": 1}, {"channel": 2}]}),
+    ]
+    assert [(d["door"], d["open"], d["source"]) for d in doors] == [(1, False, "poll"), (2, True, "poll")]
+
+
+@pytest.mark.asyncio
+async def test_door_transitions_are_written_to_history():
+    from models.database import get_device_history
+
+    service = MerossService()
+    service.device = DummyDevice()
+
+    for is_open in (0, 0, 1, 1, 0):
+        await service._handle_push_notification(
+            FakePushNotification({"state": [{"channel": 1, "open": is_open}]}),
+            [],
+            None,
+        )
+
+    history = get_device_history(device_type="garage", device_name="door_1", hours=1)
+    assert len(history) == 3
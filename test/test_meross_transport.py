@@ -0,0 +1,135 @@
+"""Local fake Meross garage controller for exercising the async /config transport."""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.meross_service import MerossService
+
+DEVICE_KEY = "test-key"
+
+
+class FakeGarageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        length = int(self.headers.get("Content-Length", 0))
+        message = json.loads(self.rfile.read(length))
+        header = message["header"]
+        expected_sign = hashlib.md5(
+            f"{header['messageId']}{DEVICE_KEY}{header['timestamp']}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+
+        if header["sign"] != expected_sign:
+            payload = {"error": {"code": 5001, "detail": "sign error"}}
+        elif header["method"] == "SET":
+            state = message["payload"]["state"]
+            self.server.doors[state["channel"]] = state["open"]
+            payload = {"state": {"channel": state["channel"], "open": state["open"], "execute": 1}}
+        else:
+            channel = message["payload"]["state"]["channel"]
+            payload = {"state": {"channel": channel, "open": self.server.doors.get(channel, 0)}}
+        self.server.requests += 1
+
+        body = json.dumps({"header": header, "payload": payload}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_device():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGarageHandler)
+    server.connections = set()
+    server.doors = {1: 1, 2: 0}
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class DummyDevice:
+    uuid = "device-uuid"
+    name = "Garage Controller"
+    channels = [{}, {}, {}]
+
+    def get_is_open(self, door_index):
+        return None
+
+
+@pytest.fixture
+def service(fake_device):
+    host, port = fake_device.server_address
+    service = MerossService()
+    service.device = DummyDevice()
+    service._local_ip = f"{host}:{port}"
+    service._key = DEVICE_KEY
+    service._verify_timeout_seconds = 1
+    service._verify_poll_interval_seconds = 0.1
+    return service
+
+
+@pytest.mark.asyncio
+async def test_reads_reuse_one_keepalive_connection(service, fake_device):
+    for _ in range(20):
+        state, is_open = await service._read_door_state(1)
+        assert is_open is True
+    await service.close()
+
+    assert fake_device.requests == 20
+    assert len(fake_device.connections) == 1
+
+
+@pytest.mark.asyncio
+async def test_door_commands_do_not_use_worker_threads(service, fake_device, monkeypatch):
+    thread_calls = []
+    original_to_thread = asyncio.to_thread
+
+    async def counting_to_thread(func, *args, **kwargs):
+        thread_calls.append(getattr(func, "__name__", repr(func)))
+        return await original_to_thread(func, *args, **kwargs)
+
+    monkeypatch.setattr(asyncio, "to_thread", counting_to_thread)
+
+    await service._poll_door_state(1)
+    await service._local_request(
+        "Appliance.GarageDoor.State",
+        "SET",
+        {"state": {"channel": 1, "open": 0, "uuid": "device-uuid"}},
+    )
+    verified, final_state = await service._wait_for_target_state(1, False)
+    await service.close()
+
+    assert verified is True
+    assert final_state["open"] == 0
+    assert thread_calls == []
+
+
+@pytest.mark.asyncio
+async def test_local_round_trip_latency_against_fake_device(service):
+    await service._read_door_state(1)
+
+    started = time.perf_counter()
+    for _ in range(50):
+        await service._read_door_state(2)
+    per_request = (time.perf_counter() - started) / 50
+    await service.close()
+
+    # Warm keep-alive requests to a loopback device should be well under 50 ms.
+    assert per_request < 0.05
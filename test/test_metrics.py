@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from models.database import save_device_state, save_power_samples
+from services.metrics import BACKEND_ERRORS, BACKEND_LATENCY, DB_ROWS_WRITTEN, MetricsRegistry, observe
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("op_seconds", "Op latency.", ("backend",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "hue")
+    histogram.observe(0.5, "hue")
+    histogram.observe(3.0, "hue")
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP op_seconds Op latency.", "# TYPE op_seconds histogram"]
+    assert 'op_seconds_bucket{backend="hue",le="0.1"} 1' in lines
+    assert 'op_seconds_bucket{backend="hue",le="1"} 2' in lines
+    assert 'op_seconds_bucket{backend="hue",le="+Inf"} 3' in lines
+    assert 'op_seconds_count{backend="hue"} 3' in lines
+    assert 'op_seconds_sum{backend="hue"} 3.55' in lines
+
+
+def test_counter_and_gauge_callbacks():
+    registry = MetricsRegistry()
+    counter = registry.counter("errors_total", "Errors.", ("backend",))
+    counter.inc('we"mo')
+    counter.inc('we"mo', amount=2)
+    registry.gauge_callback("queue", "Queue.", lambda: {("a",): 2, ("b",): 0}, ("device",))
+    registry.gauge_callback("broken", "Broken.", lambda: 1 / 0)
+
+    text = registry.render()
+
+    assert 'errors_total{backend="we\\"mo"} 3' in text
+    assert 'queue{device="a"} 2' in text
+    assert 'queue{device="b"} 0' in text
+    assert "# TYPE broken gauge" in text
+    assert "\nbroken " not in text
+
+
+def test_observe_counts_errors_and_reraises():
+    before_errors = BACKEND_ERRORS.value("test", "fail")
+    before_calls = BACKEND_LATENCY.count("test", "fail")
+
+    with pytest.raises(TimeoutError):
+        with observe("test", "fail"):
+            raise TimeoutError("device timed out")
+    with observe("test", "fail"):
+        pass
+
+    assert BACKEND_ERRORS.value("test", "fail") == before_errors + 1
+    assert BACKEND_LATENCY.count("test", "fail") == before_calls + 2
+
+
+def test_observe_does_not_count_cancellation_as_error():
+    before_errors = BACKEND_ERRORS.value("test", "cancelled")
+
+    with pytest.raises(asyncio.CancelledError):
+        with observe("test", "cancelled"):
+            raise asyncio.CancelledError()
+
+    assert BACKEND_ERRORS.value("test", "cancelled") == before_errors
+    assert BACKEND_LATENCY.count("test", "cancelled") == 1
+
+
+def test_db_writes_are_counted():
+    before_history = DB_ROWS_WRITTEN.value("device_history")
+    before_power = DB_ROWS_WRITTEN.value("wemo_power")
+
+    save_device_state("wemo", "coffee", {"is_on": True})
+    save_power_samples([("heater", 1, 0, 0, 0, 0), ("heater", 2, 0, 0, 0, 0)])
+
+    assert DB_ROWS_WRITTEN.value("device_history") == before_history + 1
+    assert DB_ROWS_WRITTEN.value("wemo_power") == before_power + 2
+
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE smart_home_backend_request_seconds histogram" in response.text
+    assert "smart_home_scheduled_actions_pending 0" in response.text
+    assert 'smart_home_db_write_seconds_bucket{table="device_history",le="+Inf"}' in response.text
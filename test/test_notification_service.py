@@ -92,7 +92,7 @@ async def test_meross_toggle_includes_notification(monkeypatch):
     service._local_ip = "192.0.2.10"
     service._key = "test-key"
 
-    def fake_local_request(namespace, method, payload):
+    async def fake_local_request(namespace, method, payload):
         if method == "GET":
             return {"state": {"channel": 1, "open": 1}}
         return {"state": {"channel": 1, "open": 1, "execute": 1}}
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services import profiler as profiler_module
+from services.profiler import LoopLagMonitor, Profiler, StackSampler
+
+
+def _spin_for_profiler(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _park_for_profiler(stop: threading.Event) -> None:
+    stop.wait()
+
+
+@pytest.fixture
+def worker_threads():
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_spin_for_profiler, args=(stop,), name="busy-worker-1"),
+        threading.Thread(target=_park_for_profiler, args=(stop,), name="parked-worker-1"),
+    ]
+    for thread in threads:
+        thread.start()
+    yield
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_sampler_collapses_stacks_of_other_threads(worker_threads):
+    sampler = StackSampler(interval_ms=2)
+    sampler.start()
+    time.sleep(0.3)
+    sampler.stop()
+
+    lines = sampler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy-worker-N;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_spin_for_profiler (test/test_profiler.py)" in stack.split(";")
+    # Parked threads are counted but left out of the output by default.
+    assert not any(line.startswith("parked-worker-N;") for line in lines)
+    assert sampler.idle_samples > 0
+    assert "stack-sampler" not in sampler.collapsed()
+
+
+def test_sampler_can_include_idle_threads_and_line_numbers(worker_threads):
+    sampler = StackSampler(interval_ms=2, lines=True, include_idle=True)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+
+    parked = [line for line in sampler.collapsed().splitlines() if line.startswith("parked-worker-N;")]
+    assert parked
+    assert "_park_for_profiler (test/test_profiler.py:" in parked[0]
+
+
+@pytest.mark.asyncio
+async def test_profiler_allows_one_session_at_a_time():
+    profiler = Profiler(interval_ms=5)
+    first = asyncio.create_task(profiler.profile(0.2))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(profiler_module.ProfilerBusyError):
+        await profiler.profile(0.1)
+    assert (await first).samples > 0
+
+
+def test_profile_endpoint_requires_token_and_returns_collapsed_text(monkeypatch):
+    monkeypatch.setenv("SMART_HOME_API_TOKEN", "secret")
+    client = TestClient(app)
+
+    assert client.get("/api/debug/profile", params={"seconds": 0.1}).status_code == 401
+    assert client.get("/api/debug/profile", params={"seconds": 600}, headers={"X-Smart-Home-Token": "secret"}).status_code == 422
+
+    response = client.get("/api/debug/profile", params={"seconds": 0.1, "idle": True}, headers={"X-Smart-Home-Token": "secret"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+
+def _block_event_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_records_blocking_stack(caplog):
+    monitor = LoopLagMonitor(threshold_ms=80, buffer_size=5)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _block_event_loop(0.3)
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    assert monitor.stalls_total == 1
+    stall = monitor.get_stalls()[0]
+    assert stall["blocked_ms"] >= 200
+    assert any(entry.endswith("in _block_event_loop") for entry in stall["stack"])
+    assert "Event loop blocked for" in caplog.text
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_ignores_short_pauses():
+    monitor = LoopLagMonitor(threshold_ms=200)
+    monitor.start()
+    try:
+        _block_event_loop(0.02)
+        await asyncio.sleep(0.2)
+    finally:
+        await monitor.stop()
+
+    assert monitor.stalls_total == 0
+
+    disabled = LoopLagMonitor(threshold_ms=0)
+    disabled.start()
+    assert not disabled.running
+
+
+def test_loop_endpoint_reports_monitor_state():
+    response = TestClient(app).get("/api/debug/loop")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["threshold_ms"] == profiler_module.loop_lag_monitor.threshold * 1000
+    assert isinstance(body["stalls"], list)
@@ -0,0 +1,329 @@
+import asyncio
+import time
+
+import pytest
+
+from services import rinnai_service as rinnai_module
+from services.rinnai_service import RinnaiService
+
+
+def _make_service(monkeypatch, delay=0.05):
+    service = RinnaiService()
+    service.device_id = "device-1"
+    calls = []
+
+    async def fake_maintenance(wait_seconds=5.0, include_status=True, device_id=None):
+        calls.append(wait_seconds)
+        await asyncio.sleep(delay)
+        return {
+            "device_id": "device-1",
+            "is_online": True,
+            "inlet_temp": 60 + len(calls),
+            "maintenance_retrieval": {"status": "success", "wait_seconds": wait_seconds},
+        }
+
+    monkeypatch.setattr(service, "trigger_maintenance_retrieval", fake_maintenance)
+    return service, calls
+
+
+class TestRinnaiSnapshot:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_share_one_retrieval(self, monkeypatch):
+        service, calls = _make_service(monkeypatch)
+
+        results = await asyncio.gather(*[service.get_status(trigger_maintenance=True) for _ in range(5)])
+
+        assert len(calls) == 1
+        assert all(r["inlet_temp"] == 61 for r in results)
+        assert all("maintenance_retrieval" not in r for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cached_snapshot_is_returned_without_waiting(self, monkeypatch):
+        service, calls = _make_service(monkeypatch, delay=1)
+        monkeypatch.setattr(rinnai_module, "SNAPSHOT_MIN_REFRESH_SECONDS", 0)
+        state = service._snapshot_state("device-1")
+        state.status = {"device_id": "device-1", "is_online": True, "inlet_temp": 50}
+        state.taken_at = time.monotonic() - 120
+
+        result = await asyncio.wait_for(service.get_status(trigger_maintenance=True), timeout=0.5)
+
+        assert result["inlet_temp"] == 50
+        assert result["refreshing"] is True
+        assert result["snapshot_age_seconds"] >= 0
+        await asyncio.sleep(0)
+        assert len(calls) == 1
+        state.refresh_task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_fresh_snapshot_does_not_trigger_refresh(self, monkeypatch):
+        service, calls = _make_service(monkeypatch)
+
+        await service.refresh_snapshot()
+        result = await service.get_status(trigger_maintenance=True)
+
+        assert len(calls) == 1
+        assert result["refreshing"] is False
+
+    @pytest.mark.asyncio
+    async def test_max_age_forces_waiting_for_new_snapshot(self, monkeypatch):
+        service, calls = _make_service(monkeypatch, delay=0)
+
+        await service.refresh_snapshot()
+        result = await service.get_status(trigger_maintenance=True, max_age_seconds=0)
+
+        assert len(calls) == 2
+        assert result["inlet_temp"] == 62
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_previous_snapshot(self, monkeypatch):
+        service, _ = _make_service(monkeypatch, delay=0)
+        await service.refresh_snapshot()
+
+        async def failing_maintenance(wait_seconds=5.0, include_status=True, device_id=None):
+            return {"status": "error", "message": "Device not found", "is_online": False}
+
+        monkeypatch.setattr(service, "trigger_maintenance_retrieval", failing_maintenance)
+        result = await service.refresh_snapshot()
+
+        assert result == {"error": "Device not found", "is_online": False}
+        assert service._snapshots["device-1"].status["inlet_temp"] == 61
+
+
+def _jwt(exp):
+    import base64
+    import json
+
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none'})}.{encode({'exp': exp})}.sig"
+
+
+class FakeRinnaiAPI:
+    instances = []
+    device_ids = ["device-1"]
+    info_delay = 0
+
+    def __init__(self):
+        self.access_token = _jwt(time.time() + 3600)
+        self.is_connected = True
+        self.user_info_calls = 0
+        self.device_info_calls = 0
+        self.renewals = 0
+        self.user = self
+        self.device = self
+        FakeRinnaiAPI.instances.append(self)
+
+    async def async_login(self, username, password):
+        pass
+
+    async def get_info(self, device_id=None):
+        if device_id is None:
+            self.user_info_calls += 1
+            return {"devices": {"items": [{"id": device_id, "thing_name": device_id} for device_id in self.device_ids]}}
+        self.device_info_calls += 1
+        await asyncio.sleep(self.info_delay)
+        return {"data": {"getDevice": {"device_name": f"Heater {device_id}", "shadow": {}, "info": {}}}}
+
+    async def async_renew_access_token(self):
+        self.renewals += 1
+        self.access_token = _jwt(time.time() + 3600)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_rinnai_api(monkeypatch):
+    import aiorinnai
+
+    FakeRinnaiAPI.instances = []
+    monkeypatch.setattr(FakeRinnaiAPI, "device_ids", ["device-1"])
+    monkeypatch.setattr(FakeRinnaiAPI, "info_delay", 0)
+    monkeypatch.setattr(aiorinnai, "API", FakeRinnaiAPI)
+    monkeypatch.setenv("RINNAI_USERNAME", "user@example.com")
+    monkeypatch.setenv("RINNAI_PASSWORD", "secret")
+    return FakeRinnaiAPI
+
+
+class TestRinnaiConnection:
+
+    def test_token_expiry_reads_exp_claim(self):
+        assert rinnai_module._token_expiry(_jwt(1234567890)) == 1234567890
+        assert rinnai_module._token_expiry("not-a-jwt") is None
+
+    @pytest.mark.asyncio
+    async def test_status_read_costs_one_cloud_call(self, fake_rinnai_api):
+        service = RinnaiService()
+        assert await service.connect() is True
+
+        await service.get_status()
+        await service.get_status()
+        await service.close()
+
+        metrics = service.get_metrics()
+        assert metrics["logins"] == 1
+        assert metrics["cloud_calls"] == {"login": 1, "user.get_info": 1, "device.get_info": 2}
+
+    @pytest.mark.asyncio
+    async def test_reconnect_reuses_cached_descriptor(self, fake_rinnai_api):
+        service = RinnaiService()
+        await service.connect()
+        await service.connect()
+        await service.close()
+
+        assert service.get_metrics()["logins"] == 2
+        assert service.get_metrics()["cloud_calls"]["user.get_info"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidated_descriptor_is_reloaded(self, fake_rinnai_api):
+        service = RinnaiService()
+        await service.connect()
+        service.invalidate_device_cache()
+
+        device = await service._get_device()
+        await service.close()
+
+        assert device["id"] == "device-1"
+        assert service.get_metrics()["cloud_calls"]["user.get_info"] == 2
+
+    @pytest.mark.asyncio
+    async def test_token_is_renewed_before_expiry(self, fake_rinnai_api, monkeypatch):
+        sleeps = []
+        real_sleep = asyncio.sleep
+
+        async def fast_sleep(delay):
+            sleeps.append(delay)
+            if len(sleeps) > 1:
+                raise asyncio.CancelledError
+            await real_sleep(0)
+
+        monkeypatch.setattr(rinnai_module.asyncio, "sleep", fast_sleep)
+        service = RinnaiService()
+        await service.connect()
+        try:
+            await service._token_task
+        except asyncio.CancelledError:
+            pass
+
+        api = fake_rinnai_api.instances[-1]
+        assert api.renewals == 1
+        assert 3600 - 300 - 5 < sleeps[0] <= 3600 - 300
+        assert service.get_metrics()["token_refreshes"] == 1
+
+
+class TestMultipleDevices:
+
+    @pytest.mark.asyncio
+    async def test_connect_manages_every_device(self, fake_rinnai_api):
+        fake_rinnai_api.device_ids = ["device-1", "device-2"]
+        service = RinnaiService()
+        await service.connect()
+
+        status = await service.get_status(device_id="device-2")
+        await service.close()
+
+        assert service.device_id == "device-1"
+        assert service.device_ids == ["device-1", "device-2"]
+        assert status["device_id"] == "device-2"
+        assert status["name"] == "Heater device-2"
+        assert service.get_metrics()["device_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_all_statuses_are_fetched_concurrently(self, fake_rinnai_api):
+        fake_rinnai_api.device_ids = ["device-1", "device-2", "device-3"]
+        fake_rinnai_api.info_delay = 0.2
+        service = RinnaiService()
+        await service.connect()
+
+        started = time.perf_counter()
+        statuses = await service.get_all_statuses()
+        elapsed = time.perf_counter() - started
+        await service.close()
+
+        assert list(statuses) == ["device-1", "device-2", "device-3"]
+        assert all(s["is_online"] for s in statuses.values())
+        assert elapsed < 0.4
+
+    @pytest.mark.asyncio
+    async def test_unknown_device_is_not_connected(self, fake_rinnai_api):
+        service = RinnaiService()
+        await service.connect()
+
+        status = await service.get_status(device_id="missing")
+        circulation = await service.start_circulation(5, device_id="missing")
+        await service.close()
+
+        assert status == {"error": "Not connected", "is_online": False}
+        assert circulation["status"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_snapshots_are_kept_per_device(self, monkeypatch):
+        service = RinnaiService()
+        service.device_ids = ["device-1", "device-2"]
+        service.device_id = "device-1"
+        calls = []
+
+        async def fake_maintenance(wait_seconds=5.0, include_status=True, device_id=None):
+            calls.append(device_id)
+            return {"device_id": device_id, "is_online": True}
+
+        monkeypatch.setattr(service, "trigger_maintenance_retrieval", fake_maintenance)
+        snapshots = await service.refresh_all_snapshots()
+
+        assert sorted(calls) == ["device-1", "device-2"]
+        assert snapshots["device-2"]["device_id"] == "device-2"
+        assert service._snapshots["device-1"].status["device_id"] == "device-1"
+
+
+SAMPLE_DEVICE_INFO = {
+    "data": {
+        "getDevice": {
+            "device_name": "Main House",
+            "firmware": "233",
+            "shadow": {
+                "set_domestic_temperature": "125",
+                "operation_enabled": True,
+                "recirculation_enabled": False,
+                "schedule_holiday": False,
+            },
+            "info": {
+                "m08_inlet_temperature": "66",
+                "m02_outlet_temperature": "121",
+                "m01_water_flow_rate_raw": "26",
+                "unix_time": "1771462025",
+                "serial_id": "unused",
+            },
+            "schedule": {"items": []},
+        }
+    }
+}
+
+
+class TestParseDeviceStatus:
+
+    def test_extracts_status_fields(self):
+        status = rinnai_module.parse_device_status(SAMPLE_DEVICE_INFO, "device-1")
+
+        assert status == {
+            "device_id": "device-1",
+            "name": "Main House",
+            "is_online": True,
+            "set_temperature": 125,
+            "operation_enabled": True,
+            "recirculation_enabled": False,
+            "inlet_temp": 66,
+            "outlet_temp": 121,
+            "water_flow": 26,
+            "firmware": "233",
+            "device_time": "2026-02-19T00:47:05+00:00",
+            "device_time_pacific": "2026-02-18 16:47:05 PST",
+        }
+
+    def test_tolerates_missing_sections(self):
+        status = rinnai_module.parse_device_status({"data": {"getDevice": {"shadow": None}}}, "device-1")
+
+        assert status["set_temperature"] == 0
+        assert status["inlet_temp"] == 0
+        assert status["device_time"] is None
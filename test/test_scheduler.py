@@ -29,7 +29,7 @@ class TestScheduler:
                 "brightness": 128
             }
             mock_wemo.get_all_status.return_value = {}
-            mock_rinnai.get_status = AsyncMock(return_value={"error": "skipped"})
+            mock_rinnai.get_all_statuses = AsyncMock(return_value={"device-1": {"error": "skipped"}})
             
             from services.scheduler import collect_device_states
             await collect_device_states()
@@ -53,7 +53,7 @@ class TestScheduler:
                 "brightness": 200
             }
             mock_wemo.get_all_status.return_value = {}
-            mock_rinnai.get_status = AsyncMock(return_value={"error": "skipped"})
+            mock_rinnai.get_all_statuses = AsyncMock(return_value={"device-1": {"error": "skipped"}})
             
             from services.scheduler import collect_device_states
             await collect_device_states()
@@ -64,3 +64,27 @@ class TestScheduler:
             data = json.loads(history[0]["data"]) if isinstance(history[0]["data"], str) else history[0]["data"]
             assert data["is_on"] == True
             assert data["brightness"] == 200
+
+    @pytest.mark.asyncio
+    async def test_collect_device_states_moves_main_house_history_to_primary_heater(self, monkeypatch):
+        import services.scheduler as scheduler_module
+
+        monkeypatch.setattr(scheduler_module, "_rinnai_history_migrated", False)
+        save_device_state("rinnai", "main_house", {"inlet_temp": 60, "outlet_temp": 120})
+        save_device_state("rinnai", "main_house", {"inlet_temp": 61, "outlet_temp": 121})
+
+        with patch('services.scheduler.hue_service') as mock_hue, \
+             patch('services.scheduler.wemo_service') as mock_wemo, \
+             patch('services.scheduler.rinnai_service') as mock_rinnai:
+            mock_hue.get_status.return_value = {"error": "offline"}
+            mock_wemo.get_all_status.return_value = {}
+            mock_rinnai.device_id = "device-1"
+            mock_rinnai.get_all_statuses = AsyncMock(return_value={"device-1": {"error": "skipped"}})
+
+            await scheduler_module.collect_device_states()
+            save_device_state("rinnai", "main_house", {"inlet_temp": 62, "outlet_temp": 122})
+            await scheduler_module.collect_device_states()
+
+        assert len(get_device_history(device_type="rinnai", device_name="device-1", hours=1)) == 2
+        # Migrated once per process; later rows under the old name are left alone.
+        assert len(get_device_history(device_type="rinnai", device_name="main_house", hours=1)) == 1
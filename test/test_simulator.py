@@ -0,0 +1,103 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from services.hue_service import hue_service
+from services.meross_service import meross_service
+from services.rinnai_service import rinnai_service
+from simulator import Endpoint, FaultProfile, SimulatedFleet, run_load
+from simulator.load import percentile
+
+
+@pytest_asyncio.fixture
+async def fleet():
+    with SimulatedFleet(wemo_count=2, camera_count=1, seed=1) as fleet:
+        fleet.attach()
+        yield fleet
+        await fleet.detach()
+
+
+@pytest_asyncio.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_status_fans_out_to_every_simulated_backend(fleet, client):
+    response = await client.get("/api/status")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["hue"]["name"] == "Baby room"
+    assert body["hue"]["is_on"] is False
+    assert {name: status["is_on"] for name, status in body["wemo"].items()} == {"switch 1": 0, "switch 2": 0}
+    assert body["rinnai"]["name"] == "Heater 1"
+    assert body["rinnai"]["outlet_temp"] == 121
+    assert body["garage"]["door_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_actions_change_simulated_device_state(fleet, client):
+    assert (await client.post("/api/wemo/switch 1/on")).json()["is_on"] == 1
+    assert (await client.post("/api/hue/on/200")).json()["status"] == "success"
+    garage = (await client.get("/api/garage/status", params={"refresh": "true"})).json()
+    snapshot = await client.get("/api/cameras/snapshot/cam1")
+
+    assert fleet.wemo[0].state == 1
+    assert fleet.hue.lights["1"]["state"] == {"on": True, "bri": 200, "reachable": True}
+    assert [door["open"] for door in garage["doors"]] == [False, False]
+    assert snapshot.status_code == 200
+    assert snapshot.content.startswith(b"\xff\xd8")
+
+
+@pytest.mark.asyncio
+async def test_detach_restores_services():
+    original_bridge = hue_service.bridge
+    original_connect = rinnai_service.connect
+    with SimulatedFleet(wemo_count=0, camera_count=0) as fleet:
+        fleet.attach()
+        assert hue_service.bridge is not original_bridge
+        await fleet.detach()
+
+    assert hue_service.bridge is original_bridge
+    assert rinnai_service.connect == original_connect
+    assert "connect" not in rinnai_service.__dict__
+
+
+@pytest.mark.asyncio
+async def test_failures_are_injected_at_the_configured_rate():
+    profile = FaultProfile(failure_rate=1.0)
+    with SimulatedFleet(profiles={"meross": profile}, wemo_count=0, camera_count=0) as fleet:
+        fleet.attach()
+        try:
+            with pytest.raises(httpx.HTTPStatusError):
+                await meross_service.refresh_door_states()
+        finally:
+            await fleet.detach()
+
+    assert fleet.meross.failures == fleet.meross.requests == 1
+    assert fleet.hue.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_percentiles_per_endpoint(fleet):
+    endpoints = [Endpoint("hue", "/api/hue/status"), Endpoint("missing", "/api/nope")]
+
+    result = await run_load(app, endpoints, concurrency=3, total_requests=20)
+
+    assert result["total"]["requests"] == 20
+    assert result["endpoints"]["hue"]["requests"] == 10
+    assert result["endpoints"]["hue"]["errors"] == 0
+    assert result["endpoints"]["missing"]["errors"] == 10
+    assert result["endpoints"]["hue"]["p50_ms"] <= result["endpoints"]["hue"]["p99_ms"]
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([], 50) is None
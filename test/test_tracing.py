@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from main import app as main_app
+from services.auth import require_control_auth
+from services.metrics import observe
+from services.command_queue import DeviceCommandQueue
+from services.tracing import (
+    SlowRequestLog,
+    Trace,
+    TracedRoute,
+    TracingMiddleware,
+    create_background_task,
+    current_trace,
+    span,
+    traced_by,
+)
+
+
+def _device_call():
+    with observe("fake", "read"):
+        return {"is_on": True}
+
+
+def build_client(sample_rate: float, slow_log: SlowRequestLog) -> TestClient:
+    router = APIRouter(route_class=TracedRoute)
+
+    @router.get("/api/async", dependencies=[Depends(require_control_auth)])
+    async def async_route():
+        first, second = await asyncio.gather(asyncio.to_thread(_device_call), asyncio.to_thread(_device_call))
+        return {"first": first, "second": second}
+
+    @router.get("/api/sync")
+    def sync_route():
+        with span("db.history_read"):
+            return _device_call()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(TracingMiddleware, sample_rate=sample_rate, slow_log=slow_log)
+    return TestClient(app)
+
+
+def _timings(response) -> dict:
+    result = {}
+    for part in response.headers["server-timing"].split(", "):
+        name, *params = part.split(";")
+        result[name] = params
+    return result
+
+
+def test_sampled_request_reports_spans_in_server_timing():
+    client = build_client(1.0, SlowRequestLog(size=0))
+
+    response = client.get("/api/async")
+
+    assert response.status_code == 200
+    timings = _timings(response)
+    assert set(timings) == {"total", "auth", "fake.read", "handler", "serialize"}
+    assert timings["fake.read"][1] == 'desc="2 calls"'
+
+
+def test_sync_endpoint_spans_are_recorded_from_the_threadpool():
+    client = build_client(1.0, SlowRequestLog(size=0))
+
+    timings = _timings(client.get("/api/sync"))
+
+    assert {"db.history_read", "fake.read", "handler", "serialize"} <= set(timings)
+
+
+def test_unsampled_requests_have_no_header_unless_forced():
+    client = build_client(0.0, SlowRequestLog(size=0))
+
+    assert "server-timing" not in client.get("/api/sync").headers
+    assert "fake.read" in client.get("/api/sync", headers={"X-Smart-Home-Trace": "1"}).headers["server-timing"]
+
+
+def test_slow_requests_are_kept_newest_first_in_a_bounded_buffer():
+    slow_log = SlowRequestLog(threshold_ms=0, size=2)
+    client = build_client(0.0, slow_log)
+
+    client.get("/api/sync")
+    client.get("/api/async")
+    client.get("/api/sync", headers={"X-Smart-Home-Trace": "1"})
+
+    entries = slow_log.get_entries()
+    assert slow_log.recorded == 3
+    assert [(entry["path"], entry["sampled"]) for entry in entries] == [("/api/sync", True), ("/api/async", False)]
+    assert [span["name"] for span in entries[0]["spans"]][-1] == "serialize"
+    assert entries[1]["spans"] == []
+
+
+def test_slow_requests_endpoint():
+    response = TestClient(main_app).get("/api/debug/slow")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"threshold_ms", "sample_rate", "recorded", "requests"}
+
+
+@pytest.mark.asyncio
+async def test_background_tasks_do_not_inherit_the_request_trace():
+    trace = Trace()
+
+    async def later():
+        await asyncio.sleep(0)
+        with span("late"):
+            return current_trace()
+
+    with traced_by([trace]):
+        task = create_background_task(later())
+        inherited = asyncio.create_task(later())
+    assert await task is None
+    assert await inherited is trace
+    assert [s.name for s in trace.spans] == ["late"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_commands_record_device_spans_in_every_submitter_trace():
+    queue = DeviceCommandQueue(coalesce_seconds=0.01)
+    first, forced = Trace(), Trace()
+
+    def apply(target):
+        with observe("fake", "apply"):
+            return {"status": "success", **target}
+
+    async def submit(trace, target):
+        with traced_by([trace]):
+            return await queue.submit("fake:1", target, apply, lambda: {"is_on": False})
+
+    # An unsampled request, then a sampled and a forced one, all in one batch.
+    results = await asyncio.gather(submit(None, {"on": False}), submit(first, {"on": True}), submit(forced, {"on": True}))
+
+    assert all(result["coalesced"] == 3 for result in results)
+    assert [s.name for s in first.spans] == ["fake.apply"]
+    assert [s.name for s in forced.spans] == ["fake.apply"]
@@ -0,0 +1,152 @@
+"""Descriptor cache against a local fake Wemo switch serving setup.xml and a service SCPD."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.wemo_descriptors import WemoDescriptorCache
+
+SETUP_XML = """<?xml version="1.0"?>
+<root xmlns="urn:Belkin:device-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <device>
+    <deviceType>urn:Belkin:device:controllee:1</deviceType>
+    <friendlyName>Coffee</friendlyName>
+    <manufacturer>Belkin International Inc.</manufacturer>
+    <manufacturerURL>http://www.belkin.com</manufacturerURL>
+    <modelDescription>Belkin Plugin Socket 1.0</modelDescription>
+    <modelName>Socket</modelName>
+    <modelNumber>1.0</modelNumber>
+    <modelURL>http://www.belkin.com/plugin/</modelURL>
+    <serialNumber>{serial}</serialNumber>
+    <UDN>uuid:Socket-1_0-{serial}</UDN>
+    <macAddress>AABBCCDDEEFF</macAddress>
+    <firmwareVersion>WeMo_WW_2.00.11532.PVT-OWRT-SNSV2</firmwareVersion>
+    <serviceList>
+      <service>
+        <serviceType>urn:Belkin:service:basicevent:1</serviceType>
+        <serviceId>urn:Belkin:serviceId:basicevent1</serviceId>
+        <controlURL>/upnp/control/basicevent1</controlURL>
+        <eventSubURL>/upnp/event/basicevent1</eventSubURL>
+        <SCPDURL>/eventservice.xml</SCPDURL>
+      </service>
+    </serviceList>
+  </device>
+</root>
+"""
+
+SCPD_XML = """<?xml version="1.0"?>
+<scpd xmlns="urn:Belkin:service-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <actionList>
+    <action><name>GetBinaryState</name><argumentList><argument>
+      <retval/><name>BinaryState</name><relatedStateVariable>BinaryState</relatedStateVariable><direction>out</direction>
+    </argument></argumentList></action>
+    <action><name>SetBinaryState</name><argumentList><argument>
+      <retval/><name>BinaryState</name><relatedStateVariable>BinaryState</relatedStateVariable><direction>in</direction>
+    </argument></argumentList></action>
+  </actionList>
+  <serviceStateTable>
+    <stateVariable sendEvents="yes"><name>BinaryState</name><dataType>Boolean</dataType><defaultValue>0</defaultValue></stateVariable>
+  </serviceStateTable>
+</scpd>
+"""
+
+
+class FakeWemoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        documents = {"/setup.xml": SETUP_XML.format(serial=self.server.serial), "/eventservice.xml": SCPD_XML}
+        body = documents.get(self.path)
+        if body is None:
+            self.send_response(404)
+            body = ""
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/xml")
+        body = body.encode()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_switch():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeWemoHandler)
+    server.serial = "221517K0101001"
+    server.paths = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_second_connect_builds_device_without_network(fake_switch, tmp_path):
+    host, port = fake_switch.server_address
+    first, from_cache = WemoDescriptorCache(tmp_path / "descriptors.json").connect(host, port)
+    assert from_cache is False
+    assert "/eventservice.xml" in fake_switch.paths
+
+    fake_switch.paths.clear()
+    # A fresh instance reads the persisted file, as after a restart.
+    cache = WemoDescriptorCache(tmp_path / "descriptors.json")
+    device, from_cache = cache.connect(host, port)
+
+    assert from_cache is True
+    assert fake_switch.paths == []
+    assert device.name == "Coffee"
+    assert device.serial_number == first.serial_number
+    assert "SetBinaryState" in device.basicevent.actions
+    assert cache.get_stats() == {"entries": 1, "hits": 1, "misses": 0, "invalidated": 0}
+
+
+def test_revalidate_drops_entry_when_serial_changes(fake_switch, tmp_path):
+    host, port = fake_switch.server_address
+    cache = WemoDescriptorCache(tmp_path / "descriptors.json")
+    cache.connect(host, port)
+
+    assert cache.revalidate(host, port) is True
+
+    fake_switch.serial = "221517K0101999"
+    assert cache.revalidate(host, port) is False
+    assert cache.get_entry(host, port) is None
+
+    device, from_cache = cache.connect(host, port)
+    assert from_cache is False
+    assert device.serial_number == "221517K0101999"
+
+
+def test_unreachable_device_keeps_entry(fake_switch, tmp_path):
+    host, port = fake_switch.server_address
+    cache = WemoDescriptorCache(tmp_path / "descriptors.json")
+    cache.connect(host, port)
+    fake_switch.shutdown()
+    fake_switch.server_close()
+
+    assert cache.revalidate(host, port) is True
+    assert cache.get_entry(host, port) is not None
+
+
+def test_session_patch_is_scoped_to_connect(fake_switch, tmp_path):
+    from pywemo import ouimeaux_device
+    from pywemo.ouimeaux_device.api.service import Session
+
+    host, port = fake_switch.server_address
+    cache = WemoDescriptorCache(tmp_path / "descriptors.json")
+
+    assert ouimeaux_device.Session is Session
+    recorded, _ = cache.connect(host, port)
+    replayed, from_cache = cache.connect(host, port)
+
+    assert from_cache is True
+    assert ouimeaux_device.Session is Session
+    assert type(recorded.session) is Session
+    assert type(replayed.session) is Session
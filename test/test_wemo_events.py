@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from models.database import get_device_history
+from services.wemo_events import WemoEventHub
+from services.wemo_service import WemoService
+
+
+class FakeDevice:
+    EVENT_TYPE_BINARY_STATE = "BinaryState"
+
+    def __init__(self, state=0):
+        self._state = state
+        self.network_reads = 0
+        self.host = "192.0.2.20"
+
+    def subscription_update(self, type_, value):
+        if type_ == "BinaryState":
+            self._state = int(value.split("|")[0])
+            return True
+        return False
+
+    def get_state(self, force_update=False):
+        if force_update:
+            self.network_reads += 1
+        return self._state
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.callbacks = {}
+        self.subscribed = set()
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def register(self, device):
+        self.subscribed.add(device)
+
+    def unregister(self, device):
+        self.subscribed.discard(device)
+        self.callbacks.pop(device, None)
+
+    def on(self, device, type_filter, callback):
+        self.callbacks[device] = callback
+
+    def is_subscribed(self, device):
+        return device in self.subscribed
+
+    def push(self, device, type_, value):
+        self.callbacks[device](device, type_, value)
+
+
+def _service(devices: dict) -> WemoService:
+    service = WemoService()
+    service.devices = devices
+    return service
+
+
+@pytest.fixture
+def hub():
+    service = _service({"coffee": FakeDevice(), "tree": FakeDevice()})
+    registry = FakeRegistry()
+    hub = WemoEventHub(service, registry_factory=lambda: registry, poll_seconds=0)
+    return hub, service, registry
+
+
+@pytest.mark.asyncio
+async def test_pushed_state_is_recorded_and_streamed(hub):
+    hub, service, registry = hub
+    assert hub.start() is True
+    assert service.subscriptions is hub
+    stream = hub.events()
+    first = asyncio.create_task(stream.__anext__())
+    await asyncio.sleep(0)
+
+    await asyncio.to_thread(registry.push, service.devices["coffee"], "BinaryState", "1|1700000000|0")
+    chunk = await asyncio.wait_for(first, 1)
+
+    event = json.loads(chunk.decode().split("data: ")[1])
+    assert event["name"] == "coffee"
+    assert event["is_on"] is True
+    assert event["source"] == "push"
+    assert service.devices["coffee"].network_reads == 0
+    history = get_device_history(device_type="wemo", device_name="coffee")
+    assert json.loads(history[0]["data"]) == {"is_on": True, "source": "push"}
+
+    await stream.aclose()
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_repeated_state_is_not_republished(hub):
+    hub, service, registry = hub
+    hub.start()
+    device = service.devices["tree"]
+
+    for _ in range(3):
+        await asyncio.to_thread(registry.push, device, "BinaryState", "1")
+
+    assert len(get_device_history(device_type="wemo", device_name="tree")) == 1
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_only_lapsed_subscriptions_are_polled(hub):
+    hub, service, registry = hub
+    hub.start()
+    registry.subscribed.discard(service.devices["tree"])
+
+    assert await hub.poll_once() == 1
+    assert service.devices["tree"].network_reads == 1
+    assert service.devices["coffee"].network_reads == 0
+    assert hub.get_stats()["polling"] == ["tree"]
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_polls_and_unparsed_pushes_wait_for_device_commands(hub):
+    hub, service, registry = hub
+    hub.start()
+    tree, coffee = service.devices["tree"], service.devices["coffee"]
+    registry.subscribed.discard(tree)
+    # A push pywemo could not parse needs a SOAP read.
+    coffee.subscription_update = lambda type_, value: False
+
+    with service._device_lock("tree"), service._device_lock("coffee"):
+        poll = asyncio.create_task(hub.poll_once())
+        push = threading.Thread(target=registry.push, args=(coffee, "BinaryState", "1"))
+        push.start()
+        await asyncio.sleep(0.1)
+        assert tree.network_reads == 0
+        assert coffee.network_reads == 0
+    push.join(timeout=2)
+
+    assert await poll == 1
+    assert tree.network_reads == 1
+    assert coffee.network_reads == 1
+    await hub.stop()
+
+
+def test_status_uses_last_known_state_for_unsubscribed_devices():
+    service = _service({"coffee": FakeDevice(state=1)})
+
+    assert service.get_all_status()["coffee"]["is_on"] == 1
+    assert service.devices["coffee"].network_reads == 0
+    assert service.get_state("coffee")["is_on"] == 1
+    assert service.devices["coffee"].network_reads == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_follows_replaced_and_removed_devices(hub):
+    hub, service, registry = hub
+    hub.start()
+    old_coffee = service.devices["coffee"]
+    service.devices["coffee"] = FakeDevice()
+    del service.devices["tree"]
+
+    hub.sync_devices()
+
+    assert registry.subscribed == {service.devices["coffee"]}
+    assert old_coffee not in registry.callbacks
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_registry_failure_falls_back_to_polling():
+    def broken_registry():
+        raise OSError("address in use")
+
+    service = _service({"coffee": FakeDevice()})
+    hub = WemoEventHub(service, registry_factory=broken_registry, poll_seconds=0)
+
+    assert hub.start() is False
+    assert hub.is_subscribed(service.devices["coffee"]) is False
+    assert await hub.poll_once() == 1
+    await hub.stop()
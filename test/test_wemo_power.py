@@ -0,0 +1,181 @@
+from datetime import datetime
+import threading
+import time
+
+import pytest
+
+from models.database import get_power_samples, save_power_samples
+from services.time_utils import PACIFIC_TZ
+from services.wemo_power import MW_MINUTES_PER_KWH, WemoPowerCollector, get_energy_by_day
+from services.wemo_service import WemoService
+
+
+class FakeInsight:
+    def __init__(self, power_mw=0, today_mw_minutes=0, fail=False):
+        self.power_mw = power_mw
+        self.today_mw_minutes = today_mw_minutes
+        self.fail = fail
+        self.insight_params = None
+
+    def update_insight_params(self):
+        if self.fail:
+            raise TimeoutError("insight timed out")
+        self.insight_params = {
+            "state": "1",
+            "currentpower": self.power_mw,
+            "todaymw": self.today_mw_minutes,
+            "ontoday": 600,
+        }
+
+
+class SlowInsight(FakeInsight):
+    def __init__(self, release: threading.Event):
+        super().__init__(power_mw=1_000)
+        self.release = release
+        self.calls = 0
+
+    def update_insight_params(self):
+        self.calls += 1
+        self.release.wait(timeout=5)
+        super().update_insight_params()
+
+
+class FakeSwitch:
+    def get_state(self):
+        return 1
+
+
+@pytest.fixture
+def devices():
+    return {
+        "plant light": FakeInsight(power_mw=12_500, today_mw_minutes=3_000_000),
+        "heater": FakeInsight(fail=True),
+        "coffee": FakeSwitch(),
+    }
+
+
+@pytest.fixture
+def service(devices, monkeypatch):
+    service = WemoService()
+    service.devices = devices
+    rediscovered = []
+    monkeypatch.setattr(service, "refresh_device", lambda name: rediscovered.append(name))
+    service.rediscovered = rediscovered
+    return service
+
+
+@pytest.mark.asyncio
+async def test_collects_insight_devices_and_flushes_in_one_batch(devices, service, monkeypatch):
+    batches = []
+    monkeypatch.setattr("services.wemo_power.save_power_samples", lambda rows: batches.append(rows) or len(rows))
+    collector = WemoPowerCollector(service, retention_days=0)
+
+    assert await collector.collect_once() == 1
+    devices["plant light"].power_mw = 13_000
+    assert await collector.collect_once() == 1
+    assert batches == []
+
+    assert await collector.flush() == 2
+    assert len(batches) == 1
+    assert [row[0] for row in batches[0]] == ["plant light", "plant light"]
+
+    latest = collector.get_latest()
+    assert latest["plant light"]["power_w"] == 13.0
+    assert latest["plant light"]["today_kwh"] == 0.05
+    assert latest["heater"]["error"] == "insight timed out"
+    # Telemetry leaves rediscovery to commands.
+    assert service.rediscovered == []
+    assert "coffee" not in latest
+
+
+@pytest.mark.asyncio
+async def test_failing_device_backs_off_without_delaying_others(devices, service):
+    collector = WemoPowerCollector(service, interval_seconds=10, retention_days=0, max_backoff=25)
+
+    await collector.collect_once()
+    failures, next_attempt = collector._backoff["heater"]
+    assert failures == 1
+    assert next_attempt - time.monotonic() == pytest.approx(20, abs=1)
+
+    # Still backing off: only the healthy device is read.
+    assert await collector.collect_once() == 1
+    assert collector._backoff["heater"][0] == 1
+
+    collector._backoff["heater"] = (1, 0.0)
+    await collector.collect_once()
+    assert collector._backoff["heater"][0] == 2
+    assert collector._backoff["heater"][1] - time.monotonic() == pytest.approx(25, abs=1)
+
+    devices["heater"].fail = False
+    collector._backoff["heater"] = (2, 0.0)
+    assert await collector.collect_once() == 2
+    assert "heater" not in collector._backoff
+    assert "error" not in collector.get_latest()["heater"]
+
+
+@pytest.mark.asyncio
+async def test_slow_read_times_out_and_is_not_stacked(devices, service):
+    release = threading.Event()
+    devices["heater"] = SlowInsight(release)
+    collector = WemoPowerCollector(service, interval_seconds=0.01, retention_days=0, read_timeout=0.1)
+
+    started = time.monotonic()
+    assert await collector.collect_once() == 1
+    assert time.monotonic() - started < 1
+    assert "timed out" in collector.get_latest()["heater"]["error"]
+
+    # The timed-out read is still running; no second read is started meanwhile.
+    collector._backoff["heater"] = (1, 0.0)
+    await collector.collect_once()
+    assert devices["heater"].calls == 1
+
+    release.set()
+    await collector._reads["heater"]
+    assert await collector.collect_once() == 2
+    assert devices["heater"].calls == 2
+
+
+def test_insight_read_is_timed_and_waits_for_device_commands(service):
+    from services.metrics import BACKEND_LATENCY
+
+    before = BACKEND_LATENCY.count("wemo", "read_insight")
+    results = []
+    lock = service._device_lock("plant light")
+    with lock:
+        reader = threading.Thread(target=lambda: results.append(service.read_insight("plant light")))
+        reader.start()
+        reader.join(timeout=0.1)
+        assert reader.is_alive()
+    reader.join(timeout=2)
+
+    assert results[0]["params"]["currentpower"] == 12_500
+    assert BACKEND_LATENCY.count("wemo", "read_insight") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_buffered_samples(service):
+    collector = WemoPowerCollector(service, retention_days=0)
+    await collector.collect_once()
+    await collector.stop()
+
+    assert len(get_power_samples("plant light", 0)) == 1
+
+
+def test_energy_by_day_uses_peak_daily_counter():
+    day_start = int(datetime.now(PACIFIC_TZ).replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+    save_power_samples([
+        ("heater", day_start - 60, 1_500_000, 30 * MW_MINUTES_PER_KWH // 10, 7200, 1),
+        ("heater", day_start + 60, 1_000_000, 0, 0, 1),
+        ("heater", day_start + 120, 2_000_000, 2 * MW_MINUTES_PER_KWH, 3600, 1),
+        ("plant light", day_start + 60, 10_000, 1000, 60, 1),
+    ])
+
+    rows = get_energy_by_day(days=2, device_name="heater", price_per_kwh=0.3)
+
+    assert [row["kwh"] for row in rows] == [3.0, 2.0]
+    today = rows[-1]
+    assert today["cost"] == 0.6
+    assert today["avg_power_w"] == 1500.0
+    assert today["max_power_w"] == 2000.0
+    assert today["on_hours"] == 1.0
+    assert today["samples"] == 2
@@ -0,0 +1,108 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from models.database import get_device_history
+from services.wemo_config import parse_wemo_config
+from services.wemo_events import wemo_event_hub
+from services.wemo_schedule import JOB_PREFIX, TaskStats, WemoScheduleManager
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "wemo_config.yaml"
+    path.write_text(
+        "schedule:\n"
+        "  timezone: Pacific\n"
+        "  tasks:\n"
+        "    - {time: '07:30', device: Coffee, action: on}\n"
+        "    - {time: '22:00:15', device: Tree, action: off}\n"
+        "    - {time: '08:00', device: Tree, action: blink}\n"
+        "    - {device: Lamp, action: on}\n"
+    )
+    return str(path)
+
+
+@pytest.fixture
+def manager(config_file, monkeypatch):
+    monkeypatch.setattr(wemo_event_hub, "_states", {})
+    return WemoScheduleManager(config_file, scheduler=AsyncIOScheduler())
+
+
+class TestWemoScheduleManager:
+
+    def test_start_adds_valid_tasks_to_shared_scheduler(self, manager):
+        manager.start()
+
+        jobs = {job.id: job for job in manager.scheduler.get_jobs()}
+        assert sorted(jobs) == [f"{JOB_PREFIX}Coffee_on_0730", f"{JOB_PREFIX}Tree_off_220015"]
+        assert str(jobs[f"{JOB_PREFIX}Tree_off_220015"].trigger.timezone) == "America/Los_Angeles"
+
+        tasks = {task["id"]: task for task in manager.get_scheduled_tasks()}
+        assert tasks[f"{JOB_PREFIX}Coffee_on_0730"]["runs"] == 0
+
+    def test_stop_removes_only_its_jobs(self, manager):
+        manager.scheduler.add_job(lambda: None, "interval", minutes=5, id="other")
+        manager.start()
+        manager.stop()
+
+        assert [job.id for job in manager.scheduler.get_jobs()] == ["other"]
+        assert manager.get_scheduled_tasks() == []
+
+    @pytest.mark.asyncio
+    async def test_execute_task_uses_action_executor_and_records_history(self, manager):
+        manager.start()
+        task_id = f"{JOB_PREFIX}Coffee_on_0730"
+        execute = AsyncMock(return_value={"status": "success", "device": "Coffee", "is_on": True})
+
+        with patch("services.wemo_schedule.action_executor.execute", execute):
+            await manager.execute_task(task_id, "Coffee", "on")
+
+        execute.assert_awaited_once_with("wemo.on", {"device": "Coffee"})
+        history = get_device_history(device_type="wemo", device_name="coffee")
+        assert json.loads(history[0]["data"]) == {"is_on": True, "source": "schedule"}
+
+        # The push event for the same transition does not add a second row.
+        wemo_event_hub.record_state("coffee", 1, "push")
+        assert len(get_device_history(device_type="wemo", device_name="coffee")) == 1
+
+        stats = {task["id"]: task for task in manager.get_scheduled_tasks()}[task_id]
+        assert stats["runs"] == 1
+        assert stats["failures"] == 0
+        assert stats["last_status"] == "success"
+        assert stats["avg_latency_ms"] is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_task_counts_failure_without_history(self, manager):
+        manager.start()
+        task_id = f"{JOB_PREFIX}Tree_off_220015"
+        execute = AsyncMock(return_value={"status": "error", "message": "Device Tree not found"})
+
+        with patch("services.wemo_schedule.action_executor.execute", execute):
+            await manager.execute_task(task_id, "Tree", "off")
+
+        assert get_device_history(device_type="wemo") == []
+        stats = {task["id"]: task for task in manager.get_scheduled_tasks()}[task_id]
+        assert stats["failures"] == 1
+        assert stats["last_error"] == "Device Tree not found"
+
+    def test_apply_config_reschedules_only_changed_tasks(self, manager):
+        manager.start()
+        kept = f"{JOB_PREFIX}Coffee_on_0730"
+        manager.stats[kept] = TaskStats(runs=3)
+
+        changes = manager.apply_config(parse_wemo_config({
+            "schedule": {
+                "timezone": "Pacific",
+                "tasks": [
+                    {"time": "07:30", "device": "Coffee", "action": "on"},
+                    {"time": "23:00", "device": "Tree", "action": "off"},
+                ],
+            }
+        }))
+
+        assert changes == {"added": [f"{JOB_PREFIX}Tree_off_2300"], "removed": [f"{JOB_PREFIX}Tree_off_220015"]}
+        assert sorted(job.id for job in manager.scheduler.get_jobs()) == [kept, f"{JOB_PREFIX}Tree_off_2300"]
+        assert manager.stats[kept].runs == 3
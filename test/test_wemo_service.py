@@ -1,5 +1,9 @@
+import threading
+
+import pytest
 import yaml
 
+from services.wemo_config import parse_wemo_config
 from services.wemo_service import WemoService
 
 
@@ -21,7 +25,7 @@ class FakeWemoDevice:
             raise TimeoutError("old endpoint timed out")
         self.state = 0
 
-    def get_state(self):
+    def get_state(self, force_update=False):
         if "get_state" in self.fail_on:
             raise TimeoutError("old endpoint timed out")
         return self.state
@@ -116,3 +120,84 @@ def test_get_all_status_refreshes_failed_device(monkeypatch):
     assert result["coffee"]["is_on"] == 1
     assert result["coffee"]["host"] == "192.0.2.10"
     assert result["coffee"]["rediscovered"] is True
+
+
+def test_apply_config_connects_only_new_or_moved_devices(monkeypatch):
+    connected = []
+
+    def device_from_description(url):
+        host, port = url.split("//")[1].split("/")[0].split(":")
+        connected.append(host)
+        return FakeWemoDevice(host, host, int(port))
+
+    monkeypatch.setattr(
+        "services.wemo_service.pywemo.setup_url_for_address",
+        lambda host, port: f"http://{host}:{port}/setup.xml",
+    )
+    monkeypatch.setattr("services.wemo_service.pywemo.device_from_description", device_from_description)
+
+    coffee = FakeWemoDevice("Coffee", "192.0.2.10", 49153)
+    service = WemoService()
+    service.devices = {
+        "coffee": coffee,
+        "tree": FakeWemoDevice("Tree", "192.0.2.11", 49153),
+        "lamp": FakeWemoDevice("Lamp", "192.0.2.12", 49153),
+    }
+
+    changes = service.apply_config(parse_wemo_config({
+        "devices": [
+            {"name": "Coffee", "host": "192.0.2.10"},
+            {"name": "Tree", "host": "192.0.2.21", "port": 49153},
+            {"name": "Fan", "host": "192.0.2.30", "port": 49154},
+        ]
+    }))
+
+    assert sorted(connected) == ["192.0.2.21", "192.0.2.30"]
+    assert sorted(changes["added"]) == ["Fan", "Tree"]
+    assert changes["removed"] == ["lamp"]
+    assert service.devices["coffee"] is coffee
+    assert sorted(service.devices) == ["coffee", "fan", "tree"]
+
+
+def test_rediscovery_does_not_readd_device_removed_by_reload(monkeypatch):
+    service = WemoService()
+    service.config_file = "/tmp/nonexistent_wemo_config.yaml"
+    service.devices = {
+        "coffee": FakeWemoDevice("Coffee", "192.0.2.10", 49153),
+        "lamp": FakeWemoDevice("Lamp", "192.0.2.12", 49153),
+    }
+    service.apply_config(parse_wemo_config({"devices": [{"name": "Coffee", "host": "192.0.2.10"}]}))
+
+    monkeypatch.setattr(
+        "services.wemo_service.pywemo.discover_devices",
+        lambda: [FakeWemoDevice("Lamp", "192.0.2.12", 49154)],
+    )
+
+    assert service.refresh_device("lamp") is None
+    assert sorted(service.devices) == ["coffee"]
+
+
+@pytest.mark.asyncio
+async def test_reload_config_connects_in_threads_and_updates_devices_on_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    connect_threads = []
+
+    def connect(device_config):
+        connect_threads.append(threading.get_ident())
+        return FakeWemoDevice(device_config.name, device_config.host, device_config.port)
+
+    service = WemoService()
+    service.devices = {"lamp": FakeWemoDevice("Lamp", "192.0.2.12", 49153)}
+    monkeypatch.setattr(service, "_connect", connect)
+    commit = service._commit_config
+    commit_threads = []
+    monkeypatch.setattr(
+        service, "_commit_config", lambda *args: commit_threads.append(threading.get_ident()) or commit(*args)
+    )
+
+    changes = await service.reload_config(parse_wemo_config({"devices": [{"name": "Fan", "host": "192.0.2.30"}]}))
+
+    assert changes == {"added": ["Fan"], "removed": ["lamp"], "failed": []}
+    assert sorted(service.devices) == ["fan"]
+    assert connect_threads and loop_thread not in connect_threads
+    assert commit_threads == [loop_thread]